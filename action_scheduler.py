@@ -0,0 +1,223 @@
+"""
+Asyncio action scheduler for the Python Auto Movement application.
+This module runs coroutine actions from a timer heap on one event loop, with
+priorities, cancellation and per-action timeouts.
+"""
+import heapq
+import itertools
+import logging
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import asyncio
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Factory creating the coroutine of one run of an action
+ActionFactory = Callable[[], Awaitable[Any]]
+
+
+class ScheduledAction:
+    """
+    An action waiting in the scheduler's timer heap.
+
+    Entries are ordered by due time; among actions that are already due the
+    scheduler runs the one with the highest priority first.
+    """
+
+    __slots__ = ('name', 'factory', 'due', 'priority', 'timeout', 'interval', 'error_backoff',
+                 'sequence', 'cancelled')
+
+    def __init__(self, name: str, factory: ActionFactory, due: float, priority: int,
+                 timeout: Optional[float], interval: Optional[float],
+                 error_backoff: Optional[float], sequence: int):
+        self.name = name
+        self.factory = factory
+        self.due = due
+        self.priority = priority
+        self.timeout = timeout
+        self.interval = interval
+        self.error_backoff = error_backoff
+        self.sequence = sequence
+        self.cancelled = False
+
+    def __lt__(self, other: 'ScheduledAction') -> bool:
+        return (self.due, -self.priority, self.sequence) < (other.due, -other.priority, other.sequence)
+
+    def __repr__(self) -> str:
+        return f"ScheduledAction({self.name!r}, due={self.due:.3f}, priority={self.priority})"
+
+
+class ActionScheduler:
+    """
+    Timer-heap scheduler running one action at a time on an asyncio event loop.
+
+    The pointer is a single resource, so actions never overlap. While nothing
+    is due, run() awaits the next due time and uses no CPU. Other tasks on
+    the same loop, such as hotkey handling or metrics export, keep running
+    during actions because moves await between steps.
+    """
+
+    def __init__(self):
+        """Initialize an empty scheduler."""
+        self._heap: List[ScheduledAction] = []
+        # Due actions, highest priority first
+        self._ready: List[Tuple[int, float, int, ScheduledAction]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional['asyncio.Event'] = None
+        self._current: Optional[ScheduledAction] = None
+        self._current_task: Optional['asyncio.Task[Any]'] = None
+        self._stopping = False
+
+    def schedule(self, name: str, factory: ActionFactory, delay: float = 0.0, priority: int = 0,
+                 timeout: Optional[float] = None, interval: Optional[float] = None,
+                 error_backoff: Optional[float] = None) -> ScheduledAction:
+        """
+        Schedule an action.
+
+        Must be called from the event loop thread.
+
+        Args:
+            name: Name of the action, used for logging
+            factory: Function returning a new coroutine for each run
+            delay: Time until the action is due (in seconds)
+            priority: Higher priorities run first among due actions
+            timeout: Maximum run time before the action is cancelled (in seconds)
+            interval: Repeat the action this long after each run (in seconds)
+            error_backoff: Retry a failed action after this long (in seconds)
+
+        Returns:
+            Handle that can be passed to cancel
+        """
+        # asyncio is imported on first use to keep this module cheap to import
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        action = ScheduledAction(name, factory, loop.time() + delay, priority, timeout, interval,
+                                 error_backoff, next(self._sequence))
+        heapq.heappush(self._heap, action)
+        self._wake()
+        logger.debug("Scheduled %s in %.1f seconds with priority %d", name, delay, priority)
+        return action
+
+    def cancel(self, action: ScheduledAction) -> None:
+        """
+        Cancel a scheduled action, interrupting it if it is running.
+
+        Args:
+            action: Handle returned by schedule
+        """
+        action.cancelled = True
+        if action is self._current and self._current_task is not None:
+            self._current_task.cancel()
+        self._wake()
+
+    def cancel_all(self) -> None:
+        """Cancel every scheduled action and interrupt the running one."""
+        for action in self._heap:
+            action.cancelled = True
+        for entry in self._ready:
+            entry[-1].cancelled = True
+        self._heap.clear()
+        self._ready.clear()
+        if self._current is not None:
+            self.cancel(self._current)
+        self._wake()
+
+    def stop(self) -> None:
+        """Cancel everything and make run() return."""
+        self._stopping = True
+        self.cancel_all()
+
+    @property
+    def pending(self) -> List[ScheduledAction]:
+        """Scheduled actions that have not been cancelled, in due order."""
+        actions = self._heap + [entry[-1] for entry in self._ready]
+        return sorted(action for action in actions if not action.cancelled)
+
+    async def run(self) -> None:
+        """Run due actions until stop() is called."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+        while not self._stopping:
+            action = self._pop_due(loop.time())
+            if action is None:
+                await self._sleep_until_next(loop)
+                continue
+            await self._execute(action, loop)
+
+    def _pop_due(self, now: float) -> Optional[ScheduledAction]:
+        """Remove and return the highest priority due action, if any."""
+        # Move every due entry from the timer heap to the ready heap, and
+        # drop cancelled entries from the top so they cause no wakeups
+        while self._heap and (self._heap[0].due <= now or self._heap[0].cancelled):
+            action = heapq.heappop(self._heap)
+            if not action.cancelled:
+                heapq.heappush(self._ready, (-action.priority, action.due, action.sequence, action))
+
+        while self._ready:
+            action = heapq.heappop(self._ready)[-1]
+            if not action.cancelled:
+                return action
+        return None
+
+    async def _sleep_until_next(self, loop: 'asyncio.AbstractEventLoop') -> None:
+        """Wait until the next action is due or the heap changes."""
+        import asyncio
+
+        timeout = None
+        if self._heap:
+            timeout = max(self._heap[0].due - loop.time(), 0.0)
+
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _execute(self, action: ScheduledAction, loop: 'asyncio.AbstractEventLoop') -> None:
+        """Run one action with its timeout and reschedule it if needed."""
+        import asyncio
+
+        self._current = action
+        self._current_task = loop.create_task(asyncio.wait_for(action.factory(), action.timeout))
+        failed = False
+        try:
+            await self._current_task
+        except asyncio.CancelledError:
+            if not action.cancelled:
+                # The scheduler itself is being cancelled
+                raise
+            logger.info(f"Action {action.name} cancelled")
+        except asyncio.TimeoutError:
+            failed = True
+            logger.error(f"Action {action.name} timed out after {action.timeout} seconds")
+        except Exception as e:
+            failed = True
+            logger.error(f"Error during action {action.name}: {e}", exc_info=True)
+        finally:
+            self._current = None
+            self._current_task = None
+
+        if action.cancelled or self._stopping:
+            return
+        if failed and action.error_backoff is not None:
+            self._reschedule(action, action.error_backoff, loop)
+        elif action.interval is not None:
+            self._reschedule(action, action.interval, loop)
+
+    def _reschedule(self, action: ScheduledAction, delay: float, loop: 'asyncio.AbstractEventLoop') -> None:
+        """Put an action back in the heap after a delay."""
+        action.due = loop.time() + delay
+        action.sequence = next(self._sequence)
+        heapq.heappush(self._heap, action)
+
+    def _wake(self) -> None:
+        """Wake run() so it re-examines the heap."""
+        if self._wakeup is not None:
+            self._wakeup.set()
@@ -0,0 +1,316 @@
+"""
+Pointer output backends for the Python Auto Movement application.
+This module defines the interface used to move, click and scroll the mouse,
+and its implementations: pynput, XTest, and side-effect free null and
+recording backends for headless benchmarking and testing.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Button names accepted by every backend
+BUTTONS = ('left', 'middle', 'right')
+
+
+class PointerBackend:
+    """
+    Interface for pointer output.
+
+    Subclasses implement move, click, scroll and position. The default flush
+    does nothing; backends that buffer events set buffered and override it.
+    """
+
+    name = 'base'
+
+    # True when move only queues the event and flush sends it
+    buffered = False
+
+    def move(self, x: int, y: int) -> None:
+        """
+        Move the pointer to an absolute position.
+
+        Args:
+            x: The x-coordinate to move to
+            y: The y-coordinate to move to
+        """
+        raise NotImplementedError
+
+    def click(self, button: str = 'left', count: int = 1) -> None:
+        """
+        Click a mouse button at the current position.
+
+        Args:
+            button: Button name, one of BUTTONS
+            count: Number of clicks
+        """
+        raise NotImplementedError
+
+    def scroll(self, dx: int, dy: int) -> None:
+        """
+        Scroll by a number of steps.
+
+        Args:
+            dx: Horizontal scroll steps, positive to the right
+            dy: Vertical scroll steps, positive upwards
+        """
+        raise NotImplementedError
+
+    def position(self) -> Tuple[int, int]:
+        """
+        Get the current pointer position.
+
+        Returns:
+            Tuple of (x, y) coordinates
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Send any buffered events."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class PynputBackend(PointerBackend):
+    """Backend writing to the pointer through pynput's mouse Controller."""
+
+    name = 'pynput'
+
+    def __init__(self):
+        """Create the pynput mouse controller."""
+        from pynput.mouse import Button, Controller
+
+        self._controller = Controller()
+        self._buttons = {name: getattr(Button, name) for name in BUTTONS}
+
+    def move(self, x: int, y: int) -> None:
+        self._controller.position = (x, y)
+
+    def click(self, button: str = 'left', count: int = 1) -> None:
+        self._controller.click(self._buttons[button], count)
+
+    def scroll(self, dx: int, dy: int) -> None:
+        self._controller.scroll(dx, dy)
+
+    def position(self) -> Tuple[int, int]:
+        x, y = self._controller.position
+        return int(x), int(y)
+
+
+class NullBackend(PointerBackend):
+    """
+    Backend with no side effects.
+
+    It only remembers the last position so moves can chain from it.
+    """
+
+    name = 'null'
+
+    def __init__(self, start_pos: Tuple[int, int] = (0, 0)):
+        """
+        Initialize the backend.
+
+        Args:
+            start_pos: Initial pointer position
+        """
+        self._position = (int(start_pos[0]), int(start_pos[1]))
+
+    def move(self, x: int, y: int) -> None:
+        self._position = (x, y)
+
+    def click(self, button: str = 'left', count: int = 1) -> None:
+        pass
+
+    def scroll(self, dx: int, dy: int) -> None:
+        pass
+
+    def position(self) -> Tuple[int, int]:
+        return self._position
+
+
+class PointerEvent(NamedTuple):
+    """A pointer event captured by the RecordingBackend."""
+    time: float
+    kind: str  # 'move', 'click' or 'scroll'
+    x: int
+    y: int
+    button: Optional[str] = None
+    count: int = 0
+
+
+class RecordingBackend(NullBackend):
+    """In-memory backend recording every event with its timestamp."""
+
+    name = 'recording'
+
+    def __init__(self, start_pos: Tuple[int, int] = (0, 0),
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the backend.
+
+        Args:
+            start_pos: Initial pointer position
+            clock: Clock used to timestamp events (in seconds)
+        """
+        super().__init__(start_pos)
+        self.clock = clock
+        self.events: List[PointerEvent] = []
+        self._lock = threading.Lock()
+
+    def move(self, x: int, y: int) -> None:
+        self._position = (x, y)
+        self._record(PointerEvent(self.clock(), 'move', x, y))
+
+    def click(self, button: str = 'left', count: int = 1) -> None:
+        x, y = self._position
+        self._record(PointerEvent(self.clock(), 'click', x, y, button, count))
+
+    def scroll(self, dx: int, dy: int) -> None:
+        self._record(PointerEvent(self.clock(), 'scroll', dx, dy))
+
+    def count(self, kind: str) -> int:
+        """
+        Count the recorded events of a given kind.
+
+        Args:
+            kind: Event kind, 'move', 'click' or 'scroll'
+
+        Returns:
+            Number of matching events
+        """
+        with self._lock:
+            return sum(1 for event in self.events if event.kind == kind)
+
+    def clear(self) -> None:
+        """Forget every recorded event."""
+        with self._lock:
+            self.events.clear()
+
+    def _record(self, event: PointerEvent) -> None:
+        with self._lock:
+            self.events.append(event)
+
+
+class XTestBackend(PointerBackend):
+    """
+    Backend injecting events with the X11 XTest extension through python-xlib.
+
+    It keeps one display connection, which works with a real X server as well
+    as a headless Xvfb server. In batched mode, motion events are only queued
+    in the connection's request buffer and written by flush, which the step
+    scheduler calls once for the points due within each flush interval, so
+    no step waits on a round trip to the X server. Unbatched mode syncs
+    after every call, like pynput does.
+    """
+
+    name = 'xtest'
+
+    # X11 button numbers
+    _BUTTON_NUMBERS = {'left': 1, 'middle': 2, 'right': 3}
+
+    def __init__(self, display_name: Optional[str] = None, batched: bool = True):
+        """
+        Open the display connection.
+
+        Args:
+            display_name: X display to connect to, defaults to $DISPLAY
+            batched: Queue motion events until flush instead of syncing per call
+        """
+        from Xlib import X
+        from Xlib.display import Display
+        from Xlib.ext import xtest
+
+        self._X = X
+        self._xtest = xtest
+        self.display = Display(display_name)
+        self.root = self.display.screen().root
+        self.buffered = batched
+        self.pending = 0
+
+        if not self.display.has_extension('XTEST'):
+            self.display.close()
+            raise RuntimeError(f"X display {display_name or ''} does not support the XTEST extension")
+
+    def move(self, x: int, y: int) -> None:
+        self._xtest.fake_input(self.display, self._X.MotionNotify, x=x, y=y)
+        if self.buffered:
+            self.pending += 1
+        else:
+            self.display.sync()
+
+    def click(self, button: str = 'left', count: int = 1) -> None:
+        number = self._BUTTON_NUMBERS[button]
+        self._press_release(number, count)
+        self._send()
+
+    def scroll(self, dx: int, dy: int) -> None:
+        # X11 reports scrolling as presses of buttons 4/5 (vertical) and 6/7 (horizontal)
+        if dy:
+            self._press_release(4 if dy > 0 else 5, abs(dy))
+        if dx:
+            self._press_release(7 if dx > 0 else 6, abs(dx))
+        self._send()
+
+    def position(self) -> Tuple[int, int]:
+        # Queued motion must reach the server before asking where the pointer is
+        self.flush()
+        pointer = self.root.query_pointer()
+        return pointer.root_x, pointer.root_y
+
+    def flush(self) -> None:
+        """Write every queued request to the X server without waiting for a reply."""
+        if self.pending:
+            self.display.flush()
+            self.pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.display.close()
+
+    def _press_release(self, number: int, count: int) -> None:
+        for _ in range(count):
+            self._xtest.fake_input(self.display, self._X.ButtonPress, number)
+            self._xtest.fake_input(self.display, self._X.ButtonRelease, number)
+
+    def _send(self) -> None:
+        """Send queued button events; queued motion goes first since requests keep their order."""
+        if self.buffered:
+            self.pending += 1
+            self.flush()
+        else:
+            self.display.sync()
+
+
+# Backends available by name
+backend_classes: Dict[str, Type[PointerBackend]] = {
+    PynputBackend.name: PynputBackend,
+    NullBackend.name: NullBackend,
+    RecordingBackend.name: RecordingBackend,
+    XTestBackend.name: XTestBackend,
+}
+
+
+def create_backend(name: str, **kwargs) -> PointerBackend:
+    """
+    Create a pointer backend by name.
+
+    Args:
+        name: Backend name, one of backend_classes
+        **kwargs: Arguments passed to the backend constructor
+
+    Returns:
+        The new backend
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    try:
+        backend_class = backend_classes[name]
+    except KeyError:
+        raise ValueError(f"Unknown pointer backend '{name}', expected one of {sorted(backend_classes)}")
+    logger.info(f"Using {name} pointer backend")
+    return backend_class(**kwargs)
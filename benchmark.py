@@ -0,0 +1,650 @@
+"""
+Benchmarks for the Python Auto Movement application.
+This module measures trajectory generation, the step loop and whole actions,
+the cost of the pointer injection backends, the import time of the
+application modules, and the timing of replayed production recordings.
+
+The suite is reproducible: it seeds every random generator, sends output to
+a null backend and replaces real sleeps with a virtual clock, so it measures
+only the CPU work. Results are stored as JSON and can be compared between
+commits.
+
+Usage:
+    python benchmark.py suite --output bench.json
+    python benchmark.py suite --compare bench.json
+    python benchmark.py injection --xvfb
+    python benchmark.py injection --display :0 --events 2000
+    python benchmark.py imports
+    python benchmark.py replay trace.bin --speed 1
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import define
+import mouse_mover
+import random_source
+import trajectory
+import trajectory_library
+from backends import NullBackend, PointerBackend, backend_classes, create_backend
+from event_recorder import load_events, replay
+from simulation import VirtualClock
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Display used when starting a private Xvfb server
+XVFB_DISPLAY = ':99'
+
+# Seed used by the suite unless another one is given
+DEFAULT_SEED = 1234
+
+# Relative ops/sec drop reported as a regression when comparing results
+REGRESSION_THRESHOLD = 0.10
+
+# Timed runs of each case; the best one is kept, since single runs of the
+# same commit differ by more than the regression threshold
+DEFAULT_REPEATS = 5
+
+
+class StepTimingBackend(NullBackend):
+    """Null backend recording a high-resolution timestamp for every move."""
+
+    name = 'step-timing'
+
+    def __init__(self, start_pos: Tuple[int, int] = (0, 0)):
+        super().__init__(start_pos)
+        self.stamps: List[int] = []
+
+    def move(self, x: int, y: int) -> None:
+        self.stamps.append(time.perf_counter_ns())
+        self._position = (x, y)
+
+
+@contextlib.contextmanager
+def benchmark_environment(seed: int) -> Iterator[StepTimingBackend]:
+    """
+    Seed the random generators and route all output and waiting to fakes.
+
+    Args:
+        seed: Seed for the shared random generator
+
+    Yields:
+        The backend receiving every pointer event
+    """
+    random_source.seed(seed)
+
+    backend = StepTimingBackend((960, 540))
+    virtual_clock = VirtualClock()
+    previous_backend = mouse_mover.set_backend(backend)
+    previous_links = define.set_press_links(define.default_elements)
+    previous_clock = mouse_mover.set_clock(virtual_clock.time, virtual_clock.sleep, spin_threshold=0.0)
+    # Per-action log lines would measure the terminal rather than the code
+    logging.disable(logging.INFO)
+    try:
+        yield backend
+    finally:
+        logging.disable(logging.NOTSET)
+        mouse_mover.set_clock(*previous_clock)
+        define.set_press_links(previous_links)
+        mouse_mover.set_backend(previous_backend)
+
+
+def step_latencies_us(stamps: List[int], starts: List[int]) -> np.ndarray:
+    """
+    Compute the time between consecutive steps of the same move.
+
+    Args:
+        stamps: Timestamp of every move event (in nanoseconds)
+        starts: Index in stamps where each move begins
+
+    Returns:
+        Array of per-step latencies in microseconds
+    """
+    boundaries = set(starts)
+    diffs = [stamps[i] - stamps[i - 1] for i in range(1, len(stamps)) if i not in boundaries]
+    return np.array(diffs, dtype=np.float64) / 1000
+
+
+def timed_run(operation: Callable[[], Any], iterations: int,
+              backend: StepTimingBackend) -> Tuple[float, np.ndarray, int]:
+    """
+    Time one run of a benchmark case.
+
+    Args:
+        operation: Function to call once per iteration
+        iterations: Number of timed calls
+        backend: Backend receiving the pointer events, for step latencies
+
+    Returns:
+        Tuple of (ops/sec, per-step latencies in microseconds, number of steps)
+    """
+    backend.stamps.clear()
+    starts = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        starts.append(len(backend.stamps))
+        operation()
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed, step_latencies_us(backend.stamps, starts), len(backend.stamps)
+
+
+def peak_traced_bytes(operation: Callable[[], Any], calls: int) -> float:
+    """
+    Measure the memory an operation holds at its peak.
+
+    tracemalloc sees the bytes held at the peak of each call, not how many
+    allocations were made. It runs separately from the timed calls, since
+    tracing slows every call down.
+
+    Args:
+        operation: Function to measure
+        calls: Number of calls to measure
+
+    Returns:
+        Median peak of traced memory above the starting point, in bytes
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            operation()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return float(np.median(peaks))
+
+
+def run_cases(cases: List[Tuple[str, Callable[[], Any], int]], backend: StepTimingBackend,
+              repeats: int = DEFAULT_REPEATS) -> List[Dict[str, Any]]:
+    """
+    Run benchmark cases and collect their statistics.
+
+    The timed runs are interleaved, one run of every case per round, so a
+    slow spell of the machine affects every case a little rather than one
+    case entirely; the best run of each case is kept.
+
+    Args:
+        cases: (name, operation, iterations per run) of each case
+        backend: Backend receiving the pointer events, for step latencies
+        repeats: Number of timed runs of each case
+
+    Returns:
+        One dictionary per case with the best and median ops/sec over the
+        runs, p50/p99 per-step latency and the peak traced memory per call
+    """
+    # Warm caches so the timed calls measure the steady state
+    for _, operation, iterations in cases:
+        for _ in range(min(iterations, 10)):
+            operation()
+
+    rates: Dict[str, List[float]] = {name: [] for name, _, _ in cases}
+    latencies: Dict[str, List[np.ndarray]] = {name: [] for name, _, _ in cases}
+    steps: Dict[str, int] = {name: 0 for name, _, _ in cases}
+    for _ in range(repeats):
+        for name, operation, iterations in cases:
+            rate, run_latencies, run_steps = timed_run(operation, iterations, backend)
+            rates[name].append(rate)
+            latencies[name].append(run_latencies)
+            steps[name] += run_steps
+
+    results = []
+    for name, operation, iterations in cases:
+        case_latencies = np.concatenate(latencies[name])
+        case_steps = steps[name] / repeats
+        result = {
+            'name': name,
+            'iterations': iterations,
+            'repeats': repeats,
+            'ops_per_sec': max(rates[name]),
+            'median_ops_per_sec': float(np.median(rates[name])),
+            'steps': case_steps,
+            'backend_calls_per_op': case_steps / iterations,
+            'peak_traced_bytes_per_op': peak_traced_bytes(operation, min(iterations, 50)),
+        }
+        if case_latencies.size:
+            result['p50_step_us'] = float(np.percentile(case_latencies, 50))
+            result['p99_step_us'] = float(np.percentile(case_latencies, 99))
+        results.append(result)
+    return results
+
+
+def run_suite(seed: int = DEFAULT_SEED, iterations: int = 200, repeats: int = DEFAULT_REPEATS) -> Dict[str, Any]:
+    """
+    Run every trajectory, step loop and action benchmark.
+
+    Args:
+        seed: Seed for the random generators
+        iterations: Number of timed calls per run for the cheaper cases; whole actions use a tenth
+        repeats: Number of timed runs of each case
+
+    Returns:
+        Dictionary with the run metadata and one result per case
+    """
+    start_pos, end_pos = (120, 180), (1500, 900)
+
+    # Start from empty caches so the hit rates are those of this run
+    trajectory.basis_cache.clear()
+    trajectory_library.trajectory_library.clear()
+
+    with benchmark_environment(seed) as backend:
+        # Drawn after seeding, so every run curves through the same points
+        points = mouse_mover.get_bezier_points(start_pos, end_pos, 3)
+
+        def move_round_trip() -> None:
+            target = end_pos if backend.position() != end_pos else start_pos
+            mouse_mover.move_mouse_to(target[0], target[1], 1.5)
+
+        cases = [
+            ('get_bezier_points', lambda: mouse_mover.get_bezier_points(start_pos, end_pos, 3), iterations * 10),
+            ('bezier_curve', lambda: mouse_mover.bezier_curve(points, 0.37), iterations * 10),
+            ('plan_move', lambda: mouse_mover.plan_move(start_pos, end_pos, 1.5), iterations),
+            ('move_mouse_to', move_round_trip, iterations),
+            ('perform_random_movement', mouse_mover.perform_random_movement, max(iterations // 10, 1)),
+            ('perform_navigation', mouse_mover.perform_navigation, max(iterations // 10, 1)),
+        ]
+        results = run_cases(cases, backend, repeats)
+
+    return {
+        'metadata': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'seed': seed,
+            'repeats': repeats,
+        },
+        'results': results,
+        'caches': cache_stats(),
+    }
+
+
+def cache_stats() -> Dict[str, Any]:
+    """
+    Report the usage of the trajectory caches.
+
+    Returns:
+        Dictionary with the size, hits, misses and hit rate of the basis,
+        parameter and trajectory library caches
+    """
+    basis = trajectory.basis_cache.stats()
+    library = trajectory_library.trajectory_library.stats()
+    return {
+        'basis': basis['basis'],
+        'parameters': basis['parameters'],
+        'library': {key: library[key] for key in ('routes', 'paths', 'hits', 'misses', 'hit_rate')},
+    }
+
+
+def git_commit() -> Optional[str]:
+    """
+    Get the commit the benchmark ran on.
+
+    Returns:
+        Short commit hash, or None outside a git checkout
+    """
+    try:
+        completed = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return completed.stdout.strip() or None
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Compare two suite runs case by case.
+
+    Args:
+        baseline: Earlier suite results
+        current: New suite results
+        threshold: Relative drop of the best ops/sec reported as a regression
+
+    Returns:
+        Names of the cases that regressed
+    """
+    previous = {result['name']: result for result in baseline['results']}
+    regressions = []
+    if baseline['metadata'].get('repeats', 1) < 2:
+        logger.warning("The baseline was timed in a single run; its noise may exceed the regression threshold")
+    print(f"Comparing against {baseline['metadata'].get('commit')} ({baseline['metadata'].get('timestamp')})")
+    for result in current['results']:
+        old = previous.get(result['name'])
+        if old is None:
+            continue
+        ratio = result['ops_per_sec'] / old['ops_per_sec']
+        flag = ''
+        if ratio < 1 - threshold:
+            flag = '  REGRESSION'
+            regressions.append(result['name'])
+        calls = ''
+        if old.get('backend_calls_per_op') and result['backend_calls_per_op']:
+            calls = f", {result['backend_calls_per_op'] / old['backend_calls_per_op']:6.2f}x moves/op"
+        print(f"{result['name']:>24}: {ratio:6.2f}x ops/sec{calls}{flag}")
+    return regressions
+
+
+def start_xvfb(display: str = XVFB_DISPLAY, timeout: float = 5.0) -> subprocess.Popen:
+    """
+    Start a headless Xvfb server and wait until it accepts connections.
+
+    Args:
+        display: Display name to serve, e.g. ':99'
+        timeout: Maximum time to wait for the server (in seconds)
+
+    Returns:
+        The running Xvfb process
+
+    Raises:
+        RuntimeError: If Xvfb is not installed or does not start in time
+    """
+    if shutil.which('Xvfb') is None:
+        raise RuntimeError("Xvfb is not installed")
+
+    process = subprocess.Popen(['Xvfb', display, '-screen', '0', '1920x1080x24', '-nolisten', 'tcp'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    socket_path = f"/tmp/.X11-unix/X{display.lstrip(':')}"
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError(f"Xvfb did not start on display {display}")
+        time.sleep(0.05)
+    return process
+
+
+def sample_path(count: int) -> List[Tuple[int, int]]:
+    """
+    Build a path that visits a different pixel at every step.
+
+    Args:
+        count: Number of points
+
+    Returns:
+        List of (x, y) positions
+    """
+    return [(100 + i % 1600, 126 + (i * 7) % 900) for i in range(count)]
+
+
+def bench_injection(backend: PointerBackend, events: int) -> Dict[str, Any]:
+    """
+    Measure the cost of injecting motion events through a backend.
+
+    Each event is one move followed by one flush, which is what the step
+    scheduler does for every step of a move.
+
+    Args:
+        backend: Backend to measure
+        events: Number of motion events to inject
+
+    Returns:
+        Dictionary with the total time and the cost per event in microseconds
+    """
+    path = sample_path(events)
+
+    # Warm up the connection and any lazy initialization
+    for x, y in path[:50]:
+        backend.move(x, y)
+        backend.flush()
+    backend.position()
+
+    start = time.perf_counter()
+    for x, y in path:
+        backend.move(x, y)
+        backend.flush()
+    elapsed = time.perf_counter() - start
+
+    # Make sure every event really reached the pointer
+    final = backend.position()
+    if final != path[-1]:
+        logger.warning(f"{backend.name} backend ended at {final}, expected {path[-1]}")
+
+    return {
+        'backend': backend.name,
+        'buffered': backend.buffered,
+        'events': events,
+        'seconds': elapsed,
+        'us_per_event': elapsed / events * 1e6,
+    }
+
+
+def run_injection(display: Optional[str], events: int) -> List[Dict[str, Any]]:
+    """
+    Compare pynput with the unbatched and batched XTest backends on one display.
+
+    Args:
+        display: X display to use, defaults to $DISPLAY
+        events: Number of motion events per backend
+
+    Returns:
+        One result dictionary per backend
+    """
+    if display:
+        # pynput reads the display from the environment
+        os.environ['DISPLAY'] = display
+
+    candidates = [
+        ('pynput', {}),
+        ('xtest', {'display_name': display, 'batched': False}),
+        ('xtest', {'display_name': display, 'batched': True}),
+    ]
+
+    results = []
+    for name, kwargs in candidates:
+        try:
+            backend = create_backend(name, **kwargs)
+        except Exception as e:
+            logger.error(f"Skipping {name} backend: {e}")
+            continue
+        try:
+            results.append(bench_injection(backend, events))
+        finally:
+            backend.close()
+    return results
+
+
+def run_replay(path: str, backend_name: str = 'null', speed: float = 1.0) -> Dict[str, Any]:
+    """
+    Replay a recording of real pointer events and measure how late each event was sent.
+
+    Unlike the synthetic suite, the input has the timing of a production run,
+    including its pauses and bursts of clicks.
+
+    Args:
+        path: File recorded with AUTO_MOVEMENT_RECORD set
+        backend_name: Backend to replay through
+        speed: Playback speed factor, 0 for as fast as possible
+
+    Returns:
+        Dictionary with the replay counts and lateness percentiles in microseconds
+    """
+    events = load_events(path)
+    lateness: List[float] = []
+    backend = create_backend(backend_name)
+    try:
+        report = replay(events, backend, speed, on_step=lateness.append)
+    finally:
+        backend.close()
+
+    late_us = np.array(lateness, dtype=np.float64) * 1e6
+    result = dict(report._asdict(), backend=backend_name, speed=speed)
+    result['events_per_sec'] = report.events / report.duration if report.duration > 0 else float('inf')
+    if len(late_us):
+        result['p50_late_us'] = float(np.percentile(late_us, 50))
+        result['p99_late_us'] = float(np.percentile(late_us, 99))
+    return result
+
+
+def measure_import_time(module: str, runs: int = 5) -> Dict[str, Any]:
+    """
+    Measure the cold import time of a module in fresh interpreters.
+
+    The module is imported without a display, so any import-time side effect
+    such as creating a pynput controller or capturing positions shows up as
+    an error or a large time.
+
+    Args:
+        module: Name of the module to import
+        runs: Number of fresh interpreters to start
+
+    Returns:
+        Dictionary with the best and median cumulative import time in milliseconds
+    """
+    env = dict(os.environ)
+    env.pop('DISPLAY', None)
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    timings = []
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                                   cwd=cwd, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed: {completed.stderr.strip().splitlines()[-1]}")
+
+        # The last line of -X importtime output is the requested module itself:
+        # "import time: self [us] | cumulative | imported package"
+        cumulative_us = int(completed.stderr.strip().splitlines()[-1].split('|')[1])
+        timings.append(cumulative_us / 1000)
+
+    timings.sort()
+    return {
+        'module': module,
+        'runs': runs,
+        'best_ms': timings[0],
+        'median_ms': timings[len(timings) // 2],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Parse the command line and run the requested benchmark.
+
+    Args:
+        argv: Command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Python Auto Movement benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    injection = subparsers.add_parser('injection', help="per-event cost of the pointer backends")
+    injection.add_argument('--display', help="X display to use, defaults to $DISPLAY")
+    injection.add_argument('--xvfb', action='store_true', help=f"start a private Xvfb server on {XVFB_DISPLAY}")
+    injection.add_argument('--events', type=int, default=5000, help="motion events per backend")
+
+    suite = subparsers.add_parser('suite', help="trajectory, step loop and action benchmarks")
+    suite.add_argument('--seed', type=int, default=DEFAULT_SEED, help="seed for the random generators")
+    suite.add_argument('--iterations', type=int, default=200, help="timed calls per run of each case")
+    suite.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                       help="timed runs of each case, the best one is compared")
+    suite.add_argument('--output', help="write the results to this JSON file")
+    suite.add_argument('--compare', help="compare with results from this JSON file")
+
+    imports = subparsers.add_parser('imports', help="cold import time of the application modules")
+    imports.add_argument('--runs', type=int, default=5, help="fresh interpreters per module")
+    imports.add_argument('modules', nargs='*', default=['define', 'mouse_mover'], help="modules to import")
+
+    replay_parser = subparsers.add_parser('replay', help="timing of a replayed pointer event recording")
+    replay_parser.add_argument('file', help="file recorded with AUTO_MOVEMENT_RECORD set")
+    replay_parser.add_argument('--backend', default='null', choices=sorted(backend_classes),
+                               help="backend to replay through")
+    replay_parser.add_argument('--speed', type=float, default=1.0,
+                               help="playback speed factor, 0 for as fast as possible")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'suite':
+        results = run_suite(args.seed, args.iterations, args.repeats)
+        for result in results['results']:
+            latency = ''
+            if 'p50_step_us' in result:
+                latency = f", step p50 {result['p50_step_us']:.2f} us, p99 {result['p99_step_us']:.2f} us"
+            print(f"{result['name']:>24}: {result['ops_per_sec']:12.1f} ops/sec, "
+                  f"{result['peak_traced_bytes_per_op']:9.0f} B peak traced, "
+                  f"{result['backend_calls_per_op']:6.1f} moves/op{latency}")
+        for name, stats in results['caches'].items():
+            print(f"{name + ' cache':>24}: {stats['hit_rate']:6.1%} hits "
+                  f"({stats['hits']} hits, {stats['misses']} misses)")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=4)
+            logger.info(f"Benchmark results saved to {args.output}")
+        if args.compare:
+            with open(args.compare, 'r') as f:
+                baseline = json.load(f)
+            return 1 if compare_results(baseline, results) else 0
+        return 0
+
+    if args.command == 'injection':
+        xvfb = None
+        display = args.display
+        if args.xvfb:
+            display = display or XVFB_DISPLAY
+            try:
+                xvfb = start_xvfb(display)
+            except RuntimeError as e:
+                logger.error(f"Cannot run the injection benchmark: {e}")
+                return 1
+        try:
+            results = run_injection(display, args.events)
+        finally:
+            if xvfb is not None:
+                xvfb.terminate()
+                xvfb.wait()
+
+        for result in results:
+            mode = 'batched' if result['buffered'] else 'per-call sync'
+            print(f"{result['backend']:>8} ({mode:>13}): {result['us_per_event']:8.1f} us/event")
+        print(json.dumps(results, indent=4))
+        return 0 if results else 1
+
+    if args.command == 'replay':
+        try:
+            result = run_replay(args.file, args.backend, args.speed)
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot replay {args.file}: {e}")
+            return 1
+        latency = ''
+        if 'p50_late_us' in result:
+            latency = f", late p50 {result['p50_late_us']:.1f} us, p99 {result['p99_late_us']:.1f} us"
+        print(f"{result['events']} events at {result['events_per_sec']:.0f} events/sec, "
+              f"{result['skipped']} skipped{latency}")
+        print(json.dumps(result, indent=4))
+        return 0
+
+    if args.command == 'imports':
+        results = [measure_import_time(module, args.runs) for module in args.modules]
+        for result in results:
+            print(f"{result['module']:>12}: {result['median_ms']:6.1f} ms median, {result['best_ms']:6.1f} ms best")
+        print(json.dumps(results, indent=4))
+        return 0
+
+    return 1
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+Calibration session for the Python Auto Movement application.
+This module captures the clickable areas of many UI elements in one session:
+a single pair of pynput listeners queues every Shift+Click, so no click is
+lost while listeners are rebuilt between elements.
+
+Controls while capturing:
+    Shift+Click        capture a square area around the clicked point
+    Shift+Click-drag   capture the dragged rectangle
+    Backspace          undo the last capture
+    Tab                skip the current element
+    Esc                stop capturing and keep what was captured so far
+"""
+import logging
+import queue
+from typing import Any, Collection, Dict, List, NamedTuple, Optional, Tuple
+
+from regions import Element, Region
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Half the side of the area captured by a plain click (in pixels)
+CLICK_HALF_SIZE = 10
+
+# Drags shorter than this in both directions count as a plain click (in pixels)
+DRAG_THRESHOLD = 3
+
+# How often the session checks that its listeners are still running (in seconds)
+LISTENER_CHECK_INTERVAL = 0.5
+
+
+class CaptureEvent(NamedTuple):
+    """An input event of a capture session."""
+    kind: str  # 'area', 'undo', 'skip' or 'abort'
+    region: Optional[Region] = None
+
+
+class CaptureTarget(NamedTuple):
+    """An element to capture, with the position of its parent in the target list."""
+    name: str
+    label: str
+    parent: Optional[int] = None
+
+
+def area_from_drag(start: Tuple[int, int], end: Tuple[int, int]) -> Region:
+    """
+    Turn a Shift+Click or Shift+Click-drag into a clickable area.
+
+    Args:
+        start: Position where the button was pressed
+        end: Position where the button was released
+
+    Returns:
+        The dragged rectangle, or a square around the press position for a plain click
+    """
+    (x0, y0), (x1, y1) = start, end
+    if abs(x1 - x0) < DRAG_THRESHOLD and abs(y1 - y0) < DRAG_THRESHOLD:
+        return Region(x0 - CLICK_HALF_SIZE, x0 + CLICK_HALF_SIZE, y0 - CLICK_HALF_SIZE, y0 + CLICK_HALF_SIZE)
+    return Region(min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1))
+
+
+class CaptureSession:
+    """
+    One pair of keyboard and mouse listeners capturing areas for a list of targets.
+
+    The listeners only turn input into CaptureEvents on a queue; capture()
+    consumes them in order, so events arriving while a prompt is printed
+    are never lost. Use as a context manager to start and stop the listeners.
+    """
+
+    def __init__(self):
+        """Initialize the session without starting the listeners."""
+        self.events: "queue.Queue[CaptureEvent]" = queue.Queue()
+        self._shift = False
+        self._drag_start: Optional[Tuple[int, int]] = None
+        self._listeners: List[Any] = []
+
+    def start(self) -> None:
+        """Start the keyboard and mouse listeners."""
+        if self._listeners:
+            return
+        # pynput needs a display, so it is only imported when capturing
+        from pynput.keyboard import Listener as KeyboardListener
+        from pynput.mouse import Listener as MouseListener
+
+        self._listeners = [
+            KeyboardListener(on_press=self._on_key_press, on_release=self._on_key_release),
+            MouseListener(on_click=self._on_click),
+        ]
+        for listener in self._listeners:
+            listener.start()
+        for listener in self._listeners:
+            listener.wait()
+        logger.debug("Capture listeners started")
+
+    def stop(self) -> None:
+        """Stop the listeners."""
+        for listener in self._listeners:
+            listener.stop()
+        self._listeners = []
+
+    def __enter__(self) -> 'CaptureSession':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def capture(self, targets: List[CaptureTarget]) -> List[Optional[Region]]:
+        """
+        Capture an area for each target, in order.
+
+        When a target is skipped, the targets whose parent it is are skipped
+        too; undo steps back over them to the skipped parent.
+
+        Args:
+            targets: Elements to capture, parents before their children
+
+        Returns:
+            The captured area of each target, None for skipped targets
+        """
+        results: List[Optional[Region]] = [None] * len(targets)
+        current = 0
+        while True:
+            current = self._skip_orphans(targets, results, current)
+            if current >= len(targets):
+                break
+
+            print(f"[{current + 1}/{len(targets)}] Shift+Click (or drag) on the {targets[current].label} element "
+                  f"(Backspace: undo, Tab: skip, Esc: finish)...")
+            event = self._next_event()
+            if event.kind == 'abort':
+                logger.info(f"Capture finished early, {len(targets) - current} elements not captured")
+                break
+            if event.kind == 'area':
+                results[current] = event.region
+                logger.info(f"Captured area for {targets[current].label}: {event.region}")
+                current += 1
+            elif event.kind == 'skip':
+                logger.info(f"Skipped {targets[current].label}")
+                current += 1
+            elif event.kind == 'undo':
+                current = self._undo(targets, results, current)
+
+        return results
+
+    def _skip_orphans(self, targets: List[CaptureTarget], results: List[Optional[Region]], current: int) -> int:
+        """Advance past targets whose parent was skipped."""
+        while current < len(targets):
+            parent = targets[current].parent
+            if parent is None or results[parent] is not None:
+                break
+            results[current] = None
+            current += 1
+        return current
+
+    def _undo(self, targets: List[CaptureTarget], results: List[Optional[Region]], current: int) -> int:
+        """Step back to the previous target that was asked for and forget its area."""
+        while current > 0:
+            current -= 1
+            parent = targets[current].parent
+            # Targets skipped along with their parent were never asked for
+            if parent is None or results[parent] is not None:
+                break
+        if results[current] is not None:
+            logger.info(f"Undid capture of {targets[current].label}")
+        results[current] = None
+        return current
+
+    def _next_event(self) -> CaptureEvent:
+        """Wait for the next event, finishing the capture if the listeners died."""
+        while True:
+            try:
+                return self.events.get(timeout=LISTENER_CHECK_INTERVAL)
+            except queue.Empty:
+                if self._listeners and not all(listener.is_alive() for listener in self._listeners):
+                    logger.error("Capture listeners stopped unexpectedly")
+                    return CaptureEvent('abort')
+
+    def _on_key_press(self, key: Any) -> None:
+        from pynput.keyboard import Key
+
+        if key in (Key.shift, Key.shift_l, Key.shift_r):
+            self._shift = True
+        elif key == Key.backspace:
+            self.events.put(CaptureEvent('undo'))
+        elif key == Key.tab:
+            self.events.put(CaptureEvent('skip'))
+        elif key == Key.esc:
+            self.events.put(CaptureEvent('abort'))
+
+    def _on_key_release(self, key: Any) -> None:
+        from pynput.keyboard import Key
+
+        if key in (Key.shift, Key.shift_l, Key.shift_r):
+            self._shift = False
+
+    def _on_click(self, x: int, y: int, button: Any, pressed: bool) -> None:
+        from pynput.mouse import Button
+
+        if button != Button.left:
+            return
+        if pressed:
+            # Only drags started with Shift held count
+            self._drag_start = (int(x), int(y)) if self._shift else None
+        elif self._drag_start is not None:
+            self.events.put(CaptureEvent('area', area_from_drag(self._drag_start, (int(x), int(y)))))
+            self._drag_start = None
+
+
+def capture_targets(elements: List[Dict[str, Any]], known: Collection[str] = ()) -> List[CaptureTarget]:
+    """
+    List every element and sub-menu item to capture, each parent before its children.
+
+    Args:
+        elements: List of element dictionaries with 'name' keys and optional 'sub_menu'
+        known: Names of elements and sub-menu items whose area is already known,
+            which are left out
+
+    Returns:
+        The targets in capture order
+    """
+    targets = []
+    for element in elements:
+        element_name = element.get('name', 'Unknown')
+        parent = None
+        if element_name not in known:
+            parent = len(targets)
+            targets.append(CaptureTarget(element_name, element_name))
+        for i, sub_item in enumerate(element.get('sub_menu') or []):
+            sub_name = sub_item.get('name', f'sub_item_{i + 1}')
+            if sub_name not in known:
+                targets.append(CaptureTarget(sub_name, f"{element_name} > {sub_name}", parent))
+    return targets
+
+
+def assemble_positions(elements: List[Dict[str, Any]], areas: Dict[str, Region]) -> Dict[str, Any]:
+    """
+    Build the positions.json dictionary from the areas of elements and sub-menu items.
+
+    Args:
+        elements: List of element dictionaries with 'name' keys and optional 'sub_menu'
+        areas: Area of each element and sub-menu item, by name
+
+    Returns:
+        Dictionary of positions with element names as keys, in the order of
+        elements; missing elements and their sub-menus are left out
+    """
+    positions: Dict[str, Any] = {}
+    for element in elements:
+        name = element.get('name', 'Unknown')
+        area = areas.get(name)
+        if area is None:
+            continue
+        children = []
+        for i, sub_item in enumerate(element.get('sub_menu') or []):
+            sub_name = sub_item.get('name', f'sub_item_{i + 1}')
+            if areas.get(sub_name) is not None:
+                children.append(Element(sub_name, *areas[sub_name].bounds))
+        positions[name] = Element(name, *area.bounds, children=children).to_dict()
+    return positions
+
+
+def calibrate(elements: List[Dict[str, Any]], known: Optional[Dict[str, Region]] = None) -> Dict[str, Any]:
+    """
+    Capture the areas of every element and sub-menu item in one session.
+
+    Args:
+        elements: List of element dictionaries with 'name' keys and optional 'sub_menu'
+        known: Areas already known, by name; only the other elements are captured
+
+    Returns:
+        Dictionary of positions with element names as keys, including the known ones
+    """
+    areas = dict(known or {})
+    targets = capture_targets(elements, areas)
+    if targets:
+        with CaptureSession() as session:
+            captured = session.capture(targets)
+        areas.update((target.name, area) for target, area in zip(targets, captured) if area is not None)
+    return assemble_positions(elements, areas)
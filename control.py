@@ -0,0 +1,99 @@
+"""
+Automation control channel for the Python Auto Movement application.
+This module lets the main process start, stop and quit a long-lived worker
+process cooperatively, instead of terminating it mid-move.
+"""
+import logging
+import multiprocessing
+import threading
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    import asyncio
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class AutomationControl:
+    """
+    Start/stop/quit flags shared between the main process and the worker.
+
+    The flags are multiprocessing events. In the worker, a watcher thread
+    blocks on them and forwards each request to the event loop, which
+    cancels the running action at its current step.
+    """
+
+    def __init__(self, context: Optional[multiprocessing.context.BaseContext] = None):
+        """
+        Create the shared events, initially stopped.
+
+        Args:
+            context: Multiprocessing context to create the events with
+        """
+        context = context or multiprocessing.get_context()
+        self.run_event = context.Event()
+        self.stop_event = context.Event()
+        self.quit_event = context.Event()
+        self.stop_event.set()
+
+    def start(self) -> None:
+        """Ask the worker to start or resume the automation."""
+        self.stop_event.clear()
+        self.run_event.set()
+
+    def stop(self) -> None:
+        """Ask the worker to stop after the current step."""
+        self.run_event.clear()
+        self.stop_event.set()
+
+    def quit(self) -> None:
+        """Ask the worker to stop and exit."""
+        self.quit_event.set()
+        self.stop_event.set()
+        # Wake the worker if it is waiting to be started
+        self.run_event.set()
+
+    @property
+    def running(self) -> bool:
+        """True while the automation should run."""
+        return not self.stop_event.is_set()
+
+    @property
+    def quitting(self) -> bool:
+        """True once the worker has been asked to exit."""
+        return self.quit_event.is_set()
+
+    def watch(self, loop: 'asyncio.AbstractEventLoop', on_start: Callable[[], None],
+              on_stop: Callable[[], None], on_quit: Callable[[], None]) -> threading.Thread:
+        """
+        Forward start, stop and quit requests to callbacks on an event loop.
+
+        A daemon thread blocks on the shared events and schedules each
+        callback on the loop thread, so the loop itself never blocks on them.
+
+        Args:
+            loop: Event loop to run the callbacks on
+            on_start: Called when the automation is started
+            on_stop: Called when the automation is stopped
+            on_quit: Called once when the worker is asked to exit
+
+        Returns:
+            The started watcher thread
+        """
+        def watch_events() -> None:
+            while True:
+                self.run_event.wait()
+                if self.quitting:
+                    break
+                loop.call_soon_threadsafe(on_start)
+
+                self.stop_event.wait()
+                if self.quitting:
+                    break
+                loop.call_soon_threadsafe(on_stop)
+            loop.call_soon_threadsafe(on_quit)
+
+        thread = threading.Thread(target=watch_events, name='automation-control', daemon=True)
+        thread.start()
+        return thread
@@ -1,11 +1,15 @@
 """
 Constants and configuration for the Python Auto Movement application.
 This module defines the mouse movement types and UI element coordinates.
+
+Importing this module has no side effects: the dynamic positions are only
+loaded (or interactively captured) on the first call to get_press_links().
 """
 import os
-from typing import List, Dict, Any, Union
+import threading
+from typing import List, Dict, Any, Optional, Union
 
-from position_manager import get_positions
+from regions import ElementLayout, as_layout
 
 # Available easing functions for mouse movement
 # These are the names of functions in the PyAutoGUI library
@@ -162,6 +166,50 @@ profile: Dict[str, Union[str, Dict[str, Dict[str, int]], List[Dict[str, Dict[str
 # Default list of all clickable elements
 default_elements = [dashboard, messages, notifications, my_business]
 
-# Get dynamic positions from position_manager
-# This will either load saved positions or prompt the user to click on each element
-fiverr_press_links: List[Dict[str, Any]] = get_positions(default_elements)
+# Dynamic positions, loaded on first use by get_press_links()
+_press_links: Optional[ElementLayout] = None
+_press_links_lock = threading.Lock()
+
+
+def get_press_links() -> ElementLayout:
+    """
+    Get the dynamic positions of the clickable elements, loading them on first use.
+
+    This will either load saved positions or prompt the user to click on each element.
+
+    Returns:
+        Layout of the clickable elements
+    """
+    global _press_links
+    with _press_links_lock:
+        if _press_links is None:
+            from position_manager import get_positions
+
+            _press_links = get_positions(default_elements)
+        return _press_links
+
+
+def set_press_links(links: Union[ElementLayout, List[Dict[str, Any]], None]) -> Optional[ElementLayout]:
+    """
+    Replace the positions of the clickable elements, e.g. for benchmarks.
+
+    Args:
+        links: Layout or list of position dictionaries to use from now on,
+            or None to load them again on next use
+
+    Returns:
+        The previous positions, or None if they were never loaded
+    """
+    global _press_links
+    layout = as_layout(links) if links is not None else None
+    with _press_links_lock:
+        previous = _press_links
+        _press_links = layout
+        return previous
+
+
+def __getattr__(name: str) -> Any:
+    """Keep define.fiverr_press_links working as a lazily loaded attribute."""
+    if name == 'fiverr_press_links':
+        return get_press_links()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
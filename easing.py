@@ -0,0 +1,386 @@
+"""
+Easing functions for the Python Auto Movement application.
+This module implements every curve listed in define.mouse_movement_type.
+
+The formulas follow the pytweening library. Every function accepts either a
+scalar or a NumPy array of values between 0 and 1, returning a float for
+scalar input and an array otherwise.
+"""
+import functools
+import math
+import threading
+from typing import Callable, Dict, Tuple, Union
+
+import numpy as np
+
+Number = Union[float, np.ndarray]
+
+# Default number of samples in an easing lookup table
+DEFAULT_TABLE_SAMPLES = 1024
+
+# Overshoot constant used by the "back" curves
+BACK_OVERSHOOT = 1.70158
+
+
+def _vectorized(function: Callable[[np.ndarray], np.ndarray]) -> Callable[[Number], Number]:
+    """
+    Let an array-based easing function also accept and return scalars.
+
+    Args:
+        function: Easing function written for NumPy arrays
+
+    Returns:
+        Wrapped function accepting scalars or arrays
+    """
+    @functools.wraps(function)
+    def wrapper(t: Number) -> Number:
+        values = np.asarray(t, dtype=np.float64)
+        # np.where evaluates both branches, so silence warnings from the unused one
+        with np.errstate(invalid='ignore', over='ignore'):
+            result = function(values)
+        if result.ndim == 0:
+            return float(result)
+        return result
+    return wrapper
+
+
+@_vectorized
+def linear(t: np.ndarray) -> np.ndarray:
+    """Linear tween - constant velocity."""
+    return t.copy()
+
+
+@_vectorized
+def ease_in_quad(t: np.ndarray) -> np.ndarray:
+    """Quadratic easing in - accelerating from zero velocity."""
+    return t * t
+
+
+@_vectorized
+def ease_out_quad(t: np.ndarray) -> np.ndarray:
+    """Quadratic easing out - decelerating to zero velocity."""
+    return -t * (t - 2)
+
+
+@_vectorized
+def ease_in_out_quad(t: np.ndarray) -> np.ndarray:
+    """Quadratic easing in/out - acceleration until halfway, then deceleration."""
+    return np.where(t < 0.5, 2 * t * t, -1 + (4 - 2 * t) * t)
+
+
+@_vectorized
+def ease_in_cubic(t: np.ndarray) -> np.ndarray:
+    """Cubic easing in - accelerating from zero velocity."""
+    return t ** 3
+
+
+@_vectorized
+def ease_out_cubic(t: np.ndarray) -> np.ndarray:
+    """Cubic easing out - decelerating to zero velocity."""
+    return (t - 1) ** 3 + 1
+
+
+@_vectorized
+def ease_in_out_cubic(t: np.ndarray) -> np.ndarray:
+    """Cubic easing in/out - acceleration until halfway, then deceleration."""
+    n = t * 2
+    return np.where(n < 1, 0.5 * n ** 3, 0.5 * ((n - 2) ** 3 + 2))
+
+
+@_vectorized
+def ease_in_quart(t: np.ndarray) -> np.ndarray:
+    """Quartic easing in - accelerating from zero velocity."""
+    return t ** 4
+
+
+@_vectorized
+def ease_out_quart(t: np.ndarray) -> np.ndarray:
+    """Quartic easing out - decelerating to zero velocity."""
+    return -((t - 1) ** 4 - 1)
+
+
+@_vectorized
+def ease_in_out_quart(t: np.ndarray) -> np.ndarray:
+    """Quartic easing in/out - acceleration until halfway, then deceleration."""
+    n = t * 2
+    return np.where(n < 1, 0.5 * n ** 4, -0.5 * ((n - 2) ** 4 - 2))
+
+
+@_vectorized
+def ease_in_quint(t: np.ndarray) -> np.ndarray:
+    """Quintic easing in - accelerating from zero velocity."""
+    return t ** 5
+
+
+@_vectorized
+def ease_out_quint(t: np.ndarray) -> np.ndarray:
+    """Quintic easing out - decelerating to zero velocity."""
+    return (t - 1) ** 5 + 1
+
+
+@_vectorized
+def ease_in_out_quint(t: np.ndarray) -> np.ndarray:
+    """Quintic easing in/out - acceleration until halfway, then deceleration."""
+    n = t * 2
+    return np.where(n < 1, 0.5 * n ** 5, 0.5 * ((n - 2) ** 5 + 2))
+
+
+@_vectorized
+def ease_in_sine(t: np.ndarray) -> np.ndarray:
+    """Sinusoidal easing in - accelerating from zero velocity."""
+    return -np.cos(t * math.pi / 2) + 1
+
+
+@_vectorized
+def ease_out_sine(t: np.ndarray) -> np.ndarray:
+    """Sinusoidal easing out - decelerating to zero velocity."""
+    return np.sin(t * math.pi / 2)
+
+
+@_vectorized
+def ease_in_out_sine(t: np.ndarray) -> np.ndarray:
+    """Sinusoidal easing in/out - acceleration until halfway, then deceleration."""
+    return -0.5 * (np.cos(math.pi * t) - 1)
+
+
+@_vectorized
+def ease_in_expo(t: np.ndarray) -> np.ndarray:
+    """Exponential easing in - accelerating from zero velocity."""
+    return np.where(t == 0, 0.0, 2 ** (10 * (t - 1)))
+
+
+@_vectorized
+def ease_out_expo(t: np.ndarray) -> np.ndarray:
+    """Exponential easing out - decelerating to zero velocity."""
+    return np.where(t == 1, 1.0, -(2 ** (-10 * t)) + 1)
+
+
+@_vectorized
+def ease_in_out_expo(t: np.ndarray) -> np.ndarray:
+    """Exponential easing in/out - acceleration until halfway, then deceleration."""
+    n = t * 2
+    curve = np.where(n < 1, 0.5 * 2 ** (10 * (n - 1)), 0.5 * (-(2 ** (-10 * (n - 1))) + 2))
+    return np.where(t == 0, 0.0, np.where(t == 1, 1.0, curve))
+
+
+@_vectorized
+def ease_in_circ(t: np.ndarray) -> np.ndarray:
+    """Circular easing in - accelerating from zero velocity."""
+    return -(np.sqrt(1 - t * t) - 1)
+
+
+@_vectorized
+def ease_out_circ(t: np.ndarray) -> np.ndarray:
+    """Circular easing out - decelerating to zero velocity."""
+    n = t - 1
+    return np.sqrt(1 - n * n)
+
+
+@_vectorized
+def ease_in_out_circ(t: np.ndarray) -> np.ndarray:
+    """Circular easing in/out - acceleration until halfway, then deceleration."""
+    n = t * 2
+    return np.where(n < 1, -0.5 * (np.sqrt(1 - n ** 2) - 1), 0.5 * (np.sqrt(1 - (n - 2) ** 2) + 1))
+
+
+def _out_elastic(t: np.ndarray, period: float) -> np.ndarray:
+    """Elastic easing out with an amplitude of 1 for the given period."""
+    s = period / (2 * math.pi) * math.asin(1)
+    return 2 ** (-10 * t) * np.sin((t - s) * (2 * math.pi / period)) + 1
+
+
+@_vectorized
+def ease_in_elastic(t: np.ndarray) -> np.ndarray:
+    """Elastic easing in - oscillating with growing amplitude."""
+    return 1 - _out_elastic(1 - t, 0.3)
+
+
+@_vectorized
+def ease_out_elastic(t: np.ndarray) -> np.ndarray:
+    """Elastic easing out - overshooting and settling like a spring."""
+    return _out_elastic(t, 0.3)
+
+
+@_vectorized
+def ease_in_out_elastic(t: np.ndarray) -> np.ndarray:
+    """Elastic easing in/out - spring oscillation at both ends."""
+    n = t * 2
+    return np.where(n < 1, (1 - _out_elastic(1 - n, 0.5)) / 2, _out_elastic(n - 1, 0.5) / 2 + 0.5)
+
+
+@_vectorized
+def ease_in_back(t: np.ndarray) -> np.ndarray:
+    """Back easing in - pulling back slightly before moving forward."""
+    s = BACK_OVERSHOOT
+    return t * t * ((s + 1) * t - s)
+
+
+@_vectorized
+def ease_out_back(t: np.ndarray) -> np.ndarray:
+    """Back easing out - overshooting the target before settling."""
+    s = BACK_OVERSHOOT
+    n = t - 1
+    return n * n * ((s + 1) * n + s) + 1
+
+
+@_vectorized
+def ease_in_out_back(t: np.ndarray) -> np.ndarray:
+    """Back easing in/out - pulling back at the start and overshooting at the end."""
+    s = BACK_OVERSHOOT * 1.525
+    n = t * 2
+    m = n - 2
+    return np.where(n < 1, 0.5 * (n * n * ((s + 1) * n - s)), 0.5 * (m * m * ((s + 1) * m + s) + 2))
+
+
+def _out_bounce(t: np.ndarray) -> np.ndarray:
+    """Bouncing easing out evaluated piecewise on an array."""
+    return np.select(
+        [t < 1 / 2.75, t < 2 / 2.75, t < 2.5 / 2.75],
+        [
+            7.5625 * t * t,
+            7.5625 * (t - 1.5 / 2.75) ** 2 + 0.75,
+            7.5625 * (t - 2.25 / 2.75) ** 2 + 0.9375,
+        ],
+        7.5625 * (t - 2.65 / 2.75) ** 2 + 0.984375,
+    )
+
+
+@_vectorized
+def ease_in_bounce(t: np.ndarray) -> np.ndarray:
+    """Bouncing easing in - bouncing away from the start."""
+    return 1 - _out_bounce(1 - t)
+
+
+@_vectorized
+def ease_out_bounce(t: np.ndarray) -> np.ndarray:
+    """Bouncing easing out - bouncing into the target."""
+    return _out_bounce(t)
+
+
+@_vectorized
+def ease_in_out_bounce(t: np.ndarray) -> np.ndarray:
+    """Bouncing easing in/out - bouncing at both ends."""
+    return np.where(t < 0.5, (1 - _out_bounce(1 - t * 2)) * 0.5, _out_bounce(t * 2 - 1) * 0.5 + 0.5)
+
+
+# Dictionary mapping easing function names to actual functions
+# The names match define.mouse_movement_type and the pytweening library
+easing_functions: Dict[str, Callable[[Number], Number]] = {
+    'linear': linear,
+    'easeInQuad': ease_in_quad,
+    'easeOutQuad': ease_out_quad,
+    'easeInOutQuad': ease_in_out_quad,
+    'easeInCubic': ease_in_cubic,
+    'easeOutCubic': ease_out_cubic,
+    'easeInOutCubic': ease_in_out_cubic,
+    'easeInQuart': ease_in_quart,
+    'easeOutQuart': ease_out_quart,
+    'easeInOutQuart': ease_in_out_quart,
+    'easeInQuint': ease_in_quint,
+    'easeOutQuint': ease_out_quint,
+    'easeInOutQuint': ease_in_out_quint,
+    'easeInSine': ease_in_sine,
+    'easeOutSine': ease_out_sine,
+    'easeInOutSine': ease_in_out_sine,
+    'easeInExpo': ease_in_expo,
+    'easeOutExpo': ease_out_expo,
+    'easeInOutExpo': ease_in_out_expo,
+    'easeInCirc': ease_in_circ,
+    'easeOutCirc': ease_out_circ,
+    'easeInOutCirc': ease_in_out_circ,
+    'easeInElastic': ease_in_elastic,
+    'easeOutElastic': ease_out_elastic,
+    'easeInOutElastic': ease_in_out_elastic,
+    'easeInBack': ease_in_back,
+    'easeOutBack': ease_out_back,
+    'easeInOutBack': ease_in_out_back,
+    'easeInBounce': ease_in_bounce,
+    'easeOutBounce': ease_out_bounce,
+    'easeInOutBounce': ease_in_out_bounce,
+}
+
+
+class EasingTable:
+    """
+    Sampled lookup table for an easing function.
+
+    Evaluating the table is a single linear interpolation over the samples,
+    so a whole trajectory is eased in one array operation.
+    """
+
+    def __init__(self, easing_function: Callable[[Number], Number],
+                 samples: int = DEFAULT_TABLE_SAMPLES):
+        """
+        Sample the easing function.
+
+        Args:
+            easing_function: Vectorized easing function to sample
+            samples: Number of evenly spaced samples between 0 and 1
+        """
+        if samples < 2:
+            raise ValueError(f"An easing table needs at least 2 samples, got {samples}")
+        self.easing_function = easing_function
+        self.__name__ = getattr(easing_function, '__name__', 'easing_table')
+        self.x = np.linspace(0.0, 1.0, samples)
+        self.y = easing_function(self.x)
+        self.x.setflags(write=False)
+        self.y.setflags(write=False)
+
+    def __call__(self, t: Number) -> Number:
+        """
+        Evaluate the table with linear interpolation.
+
+        Args:
+            t: Scalar or array of values between 0 and 1
+
+        Returns:
+            Eased value(s), a float for scalar input
+        """
+        result = np.interp(t, self.x, self.y)
+        if np.ndim(result) == 0:
+            return float(result)
+        return result
+
+    def max_error(self, samples: int = 10000) -> float:
+        """
+        Measure the largest interpolation error against the exact function.
+
+        Args:
+            samples: Number of points to check
+
+        Returns:
+            Maximum absolute difference between the table and the function
+        """
+        t = np.linspace(0.0, 1.0, samples)
+        return float(np.max(np.abs(self(t) - self.easing_function(t))))
+
+
+_tables: Dict[Tuple[str, int], EasingTable] = {}
+_tables_lock = threading.Lock()
+
+
+def get_easing_function(name: str, table: bool = False,
+                        samples: int = DEFAULT_TABLE_SAMPLES) -> Callable[[Number], Number]:
+    """
+    Look up an easing function by name, optionally as a sampled lookup table.
+
+    Args:
+        name: Easing function name, as used in define.mouse_movement_type
+        table: Return a shared EasingTable instead of the exact function
+        samples: Number of samples in the lookup table
+
+    Returns:
+        Easing function accepting scalars or arrays
+
+    Raises:
+        KeyError: If the easing function name is unknown
+    """
+    function = easing_functions[name]
+    if not table:
+        return function
+
+    key = (name, samples)
+    with _tables_lock:
+        if key not in _tables:
+            _tables[key] = EasingTable(function, samples)
+        return _tables[key]
@@ -0,0 +1,476 @@
+"""
+Pointer event recorder for the Python Auto Movement application.
+This module records every pointer event sent by the automation to a compact
+binary file, and replays such files through any pointer backend with their
+original timing, or faster.
+
+Each event is one fixed-size record: monotonic time in nanoseconds, pointer
+position and button state. Records go into a preallocated ring buffer and
+a writer thread appends them to the file in chunks, so recording never
+waits on the disk during a move. Replay memory-maps the file, so even long
+recordings start streaming immediately.
+
+Recording is enabled by setting AUTO_MOVEMENT_RECORD to a file path.
+
+Usage:
+    python event_recorder.py info trace.bin
+    python event_recorder.py replay trace.bin --backend null --speed 0
+    python event_recorder.py replay trace.bin --backend xtest --speed 2
+"""
+import argparse
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backends import BUTTONS, PointerBackend, backend_classes, create_backend
+from scheduler import StepScheduler
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# File to record to, recording is off when unset
+RECORD_FILE = os.environ.get('AUTO_MOVEMENT_RECORD')
+
+# One record per event, packed little-endian: 17 bytes
+EVENT_DTYPE = np.dtype([('time_ns', '<i8'), ('x', '<i4'), ('y', '<i4'), ('buttons', 'u1')])
+
+# File header: magic, format version, record size, reserved
+MAGIC = b'PAMTRACE'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sHHI')
+HEADER_SIZE = _HEADER.size
+
+# Button state bits, numbered like X11 buttons 1 to 7 (bit = button - 1)
+BUTTON_BITS = {'left': 0x01, 'middle': 0x02, 'right': 0x04}
+SCROLL_UP, SCROLL_DOWN, SCROLL_LEFT, SCROLL_RIGHT = 0x08, 0x10, 0x20, 0x40
+
+# Scroll step (dx, dy) of each scroll bit
+_SCROLL_STEPS = {SCROLL_UP: (0, 1), SCROLL_DOWN: (0, -1), SCROLL_LEFT: (-1, 0), SCROLL_RIGHT: (1, 0)}
+
+# Ring buffer size and how many records the writer thread appends at once
+RING_CAPACITY = 16384
+CHUNK_SIZE = 1024
+
+# Longest the writer thread waits for a full chunk before writing a partial one (in seconds)
+FLUSH_INTERVAL = 1.0
+
+# Records converted from the memory map at a time during replay
+REPLAY_CHUNK = 4096
+
+
+class EventRecorder:
+    """
+    Ring buffer of pointer event records drained to a binary file.
+
+    record() is called by the step loop only; it stores the record and
+    returns. A writer thread appends whole chunks to the file. If the disk
+    falls so far behind that the ring fills up, new records are dropped
+    and counted rather than delaying the move.
+    """
+
+    def __init__(self, path: str, capacity: int = RING_CAPACITY, chunk_size: int = CHUNK_SIZE,
+                 clock_ns: Callable[[], int] = time.monotonic_ns):
+        """
+        Create the file and start the writer thread.
+
+        Args:
+            path: File to write, replaced if it exists
+            capacity: Number of records the ring buffer holds
+            chunk_size: Number of records appended to the file at once
+            clock_ns: Monotonic clock returning nanoseconds
+
+        Raises:
+            OSError: If the file cannot be created
+        """
+        self.path = path
+        self.capacity = capacity
+        self.chunk_size = min(chunk_size, capacity)
+        self.clock_ns = clock_ns
+        self.buffer = np.zeros(capacity, EVENT_DTYPE)
+        # Records stored so far, and records written to the file so far
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, EVENT_DTYPE.itemsize, 0))
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_loop, name='event-recorder', daemon=True)
+        self._thread.start()
+        logger.info(f"Recording pointer events to {path}")
+
+    def record(self, x: int, y: int, buttons: int = 0) -> None:
+        """
+        Store one event stamped with the current time.
+
+        Args:
+            x: Pointer x-coordinate
+            y: Pointer y-coordinate
+            buttons: Button state bits after the event
+        """
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.dropped += 1
+            return
+        self.buffer[head % self.capacity] = (self.clock_ns(), x, y, buttons)
+        # Publish the record only once it is complete; the writer never reads past head
+        self.head = head + 1
+        if head + 1 - self.tail >= self.chunk_size:
+            self._wake.set()
+
+    def close(self) -> None:
+        """Write every stored record and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self._file.close()
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} pointer events, the recording disk was too slow")
+        logger.info(f"Recorded {self.tail} pointer events to {self.path}")
+
+    def _write_loop(self) -> None:
+        """Append full chunks as they fill, and everything left when closed."""
+        while True:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            closing = self._closed
+            try:
+                self._write_pending()
+            except OSError as e:
+                logger.error(f"Error writing pointer events to {self.path}: {e}")
+                return
+            if closing:
+                return
+
+    def _write_pending(self) -> None:
+        """Append the records between tail and head, in at most two slices of the ring."""
+        head = self.head
+        while self.tail < head:
+            start = self.tail % self.capacity
+            count = min(head - self.tail, self.capacity - start)
+            self._file.write(self.buffer[start:start + count].tobytes())
+            self.tail += count
+        self._file.flush()
+
+
+class RecorderBackend(PointerBackend):
+    """
+    Backend forwarding to another backend and recording every event it sends.
+
+    A click is recorded as a press and a release record, a scroll step as a
+    press and release of its scroll bit, all at the last position moved to.
+    Moves queued by a buffered backend are recorded when they are sent, on
+    flush or with the next click, scroll or position query, so the recorded
+    times follow the real pointer rather than the queue.
+    """
+
+    name = 'recorder'
+
+    def __init__(self, inner: PointerBackend, recorder: EventRecorder):
+        """
+        Wrap a backend.
+
+        Args:
+            inner: Backend that sends the events
+            recorder: Recorder storing them
+        """
+        self.inner = inner
+        self.recorder = recorder
+        self.buffered = inner.buffered
+        self._position = inner.position()
+        # Moves queued by a buffered backend and not sent yet
+        self._queued: List[Tuple[int, int]] = []
+
+    def move(self, x: int, y: int) -> None:
+        self.inner.move(x, y)
+        self._position = (x, y)
+        if self.buffered:
+            self._queued.append((x, y))
+        else:
+            self.recorder.record(x, y)
+
+    def click(self, button: str = 'left', count: int = 1) -> None:
+        self.inner.click(button, count)
+        self._record_queued()
+        self._record_presses(BUTTON_BITS[button], count)
+
+    def scroll(self, dx: int, dy: int) -> None:
+        self.inner.scroll(dx, dy)
+        self._record_queued()
+        if dy:
+            self._record_presses(SCROLL_UP if dy > 0 else SCROLL_DOWN, abs(dy))
+        if dx:
+            self._record_presses(SCROLL_RIGHT if dx > 0 else SCROLL_LEFT, abs(dx))
+
+    def position(self) -> Tuple[int, int]:
+        position = self.inner.position()
+        self._record_queued()
+        return position
+
+    def flush(self) -> None:
+        self.inner.flush()
+        self._record_queued()
+
+    def close(self) -> None:
+        self.inner.close()
+        self._record_queued()
+        self.recorder.close()
+
+    def _record_queued(self) -> None:
+        """Record the queued moves, which the inner backend has just sent."""
+        if self._queued:
+            for x, y in self._queued:
+                self.recorder.record(x, y)
+            self._queued.clear()
+
+    def _record_presses(self, bit: int, count: int) -> None:
+        x, y = self._position
+        for _ in range(count):
+            self.recorder.record(x, y, bit)
+            self.recorder.record(x, y, 0)
+
+
+def record_backend(backend: PointerBackend, path: Optional[str] = None) -> RecorderBackend:
+    """
+    Wrap a backend so that everything it sends is recorded.
+
+    Args:
+        backend: Backend to wrap
+        path: File to record to, defaults to RECORD_FILE
+
+    Returns:
+        The recording backend; closing it finishes the file
+    """
+    return RecorderBackend(backend, EventRecorder(path or RECORD_FILE))
+
+
+def load_events(path: str) -> np.ndarray:
+    """
+    Memory-map a recording.
+
+    A partial record at the end, left by a process killed mid-write, is ignored.
+
+    Args:
+        path: Recorded file
+
+    Returns:
+        Read-only array of EVENT_DTYPE records
+
+    Raises:
+        ValueError: If the file is not a recording in a supported format
+    """
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path} is too short to be a pointer event recording")
+    magic, version, record_size, _ = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a pointer event recording")
+    if version != FORMAT_VERSION or record_size != EVENT_DTYPE.itemsize:
+        raise ValueError(f"{path} has unsupported format version {version} (record size {record_size})")
+
+    count = (os.path.getsize(path) - HEADER_SIZE) // EVENT_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, EVENT_DTYPE)
+    return np.memmap(path, dtype=EVENT_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+class ReplayReport(NamedTuple):
+    """Outcome of replaying a recording."""
+    events: int
+    moves: int
+    clicks: int
+    scrolls: int
+    skipped: int  # Moves dropped to catch up
+    duration: float  # Wall time of the replay (in seconds)
+    max_late: float  # Largest delay of an event after its deadline (in seconds)
+
+
+def replay(events: np.ndarray, backend: PointerBackend, speed: float = 1.0,
+           scheduler: Optional[StepScheduler] = None, cancel: Optional[Any] = None,
+           on_step: Optional[Callable[[float], None]] = None) -> ReplayReport:
+    """
+    Send recorded events through a backend with their recorded timing.
+
+    Button releases are sent as clicks and scroll presses as scroll steps.
+    Like the step scheduler, a move whose successor is already due is
+    skipped so a slow backend catches up; clicks and scrolls are never
+    skipped, and neither is anything when replaying as fast as possible.
+
+    Args:
+        events: Records, e.g. from load_events
+        backend: Backend to send the events through
+        speed: Playback speed factor, 0 to send every event as fast as possible
+        scheduler: Scheduler to wait for each deadline with, defaults to a new one
+        cancel: Optional event that stops the replay when set
+        on_step: Optional function called with how late each sent event was (in seconds)
+
+    Returns:
+        Counts and timing of the replay
+    """
+    scheduler = scheduler or StepScheduler()
+    clock = scheduler.clock
+    flush = backend.flush if backend.buffered else None
+    moves = clicks = scrolls = skipped = 0
+    max_late = 0.0
+    cancelled = False
+    position: Optional[Tuple[int, int]] = None
+    buttons = 0
+
+    start = clock()
+    total = len(events)
+    t0 = int(events['time_ns'][0]) if total else 0
+    # Seconds of replay per recorded nanosecond
+    scale = 1e-9 / speed if speed > 0 else 0.0
+
+    for offset in range(0, total, REPLAY_CHUNK):
+        chunk = events[offset:offset + REPLAY_CHUNK + 1]
+        deadlines = ((chunk['time_ns'] - t0) * scale + start).tolist()
+        xs, ys, states = chunk['x'].tolist(), chunk['y'].tolist(), chunk['buttons'].tolist()
+        # The extra record overlapping the next chunk is only used to look ahead
+        for i in range(min(REPLAY_CHUNK, total - offset)):
+            state = states[i]
+            point = (xs[i], ys[i])
+            released = buttons & ~state
+            pressed = state & ~buttons
+            buttons = state
+            if point == position and not released and not pressed:
+                continue
+
+            deadline = deadlines[i]
+            now = clock()
+            if now < deadline:
+                if not scheduler.wait_until(deadline, cancel):
+                    cancelled = True
+                    break
+            elif (scale and not released and not pressed and i + 1 < len(deadlines)
+                  and now >= deadlines[i + 1]):
+                skipped += 1
+                continue
+            late = clock() - deadline
+            if late > max_late:
+                max_late = late
+            if on_step is not None:
+                on_step(late)
+
+            if point != position:
+                backend.move(*point)
+                position = point
+                moves += 1
+            for name in BUTTONS:
+                if released & BUTTON_BITS[name]:
+                    backend.click(name)
+                    clicks += 1
+            for bit, (dx, dy) in _SCROLL_STEPS.items():
+                if pressed & bit:
+                    backend.scroll(dx, dy)
+                    scrolls += 1
+            if flush is not None:
+                flush()
+        if cancelled:
+            logger.info("Replay cancelled")
+            break
+
+    return ReplayReport(total, moves, clicks, scrolls, skipped, clock() - start, max_late)
+
+
+def describe(events: np.ndarray) -> Dict[str, Any]:
+    """
+    Summarize a recording, e.g. to spot stalls between steps.
+
+    Args:
+        events: Records, e.g. from load_events
+
+    Returns:
+        Dictionary with event counts, duration and the distribution of the
+        intervals between consecutive events in milliseconds
+    """
+    if len(events) == 0:
+        return {'events': 0}
+    times = events['time_ns']
+    states = events['buttons'].astype(np.int16)
+    previous = np.concatenate(([0], states[:-1]))
+    pointer_bits = sum(BUTTON_BITS.values())
+    intervals_ms = np.diff(times) / 1e6
+    summary = {
+        'events': int(len(events)),
+        'duration_s': float((times[-1] - times[0]) / 1e9),
+        'clicks': int(np.count_nonzero(previous & ~states & pointer_bits)),
+        'scrolls': int(np.count_nonzero(states & ~previous & ~pointer_bits)),
+    }
+    if len(intervals_ms):
+        summary.update({
+            'p50_interval_ms': float(np.percentile(intervals_ms, 50)),
+            'p99_interval_ms': float(np.percentile(intervals_ms, 99)),
+            'max_interval_ms': float(intervals_ms.max()),
+        })
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Parse the command line and describe or replay a recording.
+
+    Args:
+        argv: Command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Python Auto Movement pointer event recordings")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    info = subparsers.add_parser('info', help="summarize a recording")
+    info.add_argument('file', help="recorded file")
+
+    replay_parser = subparsers.add_parser('replay', help="send a recording through a pointer backend")
+    replay_parser.add_argument('file', help="recorded file")
+    replay_parser.add_argument('--backend', default='pynput', choices=sorted(backend_classes),
+                               help="backend to replay through")
+    replay_parser.add_argument('--speed', type=float, default=1.0,
+                               help="playback speed factor, 0 for as fast as possible")
+    args = parser.parse_args(argv)
+
+    try:
+        events = load_events(args.file)
+    except (OSError, ValueError) as e:
+        logger.error(f"Cannot read {args.file}: {e}")
+        return 1
+
+    if args.command == 'info':
+        for key, value in describe(events).items():
+            print(f"{key:>16}: {value:.3f}" if isinstance(value, float) else f"{key:>16}: {value}")
+        return 0
+
+    backend = create_backend(args.backend)
+    try:
+        report = replay(events, backend, args.speed)
+    except KeyboardInterrupt:
+        logger.info("Replay interrupted by keyboard")
+        return 1
+    finally:
+        backend.close()
+    print(f"Replayed {report.events} events in {report.duration:.3f} s: {report.moves} moves, "
+          f"{report.clicks} clicks, {report.scrolls} scrolls, {report.skipped} moves skipped, "
+          f"max late {report.max_late * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    sys.exit(main())
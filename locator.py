@@ -0,0 +1,544 @@
+"""
+Automatic element locator for the Python Auto Movement application.
+This module finds the UI elements on screen from reference image templates,
+as an alternative to capturing their positions by hand.
+
+Templates are PNG files named after the elements, e.g. templates/dashboard.png.
+Each pass takes one screenshot shared by all templates, searches a
+downscaled copy first and only refines the best candidates at full
+resolution. Elements are first looked for where they were last found, so
+a relocation of an unchanged page only checks a few small windows.
+
+Usage:
+    python locator.py --screenshot screen.png
+    python locator.py --templates templates --repeat 10 --save
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from calibration import assemble_positions
+from regions import ElementLayout, Region
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Directory holding one <element name>.png template per element
+TEMPLATES_DIR = "templates"
+
+# Largest downscaling factor of the coarse search; templates too small for
+# it are searched at half the factor, down to full resolution
+COARSE_SCALE = 4
+
+# Number of coarse candidates refined at full resolution
+COARSE_CANDIDATES = 5
+
+# Normalized correlation a match needs to be accepted, between -1 and 1
+MIN_SCORE = 0.8
+
+# Distance around the last known position searched before the whole screen (in pixels)
+SEARCH_MARGIN = 150
+
+# Templates smaller than this after downscaling are only searched at full resolution (in pixels)
+MIN_COARSE_SIZE = 6
+
+# Locators kept between passes, by template directory and element names
+_locators: Dict[Tuple[str, Optional[Tuple[str, ...]]], 'ElementLocator'] = {}
+
+
+class Match(NamedTuple):
+    """Where a template was found."""
+    name: str
+    region: Region
+    score: float
+
+
+class LocateReport(NamedTuple):
+    """Outcome of one relocation pass."""
+    matches: Dict[str, Optional[Match]]
+    capture_time: float  # Time taken by the screenshot (in seconds)
+    search_time: float  # Time taken by the template search (in seconds)
+
+
+def to_gray(image: Any) -> np.ndarray:
+    """
+    Convert an image to a grayscale float array.
+
+    Args:
+        image: PIL image or array of shape (H, W) or (H, W, channels)
+
+    Returns:
+        Float32 array of shape (H, W)
+    """
+    if hasattr(image, 'convert'):
+        image = image.convert('L')
+    array = np.asarray(image, dtype=np.float32)
+    if array.ndim == 3:
+        # ITU-R 601 luma, as used by PIL's 'L' mode
+        array = array[..., :3] @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return array
+
+
+def load_image(path: str) -> np.ndarray:
+    """
+    Load an image file as a grayscale float array.
+
+    Args:
+        path: Image file, e.g. a PNG screenshot
+
+    Returns:
+        Float32 array of shape (H, W)
+    """
+    # Pillow comes with PyScreeze and is only needed for image files
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return to_gray(image)
+
+
+def grab_screen() -> np.ndarray:
+    """
+    Take a screenshot of the whole screen.
+
+    Returns:
+        Float32 grayscale array of shape (H, W)
+    """
+    # PyScreeze needs a display, so it is only imported when capturing
+    import pyscreeze
+
+    return to_gray(pyscreeze.screenshot())
+
+
+def downscale(image: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Shrink an image by averaging factor x factor blocks.
+
+    Args:
+        image: Array of shape (H, W)
+        factor: Downscaling factor
+
+    Returns:
+        Array of shape (H // factor, W // factor)
+    """
+    height, width = image.shape[0] // factor, image.shape[1] // factor
+    blocks = image[:height * factor, :width * factor].reshape(height, factor, width, factor)
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+
+def window_sums(image: np.ndarray, height: int, width: int) -> np.ndarray:
+    """
+    Sum every height x width window of an image using an integral image.
+
+    Args:
+        image: Array of shape (H, W)
+        height: Window height
+        width: Window width
+
+    Returns:
+        Array of shape (H - height + 1, W - width + 1)
+    """
+    integral = np.pad(image.astype(np.float64), ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    return (integral[height:, width:] - integral[:-height, width:]
+            - integral[height:, :-width] + integral[:-height, :-width])
+
+
+def match_template(image: np.ndarray, template: np.ndarray) -> np.ndarray:
+    """
+    Compute the normalized cross-correlation of a template at every position of an image.
+
+    The correlation is computed with FFTs and the normalization with
+    integral images, so the cost barely depends on the template size.
+
+    Args:
+        image: Array of shape (H, W)
+        template: Array of shape (h, w)
+
+    Returns:
+        Scores between -1 and 1, of shape (H - h + 1, W - w + 1), where
+        scores[y, x] compares the template with the window whose top left
+        corner is at (x, y); empty if the template does not fit
+    """
+    image_h, image_w = image.shape
+    height, width = template.shape
+    if image_h < height or image_w < width:
+        return np.empty((0, 0), dtype=np.float64)
+
+    # With a zero-mean template, the correlation needs no image mean
+    centered = template.astype(np.float64) - template.mean()
+    template_norm = np.sqrt((centered * centered).sum())
+
+    shape = (image_h, image_w)
+    spectrum = np.fft.rfft2(image, shape) * np.fft.rfft2(centered[::-1, ::-1], shape)
+    correlation = np.fft.irfft2(spectrum, shape)[height - 1:, width - 1:]
+
+    count = height * width
+    sums = window_sums(image, height, width)
+    energy = window_sums(np.square(image, dtype=np.float64), height, width) - sums * sums / count
+    denominator = np.sqrt(np.maximum(energy, 0.0)) * template_norm
+
+    # Flat windows or a flat template cannot be compared
+    scores = np.zeros_like(correlation)
+    valid = denominator > 1e-6 * count
+    scores[valid] = correlation[valid] / denominator[valid]
+    return scores
+
+
+class ElementLocator:
+    """
+    Finds elements on screenshots by template matching.
+
+    The last position of every element is cached: the next pass first
+    checks whether the element is still exactly there, then searches its
+    neighbourhood, and only then the whole screenshot.
+    """
+
+    def __init__(self, templates: Dict[str, np.ndarray], scale: int = COARSE_SCALE,
+                 margin: int = SEARCH_MARGIN, min_score: float = MIN_SCORE):
+        """
+        Initialize the locator.
+
+        Args:
+            templates: Grayscale template of each element, by element name
+            scale: Largest downscaling factor of the coarse search
+            margin: Distance around the last known position searched first (in pixels)
+            min_score: Normalized correlation a match needs to be accepted
+        """
+        self.templates = {name: np.asarray(template, dtype=np.float32) for name, template in templates.items()}
+        self.scale = scale
+        # Downscaling factor and downscaled template of each element
+        self.coarse_templates: Dict[str, Tuple[int, np.ndarray]] = {}
+        for name, template in self.templates.items():
+            factor = scale
+            while factor > 1 and min(template.shape) // factor < MIN_COARSE_SIZE:
+                factor //= 2
+            self.coarse_templates[name] = (factor, downscale(template, factor) if factor > 1 else template)
+        self.margin = margin
+        self.min_score = min_score
+        # Last region where each element was found
+        self.cache: Dict[str, Region] = {}
+
+    @classmethod
+    def from_directory(cls, directory: str = TEMPLATES_DIR, names: Optional[Sequence[str]] = None,
+                       **kwargs: Any) -> 'ElementLocator':
+        """
+        Load the templates of a directory.
+
+        Args:
+            directory: Directory holding <element name>.png files
+            names: Elements to load, defaults to every PNG file in the directory
+            **kwargs: Passed on to the constructor
+
+        Returns:
+            Locator for the elements whose template exists
+        """
+        if names is None:
+            paths = sorted(glob.glob(os.path.join(directory, '*.png')))
+        else:
+            paths = [os.path.join(directory, f"{name}.png") for name in names]
+
+        templates = {}
+        for path in paths:
+            if os.path.exists(path):
+                templates[os.path.splitext(os.path.basename(path))[0]] = load_image(path)
+        logger.info(f"Loaded {len(templates)} templates from {directory}")
+        return cls(templates, **kwargs)
+
+    def seed(self, layout: ElementLayout) -> None:
+        """
+        Use known element positions as the starting point of the search.
+
+        Args:
+            layout: Layout whose element positions are used for elements not found yet
+        """
+        for element in layout.flat:
+            if element.name in self.templates:
+                self.cache.setdefault(element.name, Region(*element.bounds))
+
+    def relocate(self, screenshot: Optional[np.ndarray] = None) -> LocateReport:
+        """
+        Find every element on one screenshot.
+
+        Args:
+            screenshot: Grayscale screenshot, taken now if not given
+
+        Returns:
+            Report with the match of every element (None if not found) and timings
+        """
+        start = time.perf_counter()
+        if screenshot is None:
+            screenshot = grab_screen()
+        screenshot = np.asarray(screenshot, dtype=np.float32)
+        captured = time.perf_counter()
+
+        # Each downscaled screenshot is made once and shared by every template
+        pyramid: Dict[int, np.ndarray] = {}
+        matches = {name: self.locate(name, screenshot, pyramid) for name in self.templates}
+        finished = time.perf_counter()
+
+        found = sum(1 for match in matches.values() if match is not None)
+        logger.info(f"Located {found}/{len(matches)} elements in {(finished - start) * 1000:.1f} ms "
+                    f"(screenshot {(captured - start) * 1000:.1f} ms, search {(finished - captured) * 1000:.1f} ms)")
+        return LocateReport(matches, captured - start, finished - captured)
+
+    def locate(self, name: str, screenshot: np.ndarray,
+               pyramid: Optional[Dict[int, np.ndarray]] = None) -> Optional[Match]:
+        """
+        Find one element on a screenshot.
+
+        Args:
+            name: Name of the element
+            screenshot: Grayscale screenshot
+            pyramid: Downscaled screenshots by factor, shared between calls
+                and filled in as needed
+
+        Returns:
+            The best match, None if no position scores at least min_score
+        """
+        if pyramid is None:
+            pyramid = {}
+        template = self.templates[name]
+        height, width = template.shape
+
+        last = self.cache.get(name)
+        if last is not None:
+            # Fast path: the element has not moved. Positions seeded from a
+            # layout have the element's size, not the template's, and are
+            # only used as a neighbourhood
+            if (last.x_end - last.x_start + 1, last.y_end - last.y_start + 1) == (width, height):
+                score = self._score_at(screenshot, template, last.x_start, last.y_start)
+                if score >= self.min_score:
+                    return Match(name, last, score)
+
+            # Then its neighbourhood
+            window = (last.x_start - self.margin, last.y_start - self.margin,
+                      last.x_end + self.margin + 1, last.y_end + self.margin + 1)
+            match = self._search(name, screenshot, pyramid, window)
+            if match is not None:
+                self.cache[name] = match.region
+                return match
+
+        match = self._search(name, screenshot, pyramid, (0, 0, screenshot.shape[1], screenshot.shape[0]))
+        if match is None:
+            logger.warning(f"Element {name} not found on screen")
+        else:
+            # Only the final match is remembered, not every candidate refined on the way
+            self.cache[name] = match.region
+        return match
+
+    def _search(self, name: str, screenshot: np.ndarray, pyramid: Dict[int, np.ndarray],
+                window: Tuple[int, int, int, int]) -> Optional[Match]:
+        """Search a window (left, top, right, bottom) coarse to fine."""
+        template = self.templates[name]
+        height, width = template.shape
+        left, top = max(window[0], 0), max(window[1], 0)
+        right, bottom = min(window[2], screenshot.shape[1]), min(window[3], screenshot.shape[0])
+        if right - left < width or bottom - top < height:
+            return None
+
+        scale, coarse_template = self.coarse_templates[name]
+        if scale == 1:
+            # Too small to downscale, search at full resolution
+            return self._best(name, screenshot, template, left, top, right, bottom)
+
+        # Coarse search over the window, then refine the best candidates
+        if scale not in pyramid:
+            pyramid[scale] = downscale(screenshot, scale)
+        coarse = pyramid[scale]
+        c_left, c_top = left // scale, top // scale
+        scores = match_template(coarse[c_top:bottom // scale, c_left:right // scale], coarse_template)
+        if not scores.size:
+            return self._best(name, screenshot, template, left, top, right, bottom)
+
+        # Refine the best candidates, suppressing the neighbours of each so
+        # they are spread over distinct peaks
+        best = None
+        suppress_h, suppress_w = (size // 2 for size in coarse_template.shape)
+        for _ in range(COARSE_CANDIDATES):
+            row, col = np.unravel_index(int(np.argmax(scores)), scores.shape)
+            if scores[row, col] == -np.inf:
+                break
+            scores[max(row - suppress_h, 0):row + suppress_h + 1, max(col - suppress_w, 0):col + suppress_w + 1] = -np.inf
+
+            x, y = (c_left + int(col)) * scale, (c_top + int(row)) * scale
+            # The downscaled grid is only accurate to one block either way
+            match = self._best(name, screenshot, template,
+                               max(x - scale, left), max(y - scale, top),
+                               min(x + width + 2 * scale, right), min(y + height + 2 * scale, bottom))
+            if match is not None and (best is None or match.score > best.score):
+                best = match
+        return best
+
+    def _best(self, name: str, screenshot: np.ndarray, template: np.ndarray,
+              left: int, top: int, right: int, bottom: int) -> Optional[Match]:
+        """Find the best full resolution position inside a window."""
+        height, width = template.shape
+        scores = match_template(screenshot[top:bottom, left:right], template)
+        if not scores.size:
+            return None
+        row, col = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        score = float(scores[row, col])
+        if score < self.min_score:
+            return None
+        x, y = left + int(col), top + int(row)
+        return Match(name, Region(x, x + width - 1, y, y + height - 1), score)
+
+    @staticmethod
+    def _score_at(screenshot: np.ndarray, template: np.ndarray, x: int, y: int) -> float:
+        """Score a template at one exact position, -1 if it does not fit there."""
+        height, width = template.shape
+        if x < 0 or y < 0 or y + height > screenshot.shape[0] or x + width > screenshot.shape[1]:
+            return -1.0
+        window = screenshot[y:y + height, x:x + width].astype(np.float64)
+        window = window - window.mean()
+        centered = template.astype(np.float64) - template.mean()
+        denominator = np.sqrt((window * window).sum() * (centered * centered).sum())
+        return float((window * centered).sum() / denominator) if denominator > 0 else -1.0
+
+
+def matches_to_positions(elements: List[Dict[str, Any]], matches: Dict[str, Optional[Match]]) -> Dict[str, Any]:
+    """
+    Build the positions.json dictionary from located elements.
+
+    Args:
+        elements: List of element dictionaries with 'name' keys and optional 'sub_menu'
+        matches: Located elements by name
+
+    Returns:
+        Dictionary of positions with element names as keys; elements that
+        were not found are left out, as are the sub-menus of those elements
+    """
+    return assemble_positions(elements, {name: match.region for name, match in matches.items() if match is not None})
+
+
+def element_names(elements: List[Dict[str, Any]]) -> List[str]:
+    """
+    List the names of every element and sub-menu item.
+
+    Args:
+        elements: List of element dictionaries with 'name' keys and optional 'sub_menu'
+
+    Returns:
+        The names, each element before its sub-menu items
+    """
+    names = []
+    for element in elements:
+        names.append(element.get('name', 'Unknown'))
+        names.extend(sub_item.get('name', f'sub_item_{i + 1}')
+                     for i, sub_item in enumerate(element.get('sub_menu') or []))
+    return names
+
+
+def get_locator(directory: str = TEMPLATES_DIR, names: Optional[Sequence[str]] = None) -> ElementLocator:
+    """
+    Get the locator of a template directory, loading it on first use.
+
+    The locator is kept, so every later pass starts from the positions
+    where the elements were last found.
+
+    Args:
+        directory: Directory holding the templates
+        names: Elements to load, defaults to every PNG file in the directory
+
+    Returns:
+        The shared locator for these templates
+    """
+    key = (os.path.abspath(directory), tuple(names) if names is not None else None)
+    locator = _locators.get(key)
+    if locator is None:
+        locator = _locators[key] = ElementLocator.from_directory(directory, names)
+    return locator
+
+
+def locate_positions(elements: List[Dict[str, Any]], directory: str = TEMPLATES_DIR,
+                     screenshot: Optional[np.ndarray] = None,
+                     layout: Optional[ElementLayout] = None) -> Optional[Dict[str, Any]]:
+    """
+    Find the positions of the elements on screen from their templates.
+
+    Args:
+        elements: List of element dictionaries with 'name' keys
+        directory: Directory holding the templates
+        screenshot: Grayscale screenshot, taken now if not given
+        layout: Last known positions, searched first for elements the
+            locator has not found yet
+
+    Returns:
+        Dictionary of positions with element names as keys, None if there
+        are no templates or no element was found
+    """
+    if not os.path.isdir(directory):
+        return None
+    try:
+        locator = get_locator(directory, element_names(elements))
+        if not locator.templates:
+            return None
+        if layout is not None:
+            locator.seed(layout)
+        positions = matches_to_positions(elements, locator.relocate(screenshot).matches)
+    except Exception as e:
+        logger.error(f"Error locating elements: {e}")
+        return None
+    return positions or None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Parse the command line and locate the elements.
+
+    Args:
+        argv: Command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        Process exit code
+    """
+    import define
+    from position_manager import save_positions
+
+    parser = argparse.ArgumentParser(description="Python Auto Movement template locator")
+    parser.add_argument('--templates', default=TEMPLATES_DIR, help="directory of <element name>.png templates")
+    parser.add_argument('--screenshot', help="search this PNG screenshot instead of the screen")
+    parser.add_argument('--repeat', type=int, default=1, help="number of relocation passes to time")
+    parser.add_argument('--save', action='store_true', help="save the found positions")
+    args = parser.parse_args(argv)
+
+    locator = ElementLocator.from_directory(args.templates, element_names(define.default_elements))
+    if not locator.templates:
+        logger.error(f"No templates found in {args.templates}")
+        return 1
+    screenshot = load_image(args.screenshot) if args.screenshot else None
+
+    # The first pass searches from scratch, later ones start from the cache
+    timings = []
+    for _ in range(max(args.repeat, 1)):
+        report = locator.relocate(screenshot)
+        timings.append(report.capture_time + report.search_time)
+
+    for name, match in report.matches.items():
+        found = f"{match.region} score {match.score:.3f}" if match is not None else "not found"
+        print(f"{name:20s} {found}")
+    print(f"First pass {timings[0] * 1000:.1f} ms"
+          + (f", cached passes {min(timings[1:]) * 1000:.1f} ms best" if len(timings) > 1 else ""))
+
+    positions = matches_to_positions(define.default_elements, report.matches)
+    if args.save and positions:
+        save_positions(positions)
+    print(json.dumps(positions, indent=4))
+    return 0 if positions else 1
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Logging pipeline for the Python Auto Movement application.
+This module routes the log records of every process through one queue to a
+listener thread in the main process, so writing to a slow terminal or pipe
+never delays a pointer step.
+
+The main process starts the listener with start_logging() and passes the
+queue to the automation process, which installs it with configure_worker().
+Logging calls then only format the record and hand it to the queue.
+"""
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Format of every log line
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Repeated warnings and errors are limited to this many per interval
+RATE_LIMIT_BURST = 5
+RATE_LIMIT_INTERVAL = 60.0  # In seconds
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drops repeats of the same warning or error beyond a burst per interval.
+
+    Records are grouped by logger, level and message template. Once a group
+    exceeds its burst, further records are dropped until the interval ends;
+    the next record let through reports how many were dropped.
+    """
+
+    def __init__(self, burst: int = RATE_LIMIT_BURST, interval: float = RATE_LIMIT_INTERVAL,
+                 level: int = logging.WARNING):
+        """
+        Initialize the filter.
+
+        Args:
+            burst: Number of identical records let through per interval
+            interval: Length of the interval (in seconds)
+            level: Records below this level are never limited
+        """
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.level = level
+        # Per group: start of the current interval, records seen in it, records dropped
+        self._groups: Dict[Tuple[str, int, str], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None or now - group[0] >= self.interval:
+                suppressed = group[2] if group is not None else 0
+                self._groups[key] = [now, 1, 0]
+            elif group[1] < self.burst:
+                group[1] += 1
+                suppressed = 0
+            else:
+                group[2] += 1
+                return False
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+def start_logging(level: int = logging.INFO, handlers: Optional[Sequence[logging.Handler]] = None,
+                  context: Optional[multiprocessing.context.BaseContext] = None
+                  ) -> Tuple['multiprocessing.Queue[logging.LogRecord]', QueueListener]:
+    """
+    Route the logging of this process through a queue to a listener thread.
+
+    Args:
+        level: Level of the root logger
+        handlers: Handlers writing the records, defaults to one writing to stdout
+        context: Multiprocessing context to create the queue with
+
+    Returns:
+        The queue, to be passed to configure_worker in other processes, and the running listener
+    """
+    if handlers is None:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers = [handler]
+
+    context = context or multiprocessing.get_context()
+    log_queue = context.Queue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+
+    _install(QueueHandler(log_queue), level)
+    return log_queue, listener
+
+
+def configure_worker(log_queue: 'multiprocessing.Queue[logging.LogRecord]', level: int = logging.INFO,
+                     rate_limit: bool = True) -> QueueHandler:
+    """
+    Send the logging of this process to the main process's listener.
+
+    Any handler inherited from the parent process is removed, so nothing
+    in this process writes to the terminal itself.
+
+    Args:
+        log_queue: Queue returned by start_logging in the main process
+        level: Level of the root logger
+        rate_limit: Drop repeats of the same warning or error, see RateLimitFilter
+
+    Returns:
+        The installed handler
+    """
+    handler = QueueHandler(log_queue)
+    if rate_limit:
+        handler.addFilter(RateLimitFilter())
+    _install(handler, level)
+    return handler
+
+
+def stop_logging(listener: QueueListener) -> None:
+    """
+    Write out every queued record and stop the listener.
+
+    Args:
+        listener: Listener returned by start_logging
+    """
+    listener.stop()
+
+
+def _install(handler: logging.Handler, level: int) -> None:
+    """Make a handler the only handler of the root logger."""
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
@@ -7,44 +7,44 @@ import sys
 import logging
 from pynput import keyboard
 
+from control import AutomationControl
+from define import get_press_links
 from dislaimer import disclaimer
+from log_pipeline import LOG_FORMAT, start_logging, stop_logging
+from metrics import serve_metrics
 from mouse_mover import fiverr_auto_mouse_mover
 
-# Configure logging
+# Configure logging; main() routes it through the log listener
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
         logging.StreamHandler(sys.stdout)
     ]
 )
 logger = logging.getLogger(__name__)
 
-# Global variable to control the automation
-automation_running = False
+# Control channel shared with the automation process, created in main()
+automation_control = None
 
 
 def on_press(key):
     """
     Handle key presses for starting and stopping the automation.
+
+    Stopping is cooperative: the worker finishes its current step and waits,
+    warm, for the next start instead of being terminated.
     """
-    global automation_running
     try:
         if key == keyboard.Key.ctrl_l:  # Ctrl pressed
-            if automation_running:
+            if automation_control.running:
                 logger.info("Stopping mouse automation...")
-                automation_running = False
-                # Terminate the process safely
-                if fiverr_auto_mouse_mover_thread.is_alive():
-                    fiverr_auto_mouse_mover_thread.terminate()
-                    fiverr_auto_mouse_mover_thread.join(timeout=2)
+                automation_control.stop()
                 logger.info("Automation stopped.")
                 return None
             else:
                 logger.info("Starting mouse automation...")
-                # Start automation
-                fiverr_auto_mouse_mover_thread.start()
-                automation_running = True
+                automation_control.start()
                 logger.info("Automation started.")
                 return None
         elif key == keyboard.Key.esc:  # Escape to exit
@@ -68,16 +68,31 @@ def main():
     Main function that creates and manages the mouse mover process.
     Handles keyboard events for starting and stopping the automation.
     """
-    global fiverr_auto_mouse_mover_thread
+    global fiverr_auto_mouse_mover_thread, automation_control
+    automation_control = AutomationControl()
+
+    # Both processes log through a queue; only the listener thread of this
+    # process writes to the terminal, so a slow terminal never stalls a move
+    log_queue, log_listener = start_logging()
     try:
         # Display disclaimer
         disclaimer()
 
-        # Create process but don't start it yet
+        # Load or capture the click positions up front, in this process,
+        # so the automation process never prompts for them
+        get_press_links()
+
+        # Start the process right away; it initializes and then waits,
+        # warm, for the automation to be started
         fiverr_auto_mouse_mover_thread = Process(
             target=fiverr_auto_mouse_mover,
+            args=(automation_control, log_queue),
             daemon=True  # Make it a daemon so it exits when main process exits
         )
+        fiverr_auto_mouse_mover_thread.start()
+
+        # Serve the metrics the worker writes, if a metrics port is configured
+        serve_metrics()
 
         # Setup pynput listener for keyboard events
         listener = keyboard.Listener(on_press=on_press, on_release=on_release)
@@ -91,11 +106,15 @@ def main():
     except Exception as e:
         logger.error(f"An error occurred in the main function: {e}", exc_info=True)
     finally:
-        # Clean up resources
-        if 'fiverr_auto_mouse_mover_thread' in locals() and fiverr_auto_mouse_mover_thread.is_alive():
-            fiverr_auto_mouse_mover_thread.terminate()
+        # Ask the worker to exit, terminating it only if it does not respond
+        automation_control.quit()
+        if 'fiverr_auto_mouse_mover_thread' in globals() and fiverr_auto_mouse_mover_thread.is_alive():
             fiverr_auto_mouse_mover_thread.join(timeout=2)
+            if fiverr_auto_mouse_mover_thread.is_alive():
+                fiverr_auto_mouse_mover_thread.terminate()
+                fiverr_auto_mouse_mover_thread.join(timeout=2)
         logger.info("Application terminated")
+        stop_logging(log_listener)
 
 
 if __name__ == '__main__':
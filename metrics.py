@@ -0,0 +1,449 @@
+"""
+Hot-path metrics for the Python Auto Movement application.
+This module times the phases of every move and counts actions, steps,
+errors, cancelled moves and trajectory cache hits, and exports them in the
+Prometheus text format.
+
+The worker process writes the metrics to a file, which node_exporter's
+textfile collector can pick up directly; the main process can also serve
+that file on a local HTTP endpoint.
+
+Instrumentation is chosen once, at import: with AUTO_MOVEMENT_METRICS=0 in
+the environment every hook below is a no-op, and the per-step hooks return
+the original functions unwrapped, so the step loop runs exactly as if the
+instrumentation did not exist.
+"""
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Instrumentation is compiled in unless disabled in the environment
+ENABLED = os.environ.get('AUTO_MOVEMENT_METRICS', '1') not in ('0', 'false', 'no', 'off')
+
+# File the worker writes the metrics to
+METRICS_FILE = os.environ.get('AUTO_MOVEMENT_METRICS_FILE', 'metrics.prom')
+
+# How often the worker rewrites the metrics file (in seconds)
+EXPORT_INTERVAL = 15.0
+
+# Local port of the HTTP endpoint, None to not serve one
+METRICS_PORT = int(os.environ['AUTO_MOVEMENT_METRICS_PORT']) if os.environ.get('AUTO_MOVEMENT_METRICS_PORT') else None
+
+# Prefix of every metric name
+NAMESPACE = 'auto_movement'
+
+# Upper bounds of the histogram buckets (in seconds), from a microsecond to
+# the longest moves
+DEFAULT_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    """Render a label set such as {phase="rng",le="0.1"}."""
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value the way Prometheus expects."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize the counter.
+
+        Args:
+            name: Metric name, without the namespace
+            help_text: Description shown in the export
+            labelnames: Names of the labels the count is split by
+        """
+        self.name = f"{NAMESPACE}_{name}"
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labelvalues: str) -> None:
+        """
+        Increase the count.
+
+        Args:
+            amount: Amount to add
+            *labelvalues: Value of each label, in the order of labelnames
+        """
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        """Current count for a label set."""
+        return self._values.get(labelvalues, 0)
+
+    def render(self) -> Iterator[str]:
+        """Yield the lines of the Prometheus text format."""
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Histogram:
+    """Distribution of observed values in fixed buckets, optionally split by labels."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Metric name, without the namespace
+            help_text: Description shown in the export
+            labelnames: Names of the labels the distribution is split by
+            buckets: Increasing upper bounds of the buckets
+        """
+        self.name = f"{NAMESPACE}_{name}"
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: count in each bucket (plus one overflow bucket), sum and count
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """
+        Record one value.
+
+        Args:
+            value: The observed value
+            *labelvalues: Value of each label, in the order of labelnames
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, *labelvalues: str) -> int:
+        """Number of values observed for a label set."""
+        entry = self._values.get(labelvalues)
+        return entry[2] if entry is not None else 0
+
+    def render(self) -> Iterator[str]:
+        """Yield the lines of the Prometheus text format."""
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = sorted((labels, (list(entry[0]), entry[1], entry[2])) for labels, entry in self._values.items())
+        for labelvalues, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class CollectedCounter:
+    """Count kept elsewhere, e.g. by a cache, read when the metrics are rendered."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str],
+                 collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        """
+        Initialize the counter.
+
+        Args:
+            name: Metric name, without the namespace
+            help_text: Description shown in the export
+            labelnames: Names of the labels the count is split by
+            collect: Function returning the current count of every label set
+        """
+        self.name = f"{NAMESPACE}_{name}"
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> Iterator[str]:
+        """Yield the lines of the Prometheus text format."""
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        for labelvalues, value in sorted(self.collect().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+def _cache_counts(kind: str) -> Dict[Tuple[str, ...], float]:
+    """
+    Read the hit or miss count of every trajectory cache.
+
+    Only modules that are already imported are read, so rendering the
+    metrics never loads NumPy into a process that does not move the pointer.
+
+    Args:
+        kind: 'hits' or 'misses'
+
+    Returns:
+        Count by cache name: 'basis', 'parameters' and 'library'
+    """
+    counts: Dict[Tuple[str, ...], float] = {}
+    trajectory = sys.modules.get('trajectory')
+    if trajectory is not None:
+        stats = trajectory.basis_cache.stats()
+        counts[('basis',)] = stats['basis'][kind]
+        counts[('parameters',)] = stats['parameters'][kind]
+    library = sys.modules.get('trajectory_library')
+    if library is not None:
+        counts[('library',)] = library.trajectory_library.stats()[kind]
+    return counts
+
+
+# Every metric of the application
+phase_seconds = Histogram('phase_seconds', "Time spent in each hot-path phase of a move", ('phase',))
+actions_total = Counter('actions_total', "Actions started", ('action',))
+steps_total = Counter('steps_total', "Trajectory steps sent to the pointer")
+skipped_steps_total = Counter('skipped_steps_total', "Trajectory steps skipped to stay on time")
+errors_total = Counter('errors_total', "Actions that failed with an error")
+cancelled_moves_total = Counter('cancelled_moves_total', "Moves cancelled before reaching their target")
+cache_hits_total = CollectedCounter('cache_hits_total', "Trajectory cache lookups answered from the cache",
+                                    ('cache',), lambda: _cache_counts('hits'))
+cache_misses_total = CollectedCounter('cache_misses_total', "Trajectory cache lookups that had to compute",
+                                      ('cache',), lambda: _cache_counts('misses'))
+registry: List[Any] = [phase_seconds, actions_total, steps_total, skipped_steps_total, errors_total,
+                       cancelled_moves_total, cache_hits_total, cache_misses_total]
+
+
+def render() -> str:
+    """
+    Render every metric in the Prometheus text format.
+
+    Returns:
+        The exposition text
+    """
+    return '\n'.join(line for metric in registry for line in metric.render()) + '\n'
+
+
+class _PhaseTimer:
+    """Context manager adding its duration to a phase of phase_seconds."""
+
+    __slots__ = ('phase', 'start')
+
+    def __init__(self, phase: str):
+        self.phase = phase
+
+    def __enter__(self) -> '_PhaseTimer':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        phase_seconds.observe(time.perf_counter() - self.start, self.phase)
+
+
+class _NullTimer:
+    """Context manager doing nothing, shared by every phase when disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullTimer':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _timed_emit(emit: Callable[[int, int], None]) -> Callable[[int, int], None]:
+    """Wrap a pointer function so every call is timed as the inject phase."""
+    clock = time.perf_counter
+    observe = phase_seconds.observe
+
+    def timed(x: int, y: int) -> None:
+        start = clock()
+        emit(x, y)
+        observe(clock() - start, 'inject')
+    return timed
+
+
+def _observe_lateness(lateness: float) -> None:
+    """Record how late a step was released after its deadline."""
+    phase_seconds.observe(lateness, 'sleep_overshoot')
+
+
+if ENABLED:
+    def phase(name: str) -> _PhaseTimer:
+        """
+        Time a block of code as a phase.
+
+        Args:
+            name: Name of the phase, e.g. 'rng' or 'bezier'
+
+        Returns:
+            Context manager timing the block
+        """
+        return _PhaseTimer(name)
+
+    def timed_emit(emit: Callable[[int, int], None]) -> Callable[[int, int], None]:
+        """
+        Time every pointer event sent through a function.
+
+        Args:
+            emit: Function sending a point to the pointer
+
+        Returns:
+            The function wrapped with a timer
+        """
+        return _timed_emit(emit)
+
+    def step_observer() -> Optional[Callable[[float], None]]:
+        """
+        Get the function the step scheduler reports each step's lateness to.
+
+        Returns:
+            The observer
+        """
+        return _observe_lateness
+
+    def count(counter: Counter, amount: float = 1, *labelvalues: str) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            counter: The counter
+            amount: Amount to add
+            *labelvalues: Value of each label of the counter
+        """
+        counter.inc(amount, *labelvalues)
+else:
+    def phase(name: str) -> _NullTimer:
+        """Do not time anything: instrumentation is disabled."""
+        return _NULL_TIMER
+
+    def timed_emit(emit: Callable[[int, int], None]) -> Callable[[int, int], None]:
+        """Return emit unchanged: instrumentation is disabled."""
+        return emit
+
+    def step_observer() -> Optional[Callable[[float], None]]:
+        """Return None so the step scheduler reports nothing: instrumentation is disabled."""
+        return None
+
+    def count(counter: Counter, amount: float = 1, *labelvalues: str) -> None:
+        """Do not count anything: instrumentation is disabled."""
+
+
+def write_metrics(path: Optional[str] = None) -> None:
+    """
+    Write every metric to a file, replacing it atomically so readers never see half of it.
+
+    Args:
+        path: File to write, defaults to METRICS_FILE
+    """
+    from position_manager import write_atomic
+
+    write_atomic(path or METRICS_FILE, render())
+
+
+async def export_metrics(path: Optional[str] = None, interval: float = EXPORT_INTERVAL) -> None:
+    """
+    Rewrite the metrics file periodically until cancelled.
+
+    Meant to run as a background task of the automation loop. Does nothing
+    when instrumentation is disabled.
+
+    Args:
+        path: File to write, defaults to METRICS_FILE
+        interval: Time between writes (in seconds)
+    """
+    if not ENABLED:
+        return
+    # asyncio is imported on first use to keep this module cheap to import
+    import asyncio
+
+    path = path or METRICS_FILE
+    logger.info(f"Writing metrics to {path} every {interval:.0f} seconds")
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                write_metrics(path)
+            except OSError as e:
+                logger.error(f"Error writing metrics: {e}")
+    finally:
+        # Leave the final counts behind when the worker exits
+        try:
+            write_metrics(path)
+        except OSError as e:
+            logger.error(f"Error writing metrics: {e}")
+
+
+def serve_metrics(port: Optional[int] = None, path: Optional[str] = None,
+                  host: str = '127.0.0.1') -> Optional['ThreadingHTTPServer']:
+    """
+    Serve the metrics file written by the worker on a local HTTP endpoint.
+
+    Runs in a daemon thread of the calling process, e.g. the main process.
+
+    Args:
+        port: Port to listen on, defaults to METRICS_PORT
+        path: Metrics file to serve, defaults to METRICS_FILE
+        host: Address to listen on, local only by default
+
+    Returns:
+        The running server, None if no port is configured or it could not be opened
+    """
+    port = port if port is not None else METRICS_PORT
+    if port is None:
+        return None
+    path = path or METRICS_FILE
+
+    # The HTTP server is only needed in the process serving the metrics
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            try:
+                with open(path, 'rb') as f:
+                    body = f.read()
+            except FileNotFoundError:
+                body = b''
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug(f"Metrics request: {format % args}")
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        logger.error(f"Error serving metrics on {host}:{port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_port}/metrics")
+    return server
@@ -4,64 +4,132 @@ This module contains functions for automating mouse movements and clicks.
 """
 import time
 import logging
-import random
+import queue
 import math
-from datetime import datetime, timedelta
-from typing import NoReturn, List, Tuple, Callable
+from typing import TYPE_CHECKING, Any, Awaitable, List, Optional, Sequence, Tuple, Callable
 
-from pynput.mouse import Button, Controller
+import define
+import metrics
+from define import mouse_movement_type
+from action_scheduler import ActionScheduler
+from backends import PointerBackend, create_backend
+from control import AutomationControl
+from scheduler import DEFAULT_SPIN_THRESHOLD, MoveTiming, StepScheduler, jittered_step_times, run_sync
+from prefetch import ActionPlan, ActionStep, PlannedMove, TrajectoryPrefetcher
+from log_pipeline import configure_worker
+from position_watcher import watch_positions
+from random_source import get_generator
 
-from define import mouse_movement_type, fiverr_press_links
+if TYPE_CHECKING:
+    import multiprocessing
+
+    import numpy as np
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize pynput mouse controller
-mouse = Controller()
+# Backend created on first use when none has been set
+DEFAULT_BACKEND = 'pynput'
 
-# Easing functions for smooth movement
-def ease_out_quad(t: float) -> float:
-    """Quadratic easing out - decelerating to zero velocity."""
-    return -t * (t - 2)
+# Scheduling of the automation cycle on the action scheduler
+AUTOMATION_PRIORITY = 10
+ACTION_TIMEOUT = 60.0  # Longest an action may run before it is cancelled (in seconds)
+ERROR_BACKOFF = 5.0  # Wait after a failed action before retrying (in seconds)
+PLAN_POLL_INTERVAL = 0.01  # How often to check for a prefetched plan (in seconds)
 
-def ease_in_quad(t: float) -> float:
-    """Quadratic easing in - accelerating from zero velocity."""
-    return t * t
+# Pointer backend used for every move and click, created lazily so that
+# importing this module needs no display
+backend: Optional[PointerBackend] = None
 
-def ease_in_out_quad(t: float) -> float:
-    """Quadratic easing in/out - acceleration until halfway, then deceleration."""
-    if t < 0.5:
-        return 2 * t * t
-    else:
-        return -1 + (4 - 2 * t) * t
+# Clock and sleep function used for every wait, replaced by a virtual clock in simulations
+clock: Callable[[], float] = time.monotonic
+sleep: Callable[[float], None] = time.sleep
 
-def ease_out_cubic(t: float) -> float:
-    """Cubic easing out - decelerating to zero velocity."""
-    return (t - 1) * (t - 1) * (t - 1) + 1
+# Deadline-based scheduler pacing the steps of every move
+step_scheduler = StepScheduler(on_step=metrics.step_observer())
 
-def ease_in_cubic(t: float) -> float:
-    """Cubic easing in - accelerating from zero velocity."""
-    return t * t * t
 
-def ease_in_out_cubic(t: float) -> float:
-    """Cubic easing in/out - acceleration until halfway, then deceleration."""
-    if t < 0.5:
-        return 4 * t * t * t
-    else:
-        return (t - 1) * (2 * t - 2) * (2 * t - 2) + 1
-
-# Dictionary mapping easing function names to actual functions
-easing_functions = {
-    'easeOutQuad': ease_out_quad,
-    'easeInQuad': ease_in_quad,
-    'easeInOutQuad': ease_in_out_quad,
-    'easeOutCubic': ease_out_cubic,
-    'easeInCubic': ease_in_cubic,
-    'easeInOutCubic': ease_in_out_cubic,
-}
+def get_backend() -> PointerBackend:
+    """
+    Get the pointer backend used for every move and click.
+
+    Returns:
+        The current pointer backend
+    """
+    global backend
+    if backend is None:
+        backend = create_backend(DEFAULT_BACKEND)
+    return backend
+
+
+def set_backend(new_backend: PointerBackend) -> PointerBackend:
+    """
+    Replace the pointer backend, e.g. with a null or recording backend for benchmarks.
+
+    Args:
+        new_backend: The backend to use from now on
+
+    Returns:
+        The previous backend
+    """
+    global backend
+    previous = backend
+    backend = new_backend
+    return previous
+
+
+def set_clock(new_clock: Callable[[], float], new_sleep: Callable[[float], None],
+              spin_threshold: float = DEFAULT_SPIN_THRESHOLD) -> Tuple[Callable[[], float], Callable[[float], None]]:
+    """
+    Replace the clock and sleep function, e.g. with a virtual clock for simulations.
+
+    The step scheduler is recreated on the new clock. A virtual clock only
+    advances when sleeping, so it needs a spin threshold of 0.
+
+    Args:
+        new_clock: Monotonic clock returning seconds
+        new_sleep: Sleep function taking seconds
+        spin_threshold: Remaining time below which the step scheduler spins (in seconds)
+
+    Returns:
+        The previous clock and sleep function
+    """
+    global clock, sleep, step_scheduler
+    previous = (clock, sleep)
+    clock, sleep = new_clock, new_sleep
+    step_scheduler = StepScheduler(spin_threshold, clock=new_clock, sleep=new_sleep,
+                                   on_step=metrics.step_observer())
+    return previous
+
+
+def init(new_backend: Optional[PointerBackend] = None, load_positions: bool = True) -> None:
+    """
+    Explicitly initialize everything that is otherwise loaded on first use.
+
+    Importing this module has no side effects; calling init up front moves
+    the cost of creating the backend, importing NumPy and loading positions
+    out of the first action.
+
+    Args:
+        new_backend: Backend to use, defaults to creating DEFAULT_BACKEND
+        load_positions: Also load the UI element positions, which may prompt
+            for interactive capture when no positions file exists
+    """
+    # Importing the trajectory engine pulls in NumPy and the easing functions
+    import trajectory  # noqa: F401
+
+    if new_backend is not None:
+        set_backend(new_backend)
+    get_backend()
+
+    if load_positions:
+        define.get_press_links()
+    logger.info("Mouse mover initialized")
+
 
 def get_bezier_points(start_pos: Tuple[int, int], end_pos: Tuple[int, int], 
-                      control_points_count: int = 2) -> List[Tuple[int, int]]:
+                      control_points_count: int = 2,
+                      uniform: Optional[Sequence[Sequence[float]]] = None) -> List[Tuple[int, int]]:
     """
     Generate control points for a Bézier curve between start_pos and end_pos.
 
@@ -69,6 +137,8 @@ def get_bezier_points(start_pos: Tuple[int, int], end_pos: Tuple[int, int],
         start_pos: Starting position (x, y)
         end_pos: Ending position (x, y)
         control_points_count: Number of control points to generate
+        uniform: Optional (control_points_count, 3) uniform draws in [0, 1),
+            drawn from the shared generator if not given
 
     Returns:
         List of control points including start and end positions
@@ -79,15 +149,19 @@ def get_bezier_points(start_pos: Tuple[int, int], end_pos: Tuple[int, int],
     # Calculate the distance between start and end
     distance = math.sqrt((end_pos[0] - start_pos[0])**2 + (end_pos[1] - start_pos[1])**2)
 
+    # Draw the randomness of every control point in one batch
+    if uniform is None:
+        uniform = get_generator().random((control_points_count, 3)).tolist()
+
     # Generate random control points
-    for _ in range(control_points_count):
+    for u_x, u_y, u_t in uniform:
         # Create a point that's somewhat between start and end, but with some randomness
         # The randomness increases with distance to simulate more natural curves for longer movements
-        random_offset_x = random.uniform(-0.25, 0.25) * distance
-        random_offset_y = random.uniform(-0.25, 0.25) * distance
+        random_offset_x = (u_x - 0.5) * 0.5 * distance
+        random_offset_y = (u_y - 0.5) * 0.5 * distance
 
         # Calculate a point between start and end
-        t = random.uniform(0.3, 0.7)  # Position along the line (30% to 70%)
+        t = 0.3 + u_t * 0.4  # Position along the line (30% to 70%)
         x = start_pos[0] + t * (end_pos[0] - start_pos[0]) + random_offset_x
         y = start_pos[1] + t * (end_pos[1] - start_pos[1]) + random_offset_y
 
@@ -107,46 +181,255 @@ def bezier_curve(points: List[Tuple[int, int]], t: float) -> Tuple[int, int]:
     Returns:
         Point (x, y) on the curve at parameter t
     """
-    n = len(points) - 1
-    x = 0
-    y = 0
-
-    for i, point in enumerate(points):
-        # Bernstein polynomial
-        binomial = math.comb(n, i)
-        polynomial = binomial * (t ** i) * ((1 - t) ** (n - i))
-
-        # Add weighted point
-        x += point[0] * polynomial
-        y += point[1] * polynomial
+    from trajectory import compute_trajectory
 
+    x, y = compute_trajectory(points, [t])[0]
     return int(x), int(y)
 
 
-def fiverr_auto_mouse_mover() -> NoReturn:
+def fiverr_auto_mouse_mover(automation_control: Optional[AutomationControl] = None,
+                            log_queue: Optional['multiprocessing.Queue[logging.LogRecord]'] = None) -> None:
     """
     Main function for automating mouse movements.
-    This function runs in an infinite loop, moving the mouse and performing actions.
+    This function runs the asyncio automation loop until asked to quit,
+    reloading the positions file whenever it changes and exporting metrics.
+    Setting AUTO_MOVEMENT_RECORD records every pointer event to that file.
+
+    Args:
+        automation_control: Control channel shared with the main process;
+            without one the automation starts immediately and never stops
+        log_queue: Queue of the main process's log listener; when given,
+            this process logs only through it
     """
+    if log_queue is not None:
+        configure_worker(log_queue)
+
+    # Record every pointer event when a recording file is configured
+    import event_recorder
+    recorder = None
+    if event_recorder.RECORD_FILE:
+        try:
+            recorder = event_recorder.record_backend(get_backend())
+            set_backend(recorder)
+        except OSError as e:
+            logger.error(f"Cannot record pointer events: {e}")
+
+    # asyncio is imported on first use to keep this module cheap to import
+    import asyncio
+
     try:
-        while True:
-            try:
-                # Randomly choose between navigation and random movement
-                if random.randint(0, 1) == 0:
-                    perform_random_movement()
-                else:
-                    perform_navigation()
-
-                # Sleep between actions
-                sleep_duration = random.randint(15, 30)
-                logger.info(f"Sleeping for {sleep_duration} seconds")
-                time.sleep(sleep_duration)
-
-            except Exception as e:
-                logger.error(f"Unexpected error during mouse movement: {e}", exc_info=True)
-                time.sleep(5)  # Wait a bit before retrying
+        asyncio.run(fiverr_auto_mouse_mover_async(automation_control,
+                                                  background=(watch_positions, metrics.export_metrics)))
     except KeyboardInterrupt:
         logger.info("Mouse mover interrupted by keyboard")
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+
+async def fiverr_auto_mouse_mover_async(automation_control: Optional[AutomationControl] = None,
+                                        background: Sequence[Callable[[], Awaitable[Any]]] = (),
+                                        scheduler: Optional[ActionScheduler] = None,
+                                        prefetch: bool = True) -> None:
+    """
+    Drive the automation, control requests and background tasks from one event loop.
+
+    The worker stays warm between runs: a stop cancels the scheduled actions
+    and the running one at its current step, and a start schedules them
+    again. The next action is planned by a background prefetch worker while
+    the loop idles, so each action starts streaming points immediately.
+
+    Args:
+        automation_control: Control channel shared with the main process;
+            without one the automation starts immediately and runs until
+            the scheduler is stopped
+        background: Coroutine functions run alongside the actions, e.g. metrics export
+        scheduler: Action scheduler to run on, so the caller can stop it
+        prefetch: Plan actions on a worker thread; without it each action is
+            planned on the loop, which keeps simulations deterministic
+    """
+    import asyncio
+
+    init()
+
+    loop = asyncio.get_running_loop()
+    scheduler = scheduler or ActionScheduler()
+    prefetcher = TrajectoryPrefetcher(plan_action, get_backend().position()) if prefetch else None
+
+    async def automation_cycle() -> None:
+        if prefetcher is None:
+            await execute_plan_async(plan_action(get_backend().position()))
+        else:
+            await execute_plan_async(await take_prefetched_plan())
+
+        # Sleep between actions
+        sleep_duration = int(get_generator().integers(15, 31))
+        logger.info(f"Sleeping for {sleep_duration} seconds")
+        schedule_cycle(sleep_duration)
+
+    async def take_prefetched_plan() -> ActionPlan:
+        plan = await next_plan(prefetcher)
+
+        # The plan starts where the previous one ended; if the mouse
+        # was moved in between, replan from the actual position
+        if plan.steps[0].move.start_pos != get_backend().position():
+            logger.debug("Mouse moved since planning, replanning from current position")
+            prefetcher.reset(get_backend().position())
+            plan = await next_plan(prefetcher)
+        # Targets planned before the positions were reloaded are stale
+        elif plan.layout is not None and plan.layout is not define.get_press_links():
+            logger.info("Positions changed since planning, replanning with the new positions")
+            prefetcher.reset(get_backend().position())
+            plan = await next_plan(prefetcher)
+        return plan
+
+    def schedule_cycle(delay: float = 0.0) -> None:
+        scheduler.schedule('automation', automation_cycle, delay=delay, priority=AUTOMATION_PRIORITY,
+                           timeout=ACTION_TIMEOUT, error_backoff=ERROR_BACKOFF)
+
+    def on_start() -> None:
+        logger.info("Mouse automation running")
+        if prefetcher is not None:
+            prefetcher.reset(get_backend().position())
+            prefetcher.start()
+        schedule_cycle()
+
+    def on_stop() -> None:
+        scheduler.cancel_all()
+        if prefetcher is not None:
+            prefetcher.stop()
+        get_backend().flush()
+        logger.info("Mouse automation stopped")
+
+    if automation_control is None:
+        on_start()
+    else:
+        automation_control.watch(loop, on_start, on_stop, scheduler.stop)
+    tasks = [loop.create_task(task()) for task in background]
+    try:
+        await scheduler.run()
+    finally:
+        for task in tasks:
+            task.cancel()
+        if prefetcher is not None:
+            prefetcher.stop()
+        logger.info("Mouse mover exiting")
+
+
+async def next_plan(prefetcher: TrajectoryPrefetcher) -> ActionPlan:
+    """
+    Take the next prefetched plan without blocking the event loop.
+
+    Args:
+        prefetcher: Pipeline providing the planned actions
+
+    Returns:
+        The next planned action
+    """
+    import asyncio
+
+    while True:
+        try:
+            return prefetcher.get(timeout=0)
+        except queue.Empty:
+            await asyncio.sleep(PLAN_POLL_INTERVAL)
+
+
+def plan_action(start_pos: Tuple[int, int]) -> ActionPlan:
+    """
+    Plan the next action, randomly choosing between navigation and random movement.
+
+    Args:
+        start_pos: Mouse position the action starts from
+
+    Returns:
+        The planned action with every trajectory precomputed
+    """
+    if get_generator().integers(2) == 0:
+        return plan_random_movement(start_pos)
+    return plan_navigation(start_pos)
+
+
+def plan_random_movement(start_pos: Tuple[int, int]) -> ActionPlan:
+    """
+    Plan random mouse movements for a short duration.
+
+    Args:
+        start_pos: Mouse position the movements start from
+
+    Returns:
+        The planned random movement action
+    """
+    rng = get_generator()
+    total_duration = rng.uniform(1.6, 3.7)
+    planned_duration = 0.0
+    steps = []
+
+    # Keep adding moves until the planned burst duration is reached
+    while planned_duration < total_duration:
+        # Generate random coordinates within screen bounds
+        x, y = rng.integers((100, 126), (1778, 1026)).tolist()
+        duration = rng.uniform(0.6, 2.7)
+
+        move = plan_move(start_pos, (x, y), duration)
+        steps.append(ActionStep(f"({x}, {y})", move))
+        planned_duration += duration
+        start_pos = move.end_pos
+
+    return ActionPlan('random_movement', steps)
+
+
+def plan_navigation(start_pos: Tuple[int, int]) -> ActionPlan:
+    """
+    Plan a move to a random link on the page and possibly a sub-menu item.
+
+    Args:
+        start_pos: Mouse position the navigation starts from
+
+    Returns:
+        The planned navigation action
+    """
+    # Select a random link from the available options
+    rng = get_generator()
+    fiverr_press_links = define.get_press_links()
+    link_index = int(rng.integers(len(fiverr_press_links)))
+    link = fiverr_press_links[link_index]
+
+    # Move to and click the selected link, reusing a known path when
+    # coming from another element
+    source = fiverr_press_links.element_at(*start_pos)
+    route = (source.name, link.name) if source is not None else None
+    move = plan_move(start_pos, link.random_point(), rng.uniform(0.6, 2.7), route)
+    steps = [ActionStep(f"link: {link.name}", move, click=True, target=link.name)]
+
+    # If the link has a sub-menu, navigate to a random item in it
+    if link_index > 2 and link.children:
+        delay = rng.uniform(0.5, 1.5)  # Wait for sub-menu to appear
+
+        sub_link_index = int(rng.integers(len(link.children)))
+        sub_link = link.children[sub_link_index]
+
+        move = plan_move(move.end_pos, sub_link.random_point(), rng.uniform(0.6, 2.7), (link.name, sub_link.name))
+        steps.append(ActionStep(f"sub-menu item: {sub_link_index}", move, click=True, delay=delay,
+                                target=sub_link.name))
+
+    return ActionPlan('navigation', steps, fiverr_press_links)
+
+
+def execute_plan(plan: ActionPlan) -> None:
+    """
+    Execute a planned action by streaming its precomputed points to the mouse.
+
+    Blocks until the action is done; errors are logged, not raised.
+
+    Args:
+        plan: The action to execute
+    """
+    try:
+        run_sync(execute_plan_async(plan, blocking=True))
+    except Exception as e:
+        logger.error(f"Error during {plan.name.replace('_', ' ')}: {e}")
+        # Don't re-raise, let the main loop handle it
 
 
 def perform_random_movement() -> None:
@@ -154,18 +437,7 @@ def perform_random_movement() -> None:
     Perform random mouse movements for a short duration.
     """
     try:
-        logger.info("Performing random mouse movements")
-        end_time = datetime.now() + timedelta(seconds=random.uniform(1.6, 3.7))
-
-        while datetime.now() < end_time:
-            # Generate random coordinates within screen bounds
-            x = random.randint(100, 1777)
-            y = random.randint(126, 1025)
-            duration = random.uniform(0.6, 2.7)
-            easing_function = random.choice(mouse_movement_type)
-
-            logger.debug(f"Moving to ({x}, {y}) with {easing_function} easing")
-            move_mouse_to(x, y, duration)
+        execute_plan(plan_random_movement(get_backend().position()))
     except Exception as e:
         logger.error(f"Error during random movement: {e}")
         # Don't re-raise, let the main loop handle it
@@ -176,34 +448,56 @@ def perform_navigation() -> None:
     Navigate to a random link on the page and possibly a sub-menu item.
     """
     try:
-        logger.info("Performing navigation action")
+        execute_plan(plan_navigation(get_backend().position()))
+    except Exception as e:
+        logger.error(f"Error during navigation: {e}")
+        # Don't re-raise, let the main loop handle it
 
-        # Select a random link from the available options
-        link_index = random.randint(0, len(fiverr_press_links) - 1)
-        link = fiverr_press_links[link_index]
 
-        logger.info(f"Selected link: {link.get('name', f'Link {link_index}')}")
+async def execute_plan_async(plan: ActionPlan, blocking: bool = False) -> None:
+    """
+    Execute a planned action from a coroutine.
 
-        # Move to and click the selected link
-        width = random.randint(link['width']['start'], link['width']['end'])
-        height = random.randint(link['height']['start'], link['height']['end'])
-        move_and_click(width, height)
+    Pauses and steps await instead of blocking, so cancelling the task stops
+    the action at once. Errors propagate to the action scheduler.
 
-        # If the link has a sub-menu, navigate to a random item in it
-        if link_index > 2 and 'sub_menu' in link and link['sub_menu']:
-            time.sleep(random.uniform(0.5, 1.5))  # Wait for sub-menu to appear
+    Args:
+        plan: The action to execute
+        blocking: Block on the module clock instead of awaiting, for execute_plan
+    """
+    logger.info(f"Performing {plan.name.replace('_', ' ')} action")
+    metrics.count(metrics.actions_total, 1, plan.name)
 
-            sub_link_index = random.randint(0, len(link['sub_menu']) - 1)
-            sub_link = link['sub_menu'][sub_link_index]
+    try:
+        for step in plan.steps:
+            if step.delay:
+                await pause(step.delay, blocking)
+
+            if step.click:
+                logger.info(f"Selected {step.label}")
+                await follow_trajectory_async(step.move, blocking)
+                verify_click(step)
+                await click_after_move_async(*step.move.end_pos, blocking=blocking)
+            else:
+                logger.debug("Moving to %s", step.label)
+                await follow_trajectory_async(step.move, blocking)
+    except Exception:
+        metrics.count(metrics.errors_total)
+        raise
+
+
+async def perform_random_movement_async() -> None:
+    """
+    Perform random mouse movements for a short duration, as a scheduler action.
+    """
+    await execute_plan_async(plan_random_movement(get_backend().position()))
 
-            logger.info(f"Selected sub-menu item: {sub_link_index}")
 
-            width = random.randint(sub_link['width']['start'], sub_link['width']['end'])
-            height = random.randint(sub_link['height']['start'], sub_link['height']['end'])
-            move_and_click(width, height)
-    except Exception as e:
-        logger.error(f"Error during navigation: {e}")
-        # Don't re-raise, let the main loop handle it
+async def perform_navigation_async() -> None:
+    """
+    Navigate to a random link and possibly a sub-menu item, as a scheduler action.
+    """
+    await execute_plan_async(plan_navigation(get_backend().position()))
 
 
 def move_and_click(x: int, y: int) -> None:
@@ -215,103 +509,275 @@ def move_and_click(x: int, y: int) -> None:
         y: The y-coordinate to move to
     """
     try:
-        logger.debug(f"Moving to position ({x}, {y})")
-        move_mouse_to(x, y, random.uniform(0.6, 2.7))
-
-        # Wait a bit before clicking
-        time.sleep(random.uniform(0.6, 1))
-
-        # Click
-        logger.debug(f"Clicking at ({x}, {y})")
-        mouse.click(Button.left)
-
-        # Wait a bit after clicking
-        time.sleep(random.uniform(0.6, 1))
+        logger.debug("Moving to position (%d, %d)", x, y)
+        move_mouse_to(x, y, get_generator().uniform(0.6, 2.7))
+        click_after_move(x, y)
     except Exception as e:
         logger.error(f"Error during move and click: {e}")
         raise  # Re-raise to be handled by the caller
 
 
-def move_mouse_to(x: int, y: int, duration: float) -> None:
+def click_after_move(x: int, y: int) -> None:
     """
-    Move the mouse to the specified position using human-like movement.
+    Click at the current position with short human-like pauses around the click.
+
+    Args:
+        x: The x-coordinate of the click, used for logging
+        y: The y-coordinate of the click, used for logging
+    """
+    run_sync(click_after_move_async(x, y, blocking=True))
+
+
+async def click_after_move_async(x: int, y: int, blocking: bool = False) -> None:
+    """
+    Click at the current position with awaited human-like pauses around the click.
+
+    Args:
+        x: The x-coordinate of the click, used for logging
+        y: The y-coordinate of the click, used for logging
+        blocking: Block on the module clock instead of awaiting, for click_after_move
+    """
+    # Wait a bit before clicking
+    await pause(get_generator().uniform(0.6, 1), blocking)
+
+    # Click
+    logger.debug("Clicking at (%d, %d)", x, y)
+    get_backend().click('left')
+
+    # Wait a bit after clicking
+    await pause(get_generator().uniform(0.6, 1), blocking)
+
+
+async def pause(seconds: float, blocking: bool = False) -> None:
+    """
+    Pause between steps of an action.
+
+    Args:
+        seconds: Length of the pause
+        blocking: Block on the module clock instead of awaiting the event loop
+    """
+    if blocking:
+        sleep(seconds)
+    else:
+        import asyncio
+        await asyncio.sleep(seconds)
+
+
+def verify_click(step: ActionStep) -> bool:
+    """
+    Check that the mouse is on the element a click is meant for.
+
+    Args:
+        step: The action step about to click
+
+    Returns:
+        True if the mouse is on the target element or the step has no target
+    """
+    if step.target is None:
+        return True
+
+    x, y = get_backend().position()
+    element = define.get_press_links().element_at(x, y)
+    if element is None or element.name != step.target:
+        found = element.name if element is not None else 'no element'
+        logger.warning(f"Click for {step.target} would land on {found} at ({x}, {y})")
+        return False
+    return True
+
+
+def plan_move(start_pos: Tuple[int, int], end_pos: Tuple[int, int], duration: float,
+              route: Optional[Tuple[str, str]] = None) -> PlannedMove:
+    """
+    Plan a human-like move by precomputing its full trajectory.
 
     This function uses Bézier curves and easing functions to create smooth,
     natural-looking mouse movements that mimic human behavior.
 
     Args:
-        x: The x-coordinate to move to
-        y: The y-coordinate to move to
+        start_pos: Starting position (x, y)
+        end_pos: Ending position (x, y)
         duration: The duration for the move (in seconds)
+        route: Names of the source and destination UI regions; moves between
+            known regions reuse paths from the trajectory library
+
+    Returns:
+        The planned move, without a trajectory if start and end are the same
     """
-    try:
-        # Get current mouse position
-        start_pos = mouse.position
-        end_pos = (x, y)
+    # The trajectory engine needs NumPy, so it is imported on first use
+    from trajectory import collapse_duplicates, human_deviation, humanize
+    from trajectory_library import trajectory_library
 
-        # Skip if start and end positions are the same
-        if start_pos == end_pos:
-            return
+    start_pos = (int(start_pos[0]), int(start_pos[1]))
+    end_pos = (int(end_pos[0]), int(end_pos[1]))
 
-        logger.debug(f"Moving from {start_pos} to {end_pos} over {duration} seconds")
+    # Skip if start and end positions are the same
+    if start_pos == end_pos:
+        return PlannedMove(start_pos, end_pos, duration, None)
 
-        # Select an easing function based on the movement type
-        easing_function_name = random.choice(mouse_movement_type)
-        # Default to ease_out_quad if the function is not implemented
-        easing_function = easing_functions.get(easing_function_name, ease_out_quad)
+    # Moves between known regions reuse a pooled path mapped onto the endpoints
+    if route is None:
+        path = plan_path(start_pos, end_pos, duration)
+    else:
+        path = trajectory_library.get(route, start_pos, end_pos,
+                                      lambda: plan_path(start_pos, end_pos, duration), duration)
+    steps = len(path) - 1
 
-        logger.debug(f"Using easing function: {easing_function_name}")
+    # Draw the randomness of every step in one batch: the x and y deviation
+    # and the timing jitter
+    with metrics.phase('rng'):
+        step_draws = get_generator().random((steps + 1, 3))
 
-        # Generate Bézier curve control points
-        # Use more control points for longer distances to create more natural curves
-        distance = math.sqrt((end_pos[0] - start_pos[0])**2 + (end_pos[1] - start_pos[1])**2)
+    with metrics.phase('humanize'):
+        # Add the small random deviations that simulate human imprecision
+        trajectory = humanize(path, human_deviation(steps, step_draws[:, :2]))
+
+        # Time offset of every step, with small random variations to make it more natural
+        step_times = jittered_step_times(len(trajectory), duration, uniform=step_draws[1:, 2])
+
+        # Steps landing on the pixel of the step before them would only cost events
+        trajectory, step_times, saved_steps = collapse_duplicates(trajectory, step_times)
+
+    return PlannedMove(start_pos, end_pos, duration, trajectory, step_times, saved_steps)
+
+
+def plan_path(start_pos: Tuple[int, int], end_pos: Tuple[int, int], duration: float) -> 'np.ndarray':
+    """
+    Generate the exact eased path of a move along a new random Bézier curve.
+
+    Args:
+        start_pos: Starting position (x, y)
+        end_pos: Ending position (x, y), different from start_pos
+        duration: The duration for the move (in seconds)
+
+    Returns:
+        Float array of shape (steps + 1, 2) with the positions of every step
+    """
+    from easing import easing_functions, ease_out_quad
+    from trajectory import arc_length_table, eased_path, step_count
+
+    # Use more control points for longer distances to create more natural curves
+    distance = math.sqrt((end_pos[0] - start_pos[0])**2 + (end_pos[1] - start_pos[1])**2)
+    control_points_count = 2
+    if distance > 500:
+        control_points_count = 3
+    elif distance > 200:
         control_points_count = 2
-        if distance > 500:
-            control_points_count = 3
-        elif distance > 200:
-            control_points_count = 2
-        else:
-            control_points_count = 1
+    else:
+        control_points_count = 1
 
-        points = get_bezier_points(start_pos, end_pos, control_points_count)
+    # Draw the randomness of the curve in one batch: the easing choice and
+    # three values per control point
+    with metrics.phase('rng'):
+        curve_draws = get_generator().random(1 + 3 * control_points_count)
 
-        # Calculate the number of steps based on duration and distance
-        # More steps for longer durations and distances
-        steps = max(int(duration * 60), int(distance / 10))
-        steps = min(steps, 200)  # Cap at 200 steps to prevent excessive CPU usage
+    # Select an easing function based on the movement type
+    easing_function_name = mouse_movement_type[int(curve_draws[0] * len(mouse_movement_type))]
+    # Default to ease_out_quad if the function is not implemented
+    easing_function = easing_functions.get(easing_function_name, ease_out_quad)
 
-        # Calculate the time interval between steps
-        interval = duration / steps
+    # Hot-path debug messages are only formatted when debug logging is on
+    logger.debug("Planning move from %s to %s over %s seconds with %s easing",
+                 start_pos, end_pos, duration, easing_function_name)
 
-        # Move the mouse along the Bézier curve with easing
-        for step in range(steps + 1):
-            # Apply easing function to get the parameter t
-            t = step / steps
-            t_eased = easing_function(t)
+    with metrics.phase('bezier'):
+        # Generate Bézier curve control points
+        points = get_bezier_points(start_pos, end_pos, control_points_count,
+                                   curve_draws[1:].reshape(control_points_count, 3).tolist())
 
-            # Calculate the point on the Bézier curve
-            point = bezier_curve(points, t_eased)
+        # Calculate the number of steps from the length of the curve, so that
+        # no step jumps further than a few pixels, whatever the curve's shape
+        table = arc_length_table(points)
+        steps = step_count(table.length, duration, easing_function)
 
-            # Add small random deviations to simulate human imprecision
-            # The deviation decreases as we get closer to the target
-            deviation_factor = (1 - t) * 2  # More deviation at the beginning
-            deviation_x = random.uniform(-1, 1) * deviation_factor
-            deviation_y = random.uniform(-1, 1) * deviation_factor
+        # Compute the whole eased Bézier path in one batch
+        return eased_path(points, steps, easing_function, table)
 
-            # Apply the deviation
-            mouse_x = int(point[0] + deviation_x)
-            mouse_y = int(point[1] + deviation_y)
 
-            # Set the mouse position
-            mouse.position = (mouse_x, mouse_y)
+def follow_trajectory(move: PlannedMove) -> None:
+    """
+    Stream the precomputed points of a planned move to the mouse.
+
+    Args:
+        move: The planned move to follow
+    """
+    run_sync(follow_trajectory_async(move, blocking=True))
 
-            # Sleep for the calculated interval
-            # Add small random variations to the interval to make it more natural
-            time.sleep(interval * random.uniform(0.9, 1.1))
 
-        # Ensure we end exactly at the target position
-        mouse.position = end_pos
+async def follow_trajectory_async(move: PlannedMove, blocking: bool = False) -> None:
+    """
+    Stream the precomputed points of a planned move to the mouse from a coroutine.
 
+    Args:
+        move: The planned move to follow
+        blocking: Block on the module clock instead of awaiting, for follow_trajectory
+    """
+    if move.trajectory is None:
+        return
+
+    backend = get_backend()
+
+    # Move the mouse along the precomputed path, each step on its deadline
+    # Buffered backends queue each point ahead of time and send it on the deadline
+    flush = backend.flush if backend.buffered else None
+    points = move.trajectory.tolist()
+    emit = metrics.timed_emit(backend.move)
+    if blocking:
+        timing = step_scheduler.run(points, move.step_times, emit, flush)
+    else:
+        import asyncio
+        try:
+            timing = await step_scheduler.run_async(points, move.step_times, emit, flush)
+        except asyncio.CancelledError:
+            metrics.count(metrics.cancelled_moves_total)
+            raise
+    count_steps(timing)
+    logger.debug("Move took %.3fs for %.3fs requested (%d steps skipped, %d repeated positions dropped)",
+                 timing.actual, timing.requested, timing.skipped, move.saved_steps)
+
+    # Ensure we end exactly at the target position
+    end_at_target(move)
+
+
+def count_steps(timing: MoveTiming) -> None:
+    """
+    Add the steps of a finished move to the metrics.
+
+    Args:
+        timing: Timing record of the move
+    """
+    metrics.count(metrics.steps_total, timing.steps - timing.skipped)
+    if timing.skipped:
+        metrics.count(metrics.skipped_steps_total, timing.skipped)
+
+
+def end_at_target(move: PlannedMove) -> None:
+    """
+    Put the mouse on the target of a finished move and send any buffered events.
+
+    The last step of a trajectory normally lands on the target already, in
+    which case no extra event is sent.
+
+    Args:
+        move: The move that was just followed
+    """
+    backend = get_backend()
+    last = move.trajectory[-1]
+    if (int(last[0]), int(last[1])) != move.end_pos:
+        backend.move(*move.end_pos)
+    backend.flush()
+
+
+def move_mouse_to(x: int, y: int, duration: float) -> None:
+    """
+    Move the mouse to the specified position using human-like movement.
+
+    Args:
+        x: The x-coordinate to move to
+        y: The y-coordinate to move to
+        duration: The duration for the move (in seconds)
+    """
+    try:
+        follow_trajectory(plan_move(get_backend().position(), (x, y), duration))
     except Exception as e:
         logger.error(f"Error during mouse move: {e}")
         raise  # Re-raise to be handled by the caller
@@ -1,13 +1,29 @@
 """
 Position manager for the Python Auto Movement application.
 This module handles capturing, saving, and loading mouse positions.
+
+Positions are stored in one JSON file holding a profile per screen
+resolution:
+
+    {
+        "version": 2,
+        "profiles": {
+            "1920x1080": {"dashboard": {"width": ..., "height": ...}, ...}
+        }
+    }
+
+Files from before profiles existed hold the elements directly and are read
+as the "default" profile.
 """
 import os
 import json
 import logging
+import tempfile
+import threading
 from typing import Dict, List, Any, Optional, Tuple
-from pynput.keyboard import Listener as KeyboardListener, Key
-from pynput.mouse import Listener as MouseListener, Button
+
+from calibration import CaptureSession, CaptureTarget, assemble_positions, calibrate, capture_targets
+from regions import ElementLayout, Region
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -15,41 +31,269 @@ logger = logging.getLogger(__name__)
 # File to store positions
 POSITIONS_FILE = "positions.json"
 
-def save_positions(positions: Dict[str, Any]) -> bool:
+# Version of the file format written by save_positions
+SCHEMA_VERSION = 2
+
+# Profile used when the screen resolution is unknown, and for files without profiles
+DEFAULT_PROFILE = "default"
+
+# Parsed files by absolute path, with the file signature they were parsed at
+_store_cache: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}
+_store_lock = threading.Lock()
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Get the metadata that changes whenever a file is rewritten or replaced.
+
+    Args:
+        path: File to check
+
+    Returns:
+        Tuple of (inode, size, modification time in ns), None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def screen_resolution() -> Optional[Tuple[int, int]]:
+    """
+    Get the size of the primary screen.
+
+    Returns:
+        Tuple of (width, height) in pixels, None if there is no display
+    """
+    try:
+        # PyAutoGUI needs a display, so it is only imported when asked
+        import pyautogui
+
+        width, height = pyautogui.size()
+        return int(width), int(height)
+    except Exception as e:
+        logger.debug(f"Screen resolution unavailable: {e}")
+        return None
+
+
+def profile_name(resolution: Optional[Tuple[int, int]] = None) -> str:
+    """
+    Get the name of the profile holding the positions for a screen resolution.
+
+    Args:
+        resolution: Screen size (width, height), defaults to the current screen
+
+    Returns:
+        Profile name such as '1920x1080', DEFAULT_PROFILE if the resolution is unknown
+    """
+    resolution = resolution or screen_resolution()
+    if resolution is None:
+        return DEFAULT_PROFILE
+    return f"{resolution[0]}x{resolution[1]}"
+
+
+class UnsupportedSchemaError(ValueError):
+    """Raised for a positions file written by a newer version of the application."""
+
+
+def validate_store(document: Any) -> Dict[str, Any]:
+    """
+    Check the structure of a positions file and upgrade it to the current version.
+
+    Args:
+        document: Parsed content of the file
+
+    Returns:
+        Dictionary with 'version' and 'profiles', each profile mapping element
+        names to position dictionaries
+
+    Raises:
+        UnsupportedSchemaError: If the file has a newer version than SCHEMA_VERSION
+        ValueError: If the file is not a positions file or has an unsupported version
+    """
+    if not isinstance(document, dict):
+        raise ValueError(f"Expected a JSON object, got {type(document).__name__}")
+
+    if 'version' not in document:
+        # Version 1 files hold the positions of a single screen directly
+        document = {'version': SCHEMA_VERSION, 'profiles': {DEFAULT_PROFILE: document}}
+
+    version = document['version']
+    if not isinstance(version, int) or isinstance(version, bool):
+        raise ValueError(f"Invalid schema version {version!r}")
+    if version > SCHEMA_VERSION:
+        raise UnsupportedSchemaError(f"Schema version {version} is newer than the supported version {SCHEMA_VERSION}")
+    if version < 2:
+        raise ValueError(f"Unsupported schema version {version}")
+
+    profiles = document.get('profiles')
+    if not isinstance(profiles, dict):
+        raise ValueError("'profiles' must be an object")
+    for name, positions in profiles.items():
+        if not isinstance(positions, dict):
+            raise ValueError(f"Profile {name} must be an object")
+    return document
+
+
+def read_store(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Read and validate a positions file, reusing the parsed content while the file is unchanged.
+
+    The returned dictionary is shared with later calls and must not be modified.
+
+    Args:
+        path: File to read, defaults to POSITIONS_FILE
+
+    Returns:
+        The validated file content, as returned by validate_store
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not valid JSON or not a valid positions file
     """
-    Save positions to a JSON file.
-    
+    path = os.path.abspath(path or POSITIONS_FILE)
+    signature = file_signature(path)
+    if signature is None:
+        raise FileNotFoundError(f"Positions file {path} not found")
+
+    with _store_lock:
+        cached = _store_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    with open(path, 'r') as f:
+        document = validate_store(json.load(f))
+    logger.info(f"Positions loaded from {path}")
+
+    with _store_lock:
+        _store_cache[path] = (signature, document)
+    return document
+
+
+def select_profile(document: Dict[str, Any], profile: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Pick the positions for a profile from a validated positions file.
+
+    Args:
+        document: Content returned by read_store
+        profile: Profile name, defaults to the current screen resolution
+
+    Returns:
+        Positions of the profile, falling back to DEFAULT_PROFILE, None if neither exists
+    """
+    profiles = document['profiles']
+    profile = profile or profile_name()
+    if profile in profiles:
+        return profiles[profile]
+    if DEFAULT_PROFILE in profiles:
+        logger.info(f"No positions saved for profile {profile}, using the {DEFAULT_PROFILE} profile")
+        return profiles[DEFAULT_PROFILE]
+    return None
+
+
+def write_atomic(path: str, data: str) -> None:
+    """
+    Replace a file so that it holds either its old or its new content, even after a crash.
+
+    The data is written to a temporary file in the same directory, flushed
+    to disk and renamed over the target.
+
+    Args:
+        path: File to replace
+        data: New content
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Persist the rename itself; not every platform can open a directory
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def save_positions(positions: Dict[str, Any], profile: Optional[str] = None,
+                   path: Optional[str] = None) -> bool:
+    """
+    Save positions to a JSON file, keeping the other profiles stored in it.
+
+    A file that cannot be parsed is kept next to the new one with a .corrupt
+    suffix instead of being overwritten. A file written by a newer version
+    is left untouched and nothing is saved.
+
     Args:
         positions: Dictionary of positions to save
-        
+        profile: Profile to save them in, defaults to the current screen resolution
+        path: File to write, defaults to POSITIONS_FILE
+
     Returns:
         True if successful, False otherwise
     """
+    path = path or POSITIONS_FILE
+    profile = profile or profile_name()
     try:
-        with open(POSITIONS_FILE, 'w') as f:
-            json.dump(positions, f, indent=4)
-        logger.info(f"Positions saved to {POSITIONS_FILE}")
+        try:
+            profiles = dict(read_store(path)['profiles'])
+        except FileNotFoundError:
+            profiles = {}
+        except UnsupportedSchemaError as e:
+            # The file is valid for a newer version, which would lose its profiles
+            logger.error(f"Not saving positions, {path} was written by a newer version: {e}")
+            return False
+        except ValueError as e:
+            backup = f"{path}.corrupt"
+            logger.warning(f"Positions file {path} is unreadable ({e}), moving it to {backup}")
+            os.replace(path, backup)
+            profiles = {}
+
+        profiles[profile] = positions
+        document = {'version': SCHEMA_VERSION, 'profiles': profiles}
+        write_atomic(path, json.dumps(document, indent=4))
+        logger.info(f"Positions saved to {path} (profile {profile})")
         return True
     except Exception as e:
         logger.error(f"Error saving positions: {e}")
         return False
 
-def load_positions() -> Optional[Dict[str, Any]]:
+def load_positions(profile: Optional[str] = None, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
     Load positions from the JSON file.
-    
+
+    Args:
+        profile: Profile to load, defaults to the current screen resolution
+        path: File to read, defaults to POSITIONS_FILE
+
     Returns:
-        Dictionary of positions if file exists, None otherwise
+        Dictionary of positions if the file and profile exist, None otherwise
     """
-    if not os.path.exists(POSITIONS_FILE):
-        logger.info(f"Positions file {POSITIONS_FILE} not found")
-        return None
-        
+    path = path or POSITIONS_FILE
     try:
-        with open(POSITIONS_FILE, 'r') as f:
-            positions = json.load(f)
-        logger.info(f"Positions loaded from {POSITIONS_FILE}")
-        return positions
+        return select_profile(read_store(path), profile)
+    except FileNotFoundError:
+        logger.info(f"Positions file {path} not found")
+        return None
     except Exception as e:
         logger.error(f"Error loading positions: {e}")
         return None
@@ -65,121 +309,214 @@ def capture_position(element_name: str) -> Optional[Tuple[int, int]]:
     Returns:
         Tuple of (x, y) coordinates if successful, None otherwise
     """
-    position = None
-    shift_pressed = {'state': False}
+    with CaptureSession() as session:
+        area = session.capture([CaptureTarget(element_name, element_name)])[0]
 
-    def on_key_press(key):
-        if key == Key.shift:
-            shift_pressed['state'] = True
+    if area is None:
+        logger.warning(f"Shift+Click not detected for {element_name}")
+        return None
 
-    def on_key_release(key):
-        if key == Key.shift:
-            shift_pressed['state'] = False
+    position = area.center
+    logger.info(f"Captured position for {element_name}: {position}")
+    return position
 
-    def on_click(x, y, button, pressed):
-        nonlocal position
-        if button == Button.left and pressed and shift_pressed['state']:
-            position = (x, y)
-            return False  # Stop listener
+def capture_all_positions(elements: List[Dict[str, Any]],
+                          known: Optional[Dict[str, Region]] = None) -> Dict[str, Any]:
+    """
+    Capture positions for all elements.
 
-    print(f"Please Shift+Click on the {element_name} element...")
+    Every element and sub-menu item is captured in one session, see
+    calibration.py for the controls.
 
-    # Start both keyboard and mouse listeners
-    with KeyboardListener(on_press=on_key_press, on_release=on_key_release) as kl, \
-            MouseListener(on_click=on_click) as ml:
-        ml.join()  # Wait for mouse click with Shift
+    Args:
+        elements: List of element dictionaries with 'name' keys
+        known: Areas already known, by name; only the other elements are captured
 
-    if position:
-        logger.info(f"Captured position for {element_name}: {position}")
-    else:
-        logger.warning(f"Shift+Click not detected for {element_name}")
+    Returns:
+        Dictionary of positions with element names as keys, including the known ones
+    """
+    return calibrate(elements, known)
 
-    return position
 
-def capture_all_positions(elements: List[Dict[str, Any]]) -> Dict[str, Any]:
+def layout_areas(layout: ElementLayout) -> Dict[str, Region]:
     """
-    Capture positions for all elements.
-    
+    Get the area of every element and sub-menu item of a layout.
+
     Args:
-        elements: List of element dictionaries with 'name' keys
-        
+        layout: Layout of the saved elements
+
     Returns:
-        Dictionary of positions with element names as keys
+        Area of each element and sub-menu item, by name
     """
-    positions = {}
-    
+    return {element.name: Region(*element.bounds) for element in layout.flat}
+
+
+def missing_elements(elements: List[Dict[str, Any]], areas: Dict[str, Region]) -> List[str]:
+    """
+    List the elements and sub-menu items that have no known area.
+
+    Args:
+        elements: List of element dictionaries with 'name' keys and optional 'sub_menu'
+        areas: Known areas, by name
+
+    Returns:
+        Labels of the missing elements, each element before its sub-menu items
+    """
+    return [target.label for target in capture_targets(elements, areas)]
+
+def parse_positions(positions: Any, elements: List[Dict[str, Any]]) -> ElementLayout:
+    """
+    Validate positions in the positions.json format and compile them to an element layout.
+
+    Args:
+        positions: Dictionary of positions with element names as keys
+        elements: List of element dictionaries giving the order of the elements
+
+    Returns:
+        Layout of the saved elements in the order of elements
+
+    Raises:
+        ValueError: If positions is not a dictionary, none of the elements
+            is saved or a saved position is malformed
+    """
+    if not isinstance(positions, dict):
+        raise ValueError(f"Expected a dictionary of positions, got {type(positions).__name__}")
+
+    # Convert dictionary to list
+    position_list = []
     for element in elements:
         element_name = element.get('name', 'Unknown')
-        position = capture_position(element_name)
-        
-        if position:
-            x, y = position
-            # Create a position dictionary similar to the original format
-            positions[element_name] = {
-                'name': element_name,
-                'width': {
-                    'start': x - 10,  # Create a small clickable area
-                    'end': x + 10
-                },
-                'height': {
-                    'start': y - 10,
-                    'end': y + 10
-                }
-            }
-            
-            # If the original element has a sub_menu, ask for those positions too
-            if 'sub_menu' in element:
-                positions[element_name]['sub_menu'] = []
-                for i, sub_item in enumerate(element['sub_menu']):
-                    sub_name = sub_item.get('name', f'sub_item_{i+1}')
-                    sub_position = capture_position(f"{element_name} > {sub_name}")
-                    
-                    if sub_position:
-                        sub_x, sub_y = sub_position
-                        positions[element_name]['sub_menu'].append({
-                            'name': sub_name,
-                            'width': {
-                                'start': sub_x - 10,
-                                'end': sub_x + 10
-                            },
-                            'height': {
-                                'start': sub_y - 10,
-                                'end': sub_y + 10
-                            }
-                        })
-    
-    return positions
-
-def get_positions(elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """
-    Get positions for all elements, either from file or by capturing.
-    
+        if element_name in positions:
+            if not isinstance(positions[element_name], dict):
+                raise ValueError(f"Position of {element_name} is not a dictionary")
+            position_list.append(dict(positions[element_name], name=element_name))
+
+    if not position_list:
+        raise ValueError("None of the elements has a saved position")
+
+    return ElementLayout.from_dicts(position_list)
+
+
+def load_layout(elements: List[Dict[str, Any]], path: Optional[str] = None,
+                profile: Optional[str] = None) -> ElementLayout:
+    """
+    Read and validate a positions file.
+
+    Unlike load_positions, every problem is raised, so callers can keep
+    their current positions when the file is broken.
+
+    Args:
+        elements: List of element dictionaries giving the order of the elements
+        path: File to read, defaults to POSITIONS_FILE
+        profile: Profile to read, defaults to the current screen resolution
+
+    Returns:
+        Layout of the saved elements
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not valid JSON, has no matching profile
+            or a position is malformed
+    """
+    positions = select_profile(read_store(path), profile)
+    if positions is None:
+        raise ValueError(f"No positions saved for profile {profile or profile_name()}")
+    return parse_positions(positions, elements)
+
+
+def convert_positions(positions: Dict[str, Any], elements: List[Dict[str, Any]]) -> Optional[ElementLayout]:
+    """
+    Convert positions in the positions.json format to an element layout.
+
+    Args:
+        positions: Dictionary of positions with element names as keys
+        elements: List of element dictionaries giving the order of the elements
+
+    Returns:
+        Layout of the saved elements in the order of elements, None if none
+        of them is saved or a saved position is malformed
+    """
+    try:
+        layout = parse_positions(positions, elements)
+    except ValueError as e:
+        logger.error(f"Invalid saved positions: {e}")
+        return None
+
+    check_overlaps(layout)
+    return layout
+
+
+def check_overlaps(layout: ElementLayout) -> int:
+    """
+    Warn about saved elements whose clickable areas overlap.
+
+    A click in an overlap could hit either element, usually because two
+    captured positions are closer than the size of their areas.
+
+    Args:
+        layout: Layout of the saved elements
+
+    Returns:
+        Number of overlapping pairs
+    """
+    overlaps = layout.overlaps()
+    for first, second in overlaps:
+        logger.warning(f"Clickable areas of {first.name} and {second.name} overlap: {first!r}, {second!r}")
+    return len(overlaps)
+
+
+def get_positions(elements: List[Dict[str, Any]]) -> ElementLayout:
+    """
+    Get positions for all elements, from file, by locating them on screen
+    from templates and by capturing those still missing.
+
+    Located elements replace their saved positions; the search starts where
+    they were saved, so an unchanged page is confirmed quickly.
+
     Args:
         elements: List of element dictionaries with 'name' keys
-        
+
     Returns:
-        List of position dictionaries
+        Layout of the clickable elements
+
+    Raises:
+        RuntimeError: If no element position was saved, located or captured
     """
     # Try to load positions from file
+    layout = None
     loaded_positions = load_positions()
-    
     if loaded_positions:
-        # Convert dictionary to list
-        position_list = []
-        for element in elements:
-            element_name = element.get('name', 'Unknown')
-            if element_name in loaded_positions:
-                position_list.append(loaded_positions[element_name])
-        
-        if position_list:
-            return position_list
-    
-    # If no positions loaded, capture them
-    print("No saved positions found. You will be asked to click on each element.")
-    positions = capture_all_positions(elements)
-    
+        layout = convert_positions(loaded_positions, elements)
+    areas = layout_areas(layout) if layout is not None else {}
+
+    # Look for the elements on screen, starting where they were saved
+    from locator import locate_positions
+
+    located = locate_positions(elements, layout=layout)
+    if located:
+        found = layout_areas(ElementLayout.from_dicts(located))
+        logger.info(f"Located {len(found)} elements on screen from templates")
+        areas.update(found)
+
+    # Capture only what is still missing, e.g. sub-menus that were not visible
+    missing = missing_elements(elements, areas)
+    if missing:
+        print(f"No saved positions for {', '.join(missing)}. You will be asked to click on each of them.")
+        areas = layout_areas(ElementLayout.from_dicts(capture_all_positions(elements, areas)))
+        missing = missing_elements(elements, areas)
+        if missing:
+            # Skipped elements are left out of the navigation and asked for again on the next start
+            logger.warning(f"Running without the positions of {', '.join(missing)}")
+
+    positions = assemble_positions(elements, areas)
+    if not positions:
+        raise RuntimeError("No element positions were captured; capture them or add templates to locate them")
+
+    new_layout = ElementLayout.from_dicts(positions)
+    if new_layout == layout:
+        return layout
+
     # Save the positions for future use
     save_positions(positions)
-    
-    # Convert dictionary to list
-    return list(positions.values())
\ No newline at end of file
+    check_overlaps(new_layout)
+    return new_layout
@@ -0,0 +1,230 @@
+"""
+Positions file watcher for the Python Auto Movement application.
+This module reloads positions.json while the automation runs, so edited
+coordinates are used from the next action on without restarting the worker.
+
+Changes are detected with inotify where available, and by polling the
+file's metadata everywhere else. A reloaded file is fully validated before
+it replaces the positions in use; a malformed file is reported and the
+previous positions are kept.
+"""
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import struct
+from typing import Any, Dict, List, Optional
+
+import define
+from position_manager import POSITIONS_FILE, check_overlaps, file_signature, load_layout
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# How often the polling fallback checks the file (in seconds)
+POLL_INTERVAL = 1.0
+
+# Wait after a change before reloading, so a burst of writes is read once (in seconds)
+SETTLE_DELAY = 0.2
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+# Header of struct inotify_event: wd, mask, cookie, len, followed by the name
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Size of each read from the inotify descriptor
+_READ_SIZE = 64 * 1024
+
+
+class InotifyWatch:
+    """
+    inotify watch on the directory of a file, reporting changes to that file.
+
+    The directory is watched rather than the file, so replacing the file by
+    renaming a new one over it (as editors and atomic writers do) is seen too.
+    """
+
+    def __init__(self, path: str):
+        """
+        Create the watch.
+
+        Args:
+            path: File to watch; its directory must exist
+
+        Raises:
+            OSError: If inotify is not available or the watch cannot be added
+        """
+        library = ctypes.util.find_library('c')
+        libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+
+        self.path = os.path.abspath(path)
+        self.name = os.fsencode(os.path.basename(self.path))
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, f"inotify_init1 failed: {os.strerror(code)}")
+
+        directory = os.fsencode(os.path.dirname(self.path))
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, directory, mask) < 0:
+            code = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(code, f"inotify_add_watch failed: {os.strerror(code)}")
+
+    def fileno(self) -> int:
+        """File descriptor that becomes readable when events are pending."""
+        return self.fd
+
+    def read_events(self) -> bool:
+        """
+        Consume every pending event without blocking.
+
+        Returns:
+            True if any of them may concern the watched file
+        """
+        changed = False
+        while True:
+            try:
+                data = os.read(self.fd, _READ_SIZE)
+            except BlockingIOError:
+                return changed
+            if not data:
+                return changed
+
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                # An overflow or a removed watch may have hidden a change
+                if name == self.name or mask & (IN_Q_OVERFLOW | IN_IGNORED):
+                    changed = True
+
+    def close(self) -> None:
+        """Remove the watch."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def reload_positions(path: Optional[str] = None,
+                     elements: Optional[List[Dict[str, Any]]] = None) -> bool:
+    """
+    Read the positions file again and swap it in if it is valid.
+
+    The new layout is compiled and checked completely before it replaces
+    the current one, so actions never see a partially loaded table.
+
+    Args:
+        path: Positions file, defaults to POSITIONS_FILE
+        elements: List of element dictionaries giving the order of the elements,
+            defaults to define.default_elements
+
+    Returns:
+        True if new positions are in use, False if they were unchanged or invalid
+    """
+    path = path or POSITIONS_FILE
+    try:
+        layout = load_layout(elements if elements is not None else define.default_elements, path)
+    except FileNotFoundError:
+        logger.warning(f"Positions file {path} was removed, keeping the current positions")
+        return False
+    except (OSError, ValueError) as e:
+        logger.error(f"Invalid positions in {path}, keeping the current positions: {e}")
+        return False
+
+    # Keep the current layout object when nothing changed, so prefetched
+    # plans are not needlessly discarded
+    if layout == define.get_press_links():
+        logger.debug(f"Positions in {path} are unchanged")
+        return False
+
+    check_overlaps(layout)
+    define.set_press_links(layout)
+    logger.info(f"Positions reloaded from {path}")
+    return True
+
+
+async def watch_positions(path: Optional[str] = None, poll_interval: float = POLL_INTERVAL,
+                          use_inotify: bool = True) -> None:
+    """
+    Reload the positions file whenever it changes, until cancelled.
+
+    Meant to run as a background task of the automation loop.
+
+    Args:
+        path: Positions file, defaults to POSITIONS_FILE
+        poll_interval: How often to check the file when inotify is not used (in seconds)
+        use_inotify: Use inotify when available instead of polling
+    """
+    # asyncio is imported on first use to keep this module cheap to import
+    import asyncio
+
+    path = path or POSITIONS_FILE
+    loop = asyncio.get_running_loop()
+
+    watch = None
+    if use_inotify:
+        try:
+            watch = InotifyWatch(path)
+        except OSError as e:
+            logger.info(f"Polling {path} for changes, inotify is unavailable: {e}")
+
+    if watch is None:
+        await _poll_positions(path, poll_interval)
+        return
+
+    changed = asyncio.Event()
+
+    def on_readable() -> None:
+        # The descriptor stays readable until its events are read, so they
+        # are consumed here; leaving them would call this in a busy loop
+        if watch.read_events():
+            changed.set()
+
+    loop.add_reader(watch.fileno(), on_readable)
+    logger.info(f"Watching {path} for changes")
+    try:
+        while True:
+            await changed.wait()
+            # Let a burst of writes finish, then handle it as one change
+            await asyncio.sleep(SETTLE_DELAY)
+            changed.clear()
+            reload_positions(path)
+    finally:
+        loop.remove_reader(watch.fileno())
+        watch.close()
+
+
+async def _poll_positions(path: str, poll_interval: float) -> None:
+    """
+    Reload the positions file when its metadata changes, until cancelled.
+
+    Args:
+        path: Positions file
+        poll_interval: How often to check the file (in seconds)
+    """
+    import asyncio
+
+    signature = file_signature(path)
+    while True:
+        await asyncio.sleep(poll_interval)
+        current = file_signature(path)
+        if current != signature:
+            signature = current
+            # Give the writer time to finish before reading
+            await asyncio.sleep(SETTLE_DELAY)
+            signature = file_signature(path)
+            if signature is not None:
+                reload_positions(path)
@@ -0,0 +1,195 @@
+"""
+Trajectory prefetch pipeline for the Python Auto Movement application.
+This module precomputes upcoming actions on a worker thread so the executor
+only has to stream ready-made points to the mouse.
+"""
+import logging
+import queue
+import threading
+from typing import TYPE_CHECKING, Callable, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from regions import ElementLayout
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Number of planned actions kept ready ahead of the executor
+DEFAULT_PREFETCH_DEPTH = 2
+
+# How often a worker with a full queue checks for room again (in seconds);
+# a stop request wakes it immediately
+PUT_RETRY_INTERVAL = 0.05
+
+
+class PlannedMove(NamedTuple):
+    """A single mouse move with its precomputed trajectory."""
+    start_pos: Tuple[int, int]
+    end_pos: Tuple[int, int]
+    duration: float
+    # (N, 2) int array of positions, None when start and end are the same
+    trajectory: Optional['np.ndarray']
+    # (N,) offsets of each position from the start of the move (in seconds)
+    step_times: Optional['np.ndarray'] = None
+    # Steps dropped from the trajectory because they repeated the previous pixel
+    saved_steps: int = 0
+
+
+class ActionStep(NamedTuple):
+    """One step of an action: an optional pause, a move and an optional click."""
+    label: str
+    move: PlannedMove
+    click: bool = False
+    delay: float = 0.0  # Wait before the move, e.g. for a sub-menu to appear
+    target: Optional[str] = None  # Name of the element the click is meant for
+
+
+class ActionPlan(NamedTuple):
+    """A complete action ready to be executed."""
+    name: str
+    steps: List[ActionStep]
+    # Element positions the targets were drawn from, None if the plan has no targets
+    layout: Optional['ElementLayout'] = None
+
+    @property
+    def end_pos(self) -> Tuple[int, int]:
+        """Position of the mouse once the action has been executed."""
+        return self.steps[-1].move.end_pos
+
+
+class TrajectoryPrefetcher:
+    """
+    Producer/consumer pipeline of planned actions.
+
+    A daemon worker thread calls the planner with the position where the
+    previous plan ends and puts the result in a bounded queue. The worker
+    waits while the queue is full, so it works during the executor's idle
+    sleep and never runs far ahead.
+
+    Stopping never waits for the worker: it is told to exit and its queued
+    plans are dropped, and a plan it finishes afterwards is discarded. This
+    keeps stop and reset cheap enough to call from the event loop.
+    """
+
+    def __init__(self, planner: Callable[[Tuple[int, int]], ActionPlan],
+                 start_pos: Tuple[int, int], depth: int = DEFAULT_PREFETCH_DEPTH):
+        """
+        Initialize the pipeline without starting the worker.
+
+        Args:
+            planner: Function building the next ActionPlan from a start position
+            start_pos: Mouse position the first plan starts from
+            depth: Maximum number of plans kept ready in the queue
+        """
+        self.planner = planner
+        self.depth = depth
+        self._next_start = start_pos
+        self._queue: "queue.Queue[ActionPlan]" = queue.Queue(maxsize=depth)
+        # Stop event of the current worker; every worker gets its own, so a
+        # worker told to stop never sees the flag cleared by a restart
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Held while queueing a plan and while stopping, so no plan of a
+        # stopped worker is queued after the drain
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        if self._thread is not None and self._thread.is_alive() and not self._stop.is_set():
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._next_start, self._stop),
+                                        name='trajectory-prefetch', daemon=True)
+        self._thread.start()
+        logger.info(f"Trajectory prefetch started with depth {self.depth}")
+
+    def stop(self) -> None:
+        """Tell the worker thread to exit and drop any queued plans, without waiting for it."""
+        with self._lock:
+            self._stop.set()
+            self._drain()
+        self._thread = None
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the worker thread and wait for it to exit, e.g. at shutdown.
+
+        Args:
+            timeout: Maximum time to wait (in seconds), None to wait until it exits
+        """
+        thread = self._thread
+        self.stop()
+        if thread is not None:
+            thread.join(timeout)
+
+    def get(self, timeout: Optional[float] = None) -> ActionPlan:
+        """
+        Take the next ready plan, waiting for the worker if necessary.
+
+        Args:
+            timeout: Maximum time to wait (in seconds), None to wait forever
+
+        Returns:
+            The next ActionPlan
+
+        Raises:
+            queue.Empty: If no plan became ready within the timeout
+        """
+        return self._queue.get(timeout=timeout)
+
+    def reset(self, start_pos: Tuple[int, int]) -> None:
+        """
+        Discard queued plans and restart planning from a new position.
+
+        Used when the mouse is found somewhere other than where the plans expect.
+        A plan the old worker is still computing is discarded when it finishes.
+
+        Args:
+            start_pos: Current mouse position
+        """
+        was_running = self._thread is not None
+        self.stop()
+        self._next_start = start_pos
+        if was_running:
+            self.start()
+
+    def _drain(self) -> None:
+        """Remove every queued plan without blocking."""
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _run(self, start_pos: Tuple[int, int], stop: threading.Event) -> None:
+        """
+        Worker loop: plan actions and queue them until stopped.
+
+        Args:
+            start_pos: Mouse position the first plan starts from
+            stop: Event set when this worker must exit
+        """
+        while not stop.is_set():
+            try:
+                plan = self.planner(start_pos)
+            except Exception as e:
+                logger.error(f"Error while prefetching action: {e}", exc_info=True)
+                stop.wait(1)
+                continue
+
+            # Wait for room in the queue; a stop request ends the wait at once
+            while not stop.is_set():
+                with self._lock:
+                    if stop.is_set():
+                        return
+                    try:
+                        self._queue.put_nowait(plan)
+                    except queue.Full:
+                        pass
+                    else:
+                        start_pos = plan.end_pos
+                        self._next_start = start_pos
+                        break
+                stop.wait(PUT_RETRY_INTERVAL)
@@ -0,0 +1,72 @@
+"""
+Random number source for the Python Auto Movement application.
+This module holds the NumPy generator every random draw comes from, so a
+single seed makes planning, benchmarks and simulations reproducible.
+"""
+import logging
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Generator shared by all planning code, created on first use
+_generator: Optional['np.random.Generator'] = None
+_lock = threading.Lock()
+
+
+def get_generator() -> 'np.random.Generator':
+    """
+    Get the shared random generator, creating an unseeded one on first use.
+
+    NumPy generators lock around each draw, so the prefetch worker and the
+    executor can share it safely.
+
+    Returns:
+        The shared generator
+    """
+    global _generator
+    if _generator is None:
+        with _lock:
+            if _generator is None:
+                # NumPy is imported on first use to keep this module cheap to import
+                import numpy as np
+                _generator = np.random.default_rng()
+    return _generator
+
+
+def seed(value: Optional[int]) -> 'np.random.Generator':
+    """
+    Replace the shared generator with a freshly seeded one.
+
+    Args:
+        value: Seed for the generator, or None for fresh OS entropy
+
+    Returns:
+        The new generator
+    """
+    import numpy as np
+
+    generator = np.random.default_rng(value)
+    set_generator(generator)
+    return generator
+
+
+def set_generator(generator: 'np.random.Generator') -> Optional['np.random.Generator']:
+    """
+    Replace the shared generator.
+
+    Args:
+        generator: The generator to draw from from now on
+
+    Returns:
+        The previous generator, which may be None if none was created yet
+    """
+    global _generator
+    with _lock:
+        previous = _generator
+        _generator = generator
+    return previous
@@ -0,0 +1,378 @@
+"""
+UI region model for the Python Auto Movement application.
+This module compiles the nested element dictionaries of define.py and
+positions.json into compact objects, so hot paths read plain attributes
+instead of repeated dictionary lookups, and target points can be sampled
+in batches.
+"""
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from random_source import get_generator
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from spatial_index import GridIndex
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class Region:
+    """Axis-aligned rectangle of screen pixels, with inclusive bounds."""
+
+    __slots__ = ('x_start', 'x_end', 'y_start', 'y_end')
+
+    def __init__(self, x_start: int, x_end: int, y_start: int, y_end: int):
+        """
+        Initialize the region.
+
+        Args:
+            x_start: Leftmost pixel column
+            x_end: Rightmost pixel column, inclusive
+            y_start: Topmost pixel row
+            y_end: Bottom pixel row, inclusive
+
+        Raises:
+            ValueError: If an end lies before its start
+        """
+        if x_end < x_start or y_end < y_start:
+            raise ValueError(f"Empty region x={x_start}..{x_end}, y={y_start}..{y_end}")
+        self.x_start = int(x_start)
+        self.x_end = int(x_end)
+        self.y_start = int(y_start)
+        self.y_end = int(y_end)
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """Bounds as (x_start, x_end, y_start, y_end)."""
+        return self.x_start, self.x_end, self.y_start, self.y_end
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        """Central pixel of the region."""
+        return (self.x_start + self.x_end) // 2, (self.y_start + self.y_end) // 2
+
+    def contains(self, x: int, y: int) -> bool:
+        """
+        Check whether a point lies inside the region.
+
+        Args:
+            x: The x-coordinate of the point
+            y: The y-coordinate of the point
+
+        Returns:
+            True if the point is inside, bounds included
+        """
+        return self.x_start <= x <= self.x_end and self.y_start <= y <= self.y_end
+
+    def overlaps(self, other: 'Region') -> bool:
+        """
+        Check whether two regions share at least one pixel.
+
+        Args:
+            other: The region to compare with
+
+        Returns:
+            True if the regions overlap
+        """
+        return (self.x_start <= other.x_end and other.x_start <= self.x_end
+                and self.y_start <= other.y_end and other.y_start <= self.y_end)
+
+    def random_point(self) -> Tuple[int, int]:
+        """
+        Pick a uniformly random point inside the region.
+
+        Returns:
+            Point (x, y) inside the region
+        """
+        x, y = get_generator().integers((self.x_start, self.y_start), (self.x_end + 1, self.y_end + 1)).tolist()
+        return x, y
+
+    def sample(self, count: int) -> 'np.ndarray':
+        """
+        Pick many uniformly random points inside the region in one draw.
+
+        Args:
+            count: Number of points
+
+        Returns:
+            Integer array of shape (count, 2) with the points
+        """
+        return get_generator().integers((self.x_start, self.y_start), (self.x_end + 1, self.y_end + 1),
+                                        size=(count, 2))
+
+    def to_dict(self) -> Dict[str, Dict[str, int]]:
+        """Convert to the width/height dictionary format of positions.json."""
+        return {
+            'width': {'start': self.x_start, 'end': self.x_end},
+            'height': {'start': self.y_start, 'end': self.y_end},
+        }
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Region) and self.bounds == other.bounds
+
+    def __hash__(self) -> int:
+        return hash(self.bounds)
+
+    def __repr__(self) -> str:
+        return f"Region(x={self.x_start}..{self.x_end}, y={self.y_start}..{self.y_end})"
+
+
+class Element(Region):
+    """A named clickable UI element, with its sub-menu items as children."""
+
+    __slots__ = ('name', 'children', 'parent')
+
+    def __init__(self, name: str, x_start: int, x_end: int, y_start: int, y_end: int,
+                 children: Sequence['Element'] = ()):
+        """
+        Initialize the element.
+
+        Args:
+            name: Name of the element, unique within a layout
+            x_start: Leftmost pixel column
+            x_end: Rightmost pixel column, inclusive
+            y_start: Topmost pixel row
+            y_end: Bottom pixel row, inclusive
+            children: Sub-menu items of the element
+        """
+        super().__init__(x_start, x_end, y_start, y_end)
+        self.name = name
+        self.children: Tuple[Element, ...] = tuple(children)
+        self.parent: Optional[Element] = None
+        for child in self.children:
+            child.parent = self
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], default_name: str) -> 'Element':
+        """
+        Build an element from the dictionary format of define.py and positions.json.
+
+        Args:
+            data: Dictionary with 'width' and 'height' ranges and optional 'name' and 'sub_menu'
+            default_name: Name used when the dictionary has none
+
+        Returns:
+            The element with its sub-menu items
+
+        Raises:
+            ValueError: If a range is missing or malformed
+        """
+        name = data.get('name', default_name)
+        try:
+            width, height = data['width'], data['height']
+            bounds = (width['start'], width['end'], height['start'], height['end'])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Element {name} has no valid width/height range: {e}")
+
+        children = [cls.from_dict(item, f'sub_item_{i + 1}')
+                    for i, item in enumerate(data.get('sub_menu') or [])]
+        return cls(name, *bounds, children=children)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the dictionary format of positions.json."""
+        data: Dict[str, Any] = {'name': self.name}
+        data.update(super().to_dict())
+        if self.children:
+            data['sub_menu'] = [child.to_dict() for child in self.children]
+        return data
+
+    def __eq__(self, other: object) -> bool:
+        return (isinstance(other, Element) and self.name == other.name and self.bounds == other.bounds
+                and self.children == other.children)
+
+    def __hash__(self) -> int:
+        return hash((self.name, self.bounds))
+
+    def __repr__(self) -> str:
+        return (f"Element({self.name!r}, x={self.x_start}..{self.x_end}, y={self.y_start}..{self.y_end}, "
+                f"children={len(self.children)})")
+
+
+class ElementLayout:
+    """
+    The clickable elements of the page, in their configured order.
+
+    Behaves like a read-only list of top-level elements. Every element and
+    sub-menu item is also packed into one integer array of bounds, built on
+    first use, for batch operations.
+    """
+
+    __slots__ = ('elements', 'flat', 'top_indices', '_by_name', '_bounds', '_index')
+
+    def __init__(self, elements: Sequence[Element]):
+        """
+        Initialize the layout.
+
+        Args:
+            elements: Top-level elements, in order
+        """
+        self.elements: Tuple[Element, ...] = tuple(elements)
+        # Every element followed by its sub-menu items, depth first, and
+        # the position of each top-level element in that order
+        flat: List[Element] = []
+        top_indices: List[int] = []
+        for element in self.elements:
+            top_indices.append(len(flat))
+            flat.append(element)
+            flat.extend(element.children)
+        self.flat: Tuple[Element, ...] = tuple(flat)
+        self.top_indices: Tuple[int, ...] = tuple(top_indices)
+        self._by_name = {item.name: item for item in self.flat}
+        self._bounds = None
+        self._index = None
+
+    @classmethod
+    def from_dicts(cls, data: Union[Sequence[Dict[str, Any]], Dict[str, Dict[str, Any]]]) -> 'ElementLayout':
+        """
+        Build a layout from element dictionaries.
+
+        Args:
+            data: List of element dictionaries, or the name-keyed
+                dictionary stored in positions.json
+
+        Returns:
+            The compiled layout
+
+        Raises:
+            ValueError: If an element is malformed
+        """
+        if isinstance(data, dict):
+            data = [dict(value, name=value.get('name', key)) for key, value in data.items()]
+        return cls([Element.from_dict(item, f'Link {i}') for i, item in enumerate(data)])
+
+    def to_dicts(self) -> Dict[str, Dict[str, Any]]:
+        """Convert to the name-keyed dictionary format of positions.json."""
+        return {element.name: element.to_dict() for element in self.elements}
+
+    def get(self, name: str) -> Optional[Element]:
+        """
+        Find an element or sub-menu item by name.
+
+        Args:
+            name: Name of the element
+
+        Returns:
+            The element, or None if there is none with that name
+        """
+        return self._by_name.get(name)
+
+    @property
+    def index(self) -> 'GridIndex':
+        """Grid spatial index over flat, built on first use."""
+        if self._index is None:
+            from spatial_index import GridIndex
+
+            self._index = GridIndex(self.flat)
+        return self._index
+
+    def element_at(self, x: int, y: int) -> Optional[Element]:
+        """
+        Find the element, or sub-menu item, containing a point.
+
+        Args:
+            x: The x-coordinate of the point
+            y: The y-coordinate of the point
+
+        Returns:
+            The first element containing the point in flat order, None if there is none
+        """
+        index = self.index.lookup(x, y)
+        return self.flat[index] if index >= 0 else None
+
+    def elements_along(self, points: 'np.ndarray') -> List[Optional[Element]]:
+        """
+        Find the element containing each point of a trajectory.
+
+        Args:
+            points: Integer array of shape (N, 2)
+
+        Returns:
+            The element containing each point, None where there is none
+        """
+        return [self.flat[index] if index >= 0 else None for index in self.index.lookup_many(points).tolist()]
+
+    def entries(self, points: 'np.ndarray') -> Dict[str, int]:
+        """
+        Count how often a path enters each element.
+
+        Args:
+            points: Integer array of shape (N, 2) with consecutive positions
+
+        Returns:
+            Dictionary from element name to the number of entries
+        """
+        return {self.flat[index].name: count for index, count in self.index.entries(points).items()}
+
+    def overlaps(self) -> List[Tuple[Element, Element]]:
+        """
+        Find every pair of elements sharing at least one pixel.
+
+        Returns:
+            List of overlapping (element, element) pairs in flat order
+        """
+        return [(self.flat[i], self.flat[j]) for i, j in self.index.overlapping_pairs()]
+
+    @property
+    def bounds(self) -> 'np.ndarray':
+        """Integer array of shape (len(flat), 4) with the bounds of every element, as in Region.bounds."""
+        if self._bounds is None:
+            import numpy as np
+
+            bounds = np.array([item.bounds for item in self.flat], dtype=np.int64).reshape(-1, 4)
+            bounds.setflags(write=False)
+            self._bounds = bounds
+        return self._bounds
+
+    def sample(self, count: int, indices: Optional[Sequence[int]] = None) -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        Pick random target points in random elements in one draw.
+
+        Args:
+            count: Number of points
+            indices: Indices into flat to choose from, defaults to the top-level elements
+
+        Returns:
+            Tuple of (indices into flat of shape (count,), integer points of shape (count, 2))
+        """
+        import numpy as np
+
+        rng = get_generator()
+        if indices is None:
+            indices = self.top_indices
+        chosen = np.asarray(indices)[rng.integers(len(indices), size=count)]
+        bounds = self.bounds[chosen]
+        points = rng.integers(bounds[:, [0, 2]], bounds[:, [1, 3]] + 1)
+        return chosen, points
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def __getitem__(self, index: int) -> Element:
+        return self.elements[index]
+
+    def __iter__(self) -> Iterator[Element]:
+        return iter(self.elements)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ElementLayout) and self.elements == other.elements
+
+    def __repr__(self) -> str:
+        return f"ElementLayout({[element.name for element in self.elements]})"
+
+
+def as_layout(elements: Union[ElementLayout, Sequence[Dict[str, Any]], Dict[str, Dict[str, Any]]]) -> ElementLayout:
+    """
+    Convert element dictionaries to a layout, passing layouts through.
+
+    Args:
+        elements: A layout, a list of element dictionaries or a name-keyed dictionary
+
+    Returns:
+        The compiled layout
+    """
+    if isinstance(elements, ElementLayout):
+        return elements
+    return ElementLayout.from_dicts(elements)
@@ -0,0 +1,322 @@
+"""
+Step scheduler for the Python Auto Movement application.
+This module paces mouse steps against absolute monotonic deadlines so a move
+takes the duration it was asked for, regardless of how long each step costs.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import (TYPE_CHECKING, Any, Awaitable, Callable, Coroutine, Deque, Dict, List, NamedTuple, Optional,
+                    Sequence, Tuple)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Remaining time below which the scheduler stops sleeping and spins (in seconds)
+DEFAULT_SPIN_THRESHOLD = 0.001
+
+# Stated tolerance between the requested and actual duration of a move (in seconds)
+DEFAULT_TOLERANCE = 0.01
+
+# Number of recent moves kept for timing statistics
+DEFAULT_HISTORY_SIZE = 1000
+
+# Points of a buffered backend due within this long of each other are sent
+# in one flush (in seconds). One frame at 60 Hz: the screen shows at most one
+# pointer position per frame, and grouping halves the writes of a typical move.
+DEFAULT_FLUSH_INTERVAL = 1 / 60
+
+
+class MoveTiming(NamedTuple):
+    """Timing record of one scheduled move."""
+    requested: float
+    actual: float
+    steps: int
+    skipped: int
+    cancelled: bool = False
+
+    @property
+    def error(self) -> float:
+        """Actual minus requested duration (in seconds), positive when late."""
+        return self.actual - self.requested
+
+
+def jittered_step_times(count: int, duration: float, jitter: float = 0.1,
+                        uniform: Optional['np.ndarray'] = None) -> 'np.ndarray':
+    """
+    Build the time offset of every step of a move.
+
+    Each interval gets a small random variation to look natural, and the
+    offsets are rescaled so the last step still lands exactly on the duration.
+
+    Args:
+        count: Number of points in the move
+        duration: The duration for the move (in seconds)
+        jitter: Relative variation applied to each interval
+        uniform: Optional (count - 1,) array of uniform draws in [0, 1),
+            drawn from the shared generator if not given
+
+    Returns:
+        Array of shape (count,) with offsets from 0 to duration
+    """
+    # NumPy is imported on first use to keep this module cheap to import
+    import numpy as np
+
+    if count < 2:
+        return np.zeros(count)
+    if uniform is None:
+        from random_source import get_generator
+        uniform = get_generator().random(count - 1)
+    intervals = 1 - jitter + uniform * (2 * jitter)
+    offsets = np.concatenate(([0.0], np.cumsum(intervals)))
+    return offsets * (duration / offsets[-1])
+
+
+def run_sync(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Run a coroutine that never suspends to completion without an event loop.
+
+    Lets blocking callers share the implementation of a coroutine whose waits
+    block instead of awaiting the event loop.
+
+    Args:
+        coroutine: Coroutine that only awaits coroutines which return without suspending
+
+    Returns:
+        The value returned by the coroutine
+
+    Raises:
+        RuntimeError: If the coroutine suspended, i.e. it needs an event loop
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("Coroutine suspended outside an event loop")
+
+
+class StepScheduler:
+    """
+    Deadline-based scheduler for the steps of a move.
+
+    Every step has an absolute deadline on the monotonic clock. The scheduler
+    sleeps coarsely until just before the deadline, then spins for the final
+    sub-millisecond. When it falls behind, intermediate steps whose successor
+    is already due are skipped so the move catches up instead of overrunning.
+    """
+
+    def __init__(self, spin_threshold: float = DEFAULT_SPIN_THRESHOLD,
+                 history_size: int = DEFAULT_HISTORY_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 async_sleep: Optional[Callable[[float], Awaitable[None]]] = None,
+                 on_step: Optional[Callable[[float], None]] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            spin_threshold: Remaining time below which the scheduler spins (in seconds)
+            history_size: Number of recent moves kept for timing statistics
+            flush_interval: Points of a buffered backend due within this long
+                of each other are sent in one flush (in seconds)
+            clock: Monotonic clock returning seconds
+            sleep: Sleep function taking seconds
+            async_sleep: Coroutine function sleeping for seconds, used by run_async;
+                defaults to asyncio.sleep
+            on_step: Optional function called with how late each step, or each
+                flush of a buffered backend, was released after its deadline
+                (in seconds), e.g. for metrics
+        """
+        self.spin_threshold = spin_threshold
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.async_sleep = async_sleep
+        self.on_step = on_step
+        self.history: Deque[MoveTiming] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    def wait_until(self, deadline: float, cancel: Optional[Any] = None) -> bool:
+        """
+        Block until the monotonic clock reaches the deadline.
+
+        Args:
+            deadline: Absolute time on the scheduler's clock
+            cancel: Optional event; the coarse sleep waits on it so a stop
+                request interrupts the wait immediately
+
+        Returns:
+            True when the deadline was reached, False if cancelled
+        """
+        remaining = deadline - self.clock()
+        if remaining > self.spin_threshold:
+            if cancel is None:
+                self.sleep(remaining - self.spin_threshold)
+            elif cancel.wait(remaining - self.spin_threshold):
+                return False
+        while self.clock() < deadline:
+            pass
+        return True
+
+    def run(self, points: List[Tuple[int, int]], step_times: Sequence[float],
+            emit: Callable[[int, int], None],
+            flush: Optional[Callable[[], None]] = None,
+            cancel: Optional[Any] = None) -> MoveTiming:
+        """
+        Emit each point at its deadline.
+
+        The first point is emitted immediately and the last point is never skipped.
+        With a flush function, each point is queued by emit ahead of its
+        deadline, and flush sends every point due within flush_interval of
+        the first queued one in a single write, on the deadline of the last
+        of them; the last point of the move is always sent on its own
+        deadline. With a cancel
+        event, the move stops within one step once the event is set.
+
+        Args:
+            points: Positions to emit, in order
+            step_times: Offset of each point from the start of the move (in seconds)
+            emit: Function called with the x and y of each emitted point
+            flush: Optional function sending the queued point, for buffered backends
+            cancel: Optional event (threading or multiprocessing) that cancels the move
+
+        Returns:
+            Timing record of the move
+        """
+        async def wait(deadline: float) -> bool:
+            return self.wait_until(deadline, cancel)
+
+        return run_sync(self._run(points, step_times, emit, flush, wait))
+
+    async def wait_until_async(self, deadline: float) -> None:
+        """
+        Wait without blocking the event loop until the clock reaches the deadline.
+
+        Args:
+            deadline: Absolute time on the scheduler's clock
+        """
+        remaining = deadline - self.clock()
+        if remaining > self.spin_threshold:
+            if self.async_sleep is None:
+                # asyncio is imported on first use to keep this module cheap to import
+                import asyncio
+                self.async_sleep = asyncio.sleep
+            await self.async_sleep(remaining - self.spin_threshold)
+        while self.clock() < deadline:
+            pass
+
+    async def run_async(self, points: List[Tuple[int, int]], step_times: Sequence[float],
+                        emit: Callable[[int, int], None],
+                        flush: Optional[Callable[[], None]] = None) -> MoveTiming:
+        """
+        Emit each point at its deadline from a coroutine.
+
+        Behaves like run, but the coarse waits yield to the event loop, so
+        other tasks keep running during a move and cancelling the task stops
+        the move at the current step.
+
+        Args:
+            points: Positions to emit, in order
+            step_times: Offset of each point from the start of the move (in seconds)
+            emit: Function called with the x and y of each emitted point
+            flush: Optional function sending the queued point, for buffered backends
+
+        Returns:
+            Timing record of the move
+        """
+        async def wait(deadline: float) -> bool:
+            await self.wait_until_async(deadline)
+            return True
+
+        return await self._run(points, step_times, emit, flush, wait)
+
+    async def _run(self, points: List[Tuple[int, int]], step_times: Sequence[float],
+                   emit: Callable[[int, int], None], flush: Optional[Callable[[], None]],
+                   wait: Callable[[float], Awaitable[bool]]) -> MoveTiming:
+        """Emit each point at its deadline, waiting with a function that returns False when cancelled."""
+        step_times = list(step_times)
+        last = len(points) - 1
+        skipped = 0
+        cancelled = False
+        on_step = self.on_step
+        # End of the current flush group, while points are queued
+        group_end: Optional[float] = None
+
+        start = self.clock()
+        deadlines = [start + offset for offset in step_times]
+
+        for i, (x, y) in enumerate(points):
+            # Skip this step if the next one is already due
+            if i < last and self.clock() >= deadlines[i + 1]:
+                skipped += 1
+                continue
+
+            # Buffered backends queue the point before the wait and send it
+            # after, together with the other points of its flush group
+            if flush is not None:
+                emit(x, y)
+                if group_end is None:
+                    group_end = deadlines[i] + self.flush_interval
+                if i < last and deadlines[i + 1] <= group_end:
+                    continue
+                group_end = None
+            if not await wait(deadlines[i]):
+                cancelled = True
+                break
+            if on_step is not None:
+                on_step(self.clock() - deadlines[i])
+            if flush is None:
+                emit(x, y)
+            else:
+                flush()
+
+        requested = step_times[-1] if step_times else 0.0
+        timing = MoveTiming(requested, self.clock() - start, len(points), skipped, cancelled)
+        return self._record(timing)
+
+    def _record(self, timing: MoveTiming) -> MoveTiming:
+        """Keep the timing of a completed move for the statistics."""
+        # A cancelled move never reaches its requested duration, so it is not timed
+        if not timing.cancelled:
+            with self._lock:
+                self.history.append(timing)
+
+        if timing.skipped:
+            logger.debug("Scheduler skipped %d of %d steps to stay on time", timing.skipped, timing.steps)
+        return timing
+
+    def stats(self, tolerance: float = DEFAULT_TOLERANCE) -> Dict[str, Any]:
+        """
+        Summarize the timing error of recent moves.
+
+        Args:
+            tolerance: Allowed absolute error between requested and actual duration (in seconds)
+
+        Returns:
+            Dictionary with the number of moves, mean/max/p99 error, skipped
+            steps and the fraction of moves within tolerance
+        """
+        import numpy as np
+
+        with self._lock:
+            history = list(self.history)
+
+        if not history:
+            return {'moves': 0, 'tolerance': tolerance}
+
+        errors = np.array([timing.error for timing in history])
+        return {
+            'moves': len(history),
+            'tolerance': tolerance,
+            'mean_error': float(np.mean(errors)),
+            'max_abs_error': float(np.max(np.abs(errors))),
+            'p99_abs_error': float(np.percentile(np.abs(errors), 99)),
+            'skipped_steps': sum(timing.skipped for timing in history),
+            'within_tolerance': float(np.mean(np.abs(errors) <= tolerance)),
+        }
@@ -0,0 +1,297 @@
+"""
+Virtual-clock simulation for the Python Auto Movement application.
+This module runs the real automation schedule against a virtual clock and a
+recording backend, so hours of schedule run in seconds and leave a complete
+event timeline for analysis and regression checks.
+
+The clock only advances when the automation waits: every sleep, step
+deadline and idle period between actions jumps straight to its end. Actions
+are planned on the event loop instead of a prefetch thread, so a seeded run
+always produces the same timeline.
+
+Usage:
+    python simulation.py --hours 24 --seed 1
+    python simulation.py --hours 2 --output timeline.csv --summary summary.json
+"""
+import argparse
+import asyncio
+import contextlib
+import csv
+import json
+import logging
+import selectors
+import sys
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import define
+import mouse_mover
+import random_source
+from action_scheduler import ActionScheduler
+from backends import PointerEvent, RecordingBackend
+from regions import as_layout
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seed used unless another one is given
+DEFAULT_SEED = 1
+
+# Amount added to every virtual sleep so float rounding never leaves the
+# clock just short of a deadline (in seconds)
+CLOCK_RESOLUTION = 1e-9
+
+# Pause between events above which a new action is assumed to start (in seconds)
+ACTION_GAP = 10.0
+
+
+class VirtualClock:
+    """Clock that only advances when sleeping, so deadlines are reached instantly."""
+
+    def __init__(self, start: float = 0.0):
+        """
+        Initialize the clock.
+
+        Args:
+            start: Initial time (in seconds)
+        """
+        self.now = start
+
+    def time(self) -> float:
+        """Current virtual time (in seconds)."""
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """Advance the clock instead of sleeping."""
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        """
+        Move the clock forward.
+
+        Args:
+            seconds: Time to advance by (in seconds), negative values are ignored
+        """
+        self.now += max(seconds, 0.0) + CLOCK_RESOLUTION
+
+
+class VirtualSelector(selectors.DefaultSelector):
+    """Selector that advances a virtual clock instead of blocking."""
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__()
+        self.clock = clock
+
+    def select(self, timeout: Optional[float] = None) -> List[Tuple[selectors.SelectorKey, int]]:
+        ready = super().select(0)
+        if ready or timeout == 0:
+            return ready
+        if timeout is None:
+            raise RuntimeError("Simulation has nothing scheduled and would wait forever")
+        self.clock.advance(timeout)
+        return ready
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop running on a virtual clock.
+
+    Whenever no callback is ready, the loop jumps the clock to the next
+    scheduled callback, so asyncio sleeps and timeouts take no real time.
+    """
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__(VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self) -> float:
+        return self.clock.time()
+
+
+class SimulationResult(NamedTuple):
+    """Outcome of a simulated run."""
+    seed: int
+    duration: float  # Simulated time (in seconds)
+    wall_time: float  # Real time the simulation took (in seconds)
+    events: List[PointerEvent]
+
+
+@contextlib.contextmanager
+def simulation_environment(clock: VirtualClock,
+                           start_pos: Tuple[int, int] = (960, 540)) -> Iterator[RecordingBackend]:
+    """
+    Route all output to a recording backend and all waiting to a virtual clock.
+
+    Args:
+        clock: Virtual clock used for every wait and event timestamp
+        start_pos: Initial pointer position
+
+    Yields:
+        The backend recording every pointer event
+    """
+    backend = RecordingBackend(start_pos, clock=clock.time)
+    previous_backend = mouse_mover.set_backend(backend)
+    previous_links = define.set_press_links(define.default_elements)
+    previous_clock = mouse_mover.set_clock(clock.time, clock.sleep, spin_threshold=0.0)
+    try:
+        yield backend
+    finally:
+        mouse_mover.set_clock(*previous_clock)
+        define.set_press_links(previous_links)
+        mouse_mover.set_backend(previous_backend)
+
+
+def simulate(duration: float, seed: int = DEFAULT_SEED,
+             start_pos: Tuple[int, int] = (960, 540)) -> SimulationResult:
+    """
+    Run the automation schedule for a span of virtual time.
+
+    Args:
+        duration: Simulated time to run for (in seconds)
+        seed: Seed for the shared random generator
+        start_pos: Initial pointer position
+
+    Returns:
+        The recorded event timeline, with times in seconds from the start
+    """
+    random_source.seed(seed)
+
+    clock = VirtualClock()
+    loop = VirtualEventLoop(clock)
+    scheduler = ActionScheduler()
+    start = time.perf_counter()
+
+    with simulation_environment(clock, start_pos) as backend:
+        try:
+            loop.call_at(duration, scheduler.stop)
+            loop.run_until_complete(mouse_mover.fiverr_auto_mouse_mover_async(scheduler=scheduler,
+                                                                               prefetch=False))
+        finally:
+            loop.close()
+
+    wall_time = time.perf_counter() - start
+    logger.info(f"Simulated {duration:.0f} seconds in {wall_time:.2f} seconds "
+                f"({len(backend.events)} events)")
+    return SimulationResult(seed, duration, wall_time, backend.events)
+
+
+def split_actions(events: List[PointerEvent], gap: float = ACTION_GAP) -> List[List[PointerEvent]]:
+    """
+    Group a timeline into actions separated by idle periods.
+
+    Args:
+        events: Recorded events, in time order
+        gap: Pause between events that separates two actions (in seconds)
+
+    Returns:
+        List of actions, each a list of events
+    """
+    actions: List[List[PointerEvent]] = []
+    for event in events:
+        if not actions or event.time - actions[-1][-1].time > gap:
+            actions.append([])
+        actions[-1].append(event)
+    return actions
+
+
+def summarize(result: SimulationResult) -> Dict[str, Any]:
+    """
+    Summarize a simulated timeline.
+
+    Args:
+        result: The simulation to summarize
+
+    Returns:
+        Dictionary with event counts, action durations and idle times
+    """
+    import numpy as np
+
+    actions = split_actions(result.events)
+    moves = np.array([(event.x, event.y) for event in result.events if event.kind == 'move'],
+                     dtype=np.int64).reshape(-1, 2)
+    durations = [action[-1].time - action[0].time for action in actions]
+    idle = [later[0].time - earlier[-1].time for earlier, later in zip(actions, actions[1:])]
+
+    def spread(values: List[float]) -> Dict[str, float]:
+        if not values:
+            return {}
+        return {'min': min(values), 'mean': sum(values) / len(values), 'max': max(values)}
+
+    return {
+        'seed': result.seed,
+        'simulated_seconds': result.duration,
+        'wall_seconds': result.wall_time,
+        'speedup': result.duration / result.wall_time if result.wall_time else None,
+        'events': len(result.events),
+        'moves': len(moves),
+        'clicks': sum(1 for event in result.events if event.kind == 'click'),
+        'actions': len(actions),
+        'action_seconds': spread(durations),
+        'idle_seconds': spread(idle),
+        'active_fraction': sum(durations) / result.duration if result.duration else 0.0,
+        # How often the pointer entered each clickable element, on purpose or in passing
+        'element_entries': as_layout(define.default_elements).entries(moves),
+    }
+
+
+def write_timeline(events: List[PointerEvent], path: str) -> None:
+    """
+    Write an event timeline as CSV.
+
+    Args:
+        events: Recorded events
+        path: Output file path
+    """
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(PointerEvent._fields)
+        for event in events:
+            writer.writerow((f"{event.time:.6f}",) + tuple(event[1:]))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Parse the command line and run a simulation.
+
+    Args:
+        argv: Command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Python Auto Movement virtual-clock simulation")
+    parser.add_argument('--hours', type=float, default=24.0, help="simulated time to run for")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="seed for the random generators")
+    parser.add_argument('--output', help="write the event timeline to this CSV file")
+    parser.add_argument('--summary', help="write the summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    # Per-action log lines would dominate the run time
+    logging.disable(logging.INFO)
+    try:
+        result = simulate(args.hours * 3600, args.seed)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    summary = summarize(result)
+    print(json.dumps(summary, indent=4))
+
+    if args.output:
+        write_timeline(result.events, args.output)
+        logger.info(f"Event timeline saved to {args.output}")
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=4)
+        logger.info(f"Simulation summary saved to {args.summary}")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Spatial index for the Python Auto Movement application.
+This module resolves screen points to the UI regions containing them with a
+uniform grid, one point at a time or for a whole trajectory at once.
+"""
+import logging
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+from regions import Region
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Side of a grid cell (in pixels). Captured regions are about 20 px wide, so
+# a cell rarely holds more than one or two of them.
+DEFAULT_CELL_SIZE = 32
+
+
+class GridIndex:
+    """
+    Uniform grid over a set of regions.
+
+    Every cell lists the regions overlapping it, so a lookup only checks the
+    few candidates of one cell. When regions overlap, the one listed first
+    wins, matching a linear scan in the same order.
+    """
+
+    def __init__(self, regions: Sequence[Region], cell_size: int = DEFAULT_CELL_SIZE):
+        """
+        Build the index.
+
+        Args:
+            regions: Regions to index; lookups return positions in this sequence
+            cell_size: Side of a grid cell (in pixels)
+        """
+        import numpy as np
+
+        self.regions = tuple(regions)
+        self.cell_size = cell_size
+        self.bounds = np.array([region.bounds for region in self.regions], dtype=np.int64).reshape(-1, 4)
+
+        if self.regions:
+            self.x0 = int(self.bounds[:, 0].min())
+            self.y0 = int(self.bounds[:, 2].min())
+            self.cols = int(self.bounds[:, 1].max() - self.x0) // cell_size + 1
+            self.rows = int(self.bounds[:, 3].max() - self.y0) // cell_size + 1
+        else:
+            self.x0 = self.y0 = 0
+            self.cols = self.rows = 0
+
+        # Candidate regions of every cell, in region order
+        self._cells: List[List[Tuple[int, ...]]] = [[() for _ in range(self.cols)] for _ in range(self.rows)]
+        for index, (x_start, x_end, y_start, y_end) in enumerate(self.bounds.tolist()):
+            for row in range((y_start - self.y0) // cell_size, (y_end - self.y0) // cell_size + 1):
+                for col in range((x_start - self.x0) // cell_size, (x_end - self.x0) // cell_size + 1):
+                    self._cells[row][col] += (index,)
+
+        # The same candidates packed into a (rows, cols, depth) array padded
+        # with -1, for batch lookups
+        depth = max((len(cell) for row in self._cells for cell in row), default=0)
+        self.table = np.full((self.rows, self.cols, max(depth, 1)), -1, dtype=np.int64)
+        for row, cells in enumerate(self._cells):
+            for col, cell in enumerate(cells):
+                self.table[row, col, :len(cell)] = cell
+        self._bounds_list = [tuple(b) for b in self.bounds.tolist()]
+
+    def lookup(self, x: int, y: int) -> int:
+        """
+        Find the region containing a point.
+
+        Args:
+            x: The x-coordinate of the point
+            y: The y-coordinate of the point
+
+        Returns:
+            Position of the region in the indexed sequence, -1 if there is none
+        """
+        col = (x - self.x0) // self.cell_size
+        row = (y - self.y0) // self.cell_size
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return -1
+        for index in self._cells[row][col]:
+            x_start, x_end, y_start, y_end = self._bounds_list[index]
+            if x_start <= x <= x_end and y_start <= y <= y_end:
+                return index
+        return -1
+
+    def lookup_many(self, points: 'np.ndarray') -> 'np.ndarray':
+        """
+        Find the region containing each point of a batch, e.g. a whole trajectory.
+
+        Args:
+            points: Integer array of shape (N, 2)
+
+        Returns:
+            Integer array of shape (N,) with region positions, -1 where there is none
+        """
+        import numpy as np
+
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        result = np.full(len(points), -1, dtype=np.int64)
+        if not self.regions or not len(points):
+            return result
+
+        cols = (points[:, 0] - self.x0) // self.cell_size
+        rows = (points[:, 1] - self.y0) // self.cell_size
+        on_grid = (cols >= 0) & (cols < self.cols) & (rows >= 0) & (rows < self.rows)
+
+        candidates = self.table[rows[on_grid], cols[on_grid]]  # (M, depth)
+        bounds = self.bounds[np.maximum(candidates, 0)]  # (M, depth, 4)
+        x = points[on_grid, 0, np.newaxis]
+        y = points[on_grid, 1, np.newaxis]
+        inside = ((candidates >= 0) & (bounds[..., 0] <= x) & (x <= bounds[..., 1])
+                  & (bounds[..., 2] <= y) & (y <= bounds[..., 3]))
+
+        # The first matching candidate wins, like lookup
+        first = np.argmax(inside, axis=1)
+        found = inside[np.arange(len(first)), first]
+        result[np.flatnonzero(on_grid)[found]] = candidates[found, first[found]]
+        return result
+
+    def entries(self, points: 'np.ndarray') -> Dict[int, int]:
+        """
+        Count how often a path enters each region.
+
+        Args:
+            points: Integer array of shape (N, 2) with consecutive positions
+
+        Returns:
+            Dictionary from region position to the number of entries
+        """
+        import numpy as np
+
+        hits = self.lookup_many(points)
+        if not len(hits):
+            return {}
+        # A point enters a region when it is in one and the point before was not in the same one
+        changed = np.concatenate(([True], hits[1:] != hits[:-1]))
+        entered = hits[changed & (hits >= 0)]
+        indices, counts = np.unique(entered, return_counts=True)
+        return dict(zip(indices.tolist(), counts.tolist()))
+
+    def overlapping_pairs(self) -> List[Tuple[int, int]]:
+        """
+        Find every pair of regions sharing at least one pixel.
+
+        Only regions listed in a common cell are compared.
+
+        Returns:
+            Sorted list of (i, j) region positions with i < j
+        """
+        pairs = set()
+        for cells in self._cells:
+            for cell in cells:
+                for n, i in enumerate(cell):
+                    for j in cell[n + 1:]:
+                        if (i, j) not in pairs and self.regions[i].overlaps(self.regions[j]):
+                            pairs.add((i, j))
+        return sorted(pairs)
@@ -0,0 +1,77 @@
+"""
+Tests for the asyncio action scheduler.
+"""
+import asyncio
+
+from action_scheduler import ActionScheduler
+
+
+def run_actions(setup, timeout=2.0):
+    """Run a scheduler until it is stopped, with setup scheduling the actions."""
+    async def main():
+        scheduler = ActionScheduler()
+        setup(scheduler)
+        await asyncio.wait_for(scheduler.run(), timeout)
+
+    asyncio.run(main())
+
+
+def stopper(scheduler):
+    """Action stopping the scheduler."""
+    async def stop():
+        scheduler.stop()
+    return stop
+
+
+def test_due_actions_run_by_priority_then_due_time():
+    order = []
+
+    def action(name):
+        async def run():
+            order.append(name)
+        return run
+
+    def setup(scheduler):
+        scheduler.schedule('low', action('low'), priority=0)
+        scheduler.schedule('high', action('high'), priority=5)
+        scheduler.schedule('middle', action('middle'), priority=1)
+        scheduler.schedule('later', action('later'), delay=0.05, priority=9)
+        scheduler.schedule('stop', stopper(scheduler), delay=0.1)
+
+    run_actions(setup)
+    assert order == ['high', 'middle', 'low', 'later']
+
+
+def test_cancelled_actions_never_run():
+    order = []
+
+    async def record():
+        order.append('kept')
+
+    async def fail():
+        raise AssertionError("cancelled action ran")
+
+    def setup(scheduler):
+        cancelled = scheduler.schedule('cancelled', fail, delay=0.01, priority=5)
+        scheduler.schedule('kept', record, delay=0.01)
+        scheduler.cancel(cancelled)
+        assert [action.name for action in scheduler.pending] == ['kept']
+        scheduler.schedule('stop', stopper(scheduler), delay=0.05)
+
+    run_actions(setup)
+    assert order == ['kept']
+
+
+def test_interval_action_repeats():
+    runs = []
+
+    def setup(scheduler):
+        async def tick():
+            runs.append(1)
+            if len(runs) == 3:
+                scheduler.stop()
+
+        scheduler.schedule('tick', tick, interval=0.01)
+
+    run_actions(setup)
+    assert len(runs) == 3
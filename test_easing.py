@@ -0,0 +1,41 @@
+"""
+Tests for the easing functions.
+"""
+import numpy as np
+import pytest
+
+import define
+from easing import easing_functions, get_easing_function
+
+pytweening = pytest.importorskip('pytweening')
+
+SAMPLES = np.linspace(0.0, 1.0, 101)
+
+
+@pytest.mark.parametrize('name', sorted(easing_functions))
+def test_matches_pytweening(name):
+    expected = np.array([getattr(pytweening, name)(float(t)) for t in SAMPLES])
+    assert np.allclose(easing_functions[name](SAMPLES), expected, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize('name', sorted(easing_functions))
+def test_scalar_input_returns_float(name):
+    value = easing_functions[name](0.3)
+    assert isinstance(value, float)
+    assert value == pytest.approx(getattr(pytweening, name)(0.3), rel=1e-9, abs=1e-12)
+
+
+def test_every_movement_type_is_implemented():
+    assert set(define.mouse_movement_type) <= set(easing_functions)
+
+
+def test_lookup_table_is_close_and_shared():
+    table = get_easing_function('easeInOutCubic', table=True)
+    assert table is get_easing_function('easeInOutCubic', table=True)
+    exact = easing_functions['easeInOutCubic'](SAMPLES)
+    assert np.max(np.abs(table(SAMPLES) - exact)) < 1e-4
+
+
+def test_unknown_name_raises():
+    with pytest.raises(KeyError):
+        get_easing_function('easeSideways')
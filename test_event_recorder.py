@@ -0,0 +1,257 @@
+"""
+Tests for recording pointer events and replaying them.
+"""
+import itertools
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import event_recorder
+import mouse_mover
+from backends import RecordingBackend
+from event_recorder import (EVENT_DTYPE, HEADER_SIZE, SCROLL_UP, EventRecorder, RecorderBackend,
+                            describe, load_events, replay)
+from scheduler import StepScheduler
+
+MS = 1_000_000
+
+
+def tick_clock(step_ns=MS):
+    """Nanosecond clock advancing by a fixed step on every call."""
+    counter = itertools.count(0, step_ns)
+    return lambda: next(counter)
+
+
+class FakeClock:
+    """Clock that only advances when sleeping."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(seconds, 0.0) + 1e-9
+
+
+class BufferedBackend(RecordingBackend):
+    """Recording backend that queues moves until flushed."""
+
+    buffered = True
+
+    def __init__(self, clock):
+        super().__init__(clock=clock)
+        self.pending = []
+
+    def move(self, x, y):
+        self._position = (x, y)
+        self.pending.append((x, y))
+
+    def flush(self):
+        for x, y in self.pending:
+            super().move(x, y)
+        self.pending.clear()
+
+    def close(self):
+        self.flush()
+        self.closed = True
+
+
+class GatedFile:
+    """File wrapper whose writes wait until the gate opens, to stall the writer thread."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.gate = threading.Event()
+
+    def write(self, data):
+        self.gate.wait()
+        return self.inner.write(data)
+
+    def flush(self):
+        self.inner.flush()
+
+    def close(self):
+        self.inner.close()
+
+
+def wait_for_writer(recorder, timeout=5.0):
+    """Wait until the writer thread has taken every stored record."""
+    deadline = time.monotonic() + timeout
+    while recorder.tail < recorder.head and time.monotonic() < deadline:
+        recorder._wake.set()
+        time.sleep(0.001)
+
+
+def events_from(rows):
+    return np.array(rows, dtype=EVENT_DTYPE)
+
+
+def test_recording_round_trip(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    recorder = EventRecorder(path, clock_ns=tick_clock())
+    for i in range(10):
+        recorder.record(i, 2 * i, i % 2)
+    recorder.close()
+
+    events = load_events(path)
+    assert events['time_ns'].tolist() == [i * MS for i in range(10)]
+    assert events['x'].tolist() == list(range(10))
+    assert events['y'].tolist() == list(range(0, 20, 2))
+    assert events['buttons'].tolist() == [i % 2 for i in range(10)]
+
+
+def test_empty_recording_loads(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    EventRecorder(path).close()
+    assert len(load_events(path)) == 0
+
+
+def test_bad_magic_is_rejected(tmp_path):
+    path = tmp_path / 'trace.bin'
+    path.write_bytes(b'NOTTRACE' + bytes(HEADER_SIZE))
+    with pytest.raises(ValueError):
+        load_events(str(path))
+
+    path.write_bytes(b'PAM')
+    with pytest.raises(ValueError):
+        load_events(str(path))
+
+
+def test_truncated_last_record_is_ignored(tmp_path):
+    path = tmp_path / 'trace.bin'
+    recorder = EventRecorder(str(path), clock_ns=tick_clock())
+    for i in range(3):
+        recorder.record(i, i)
+    recorder.close()
+    with open(path, 'ab') as f:
+        f.write(b'\x01\x02\x03\x04\x05')
+
+    assert load_events(str(path))['x'].tolist() == [0, 1, 2]
+
+
+def test_ring_wraps_around_and_counts_drops(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    recorder = EventRecorder(path, capacity=8, chunk_size=4, clock_ns=tick_clock())
+    gated = GatedFile(recorder._file)
+    recorder._file = gated
+
+    # With the writer stalled, only a full ring is kept
+    for i in range(20):
+        recorder.record(i, 0)
+    assert recorder.dropped == 12
+
+    gated.gate.set()
+    wait_for_writer(recorder)
+    assert recorder.tail == 8
+
+    # Six records fill slots 0 to 5, the next four wrap from slot 6 to slot 1
+    for i in range(20, 26):
+        recorder.record(i, 0)
+    wait_for_writer(recorder)
+    for i in range(26, 30):
+        recorder.record(i, 0)
+    recorder.close()
+
+    assert recorder.dropped == 12
+    assert load_events(path)['x'].tolist() == list(range(8)) + list(range(20, 30))
+
+
+def test_recorder_backend_records_clicks_and_scrolls(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    backend = RecorderBackend(RecordingBackend(), EventRecorder(path, clock_ns=tick_clock()))
+    backend.move(10, 20)
+    backend.click('right')
+    backend.scroll(0, 2)
+    backend.close()
+
+    records = [tuple(record) for record in load_events(path)[['x', 'y', 'buttons']].tolist()]
+    assert records == [(10, 20, 0), (10, 20, 0x04), (10, 20, 0),
+                       (10, 20, SCROLL_UP), (10, 20, 0), (10, 20, SCROLL_UP), (10, 20, 0)]
+
+
+def test_buffered_moves_are_stamped_when_flushed(tmp_path):
+    path = str(tmp_path / 'trace.bin')
+    now = [0]
+    backend = RecorderBackend(BufferedBackend(time.monotonic), EventRecorder(path, clock_ns=lambda: now[0]))
+    backend.move(100, 1)
+    now[0] = 5 * MS
+    backend.flush()
+    backend.move(300, 2)
+    now[0] = 9 * MS
+    backend.click()
+    backend.close()
+
+    events = load_events(path)
+    assert events['x'].tolist() == [100, 300, 300, 300]
+    assert events['time_ns'].tolist() == [5 * MS, 9 * MS, 9 * MS, 9 * MS]
+
+
+def test_replay_reproduces_the_recording():
+    events = events_from([
+        (0, 10, 10, 0),
+        (1 * MS, 20, 10, 0),
+        (2 * MS, 20, 10, 0x01),
+        (3 * MS, 20, 10, 0),
+        (4 * MS, 20, 10, SCROLL_UP),
+        (5 * MS, 20, 10, 0),
+        (6 * MS, 30, 15, 0),
+    ])
+    backend = RecordingBackend()
+    report = replay(events, backend, speed=0)
+
+    assert [(e.kind, e.x, e.y, e.button) for e in backend.events] == [
+        ('move', 10, 10, None), ('move', 20, 10, None), ('click', 20, 10, 'left'),
+        ('scroll', 0, 1, None), ('move', 30, 15, None)]
+    assert (report.moves, report.clicks, report.scrolls, report.skipped) == (3, 1, 1, 0)
+    assert describe(events)['clicks'] == 1
+    assert describe(events)['scrolls'] == 1
+
+
+def test_timed_replay_follows_the_speed():
+    clock = FakeClock()
+    scheduler = StepScheduler(spin_threshold=0.0, clock=clock.time, sleep=clock.sleep)
+    events = events_from([(i * 100 * MS, i, 0, 0) for i in range(11)])
+    backend = RecordingBackend(clock=clock.time)
+
+    report = replay(events, backend, speed=2.0, scheduler=scheduler)
+
+    assert report.moves == 11
+    assert report.duration == pytest.approx(0.5, abs=1e-6)
+    times = [event.time for event in backend.events]
+    assert np.allclose(np.diff(times), 0.05, atol=1e-6)
+
+
+def test_replay_stops_when_cancelled():
+    class SetEvent:
+        def wait(self, timeout):
+            return True
+
+    clock = FakeClock()
+    scheduler = StepScheduler(spin_threshold=0.0, clock=clock.time, sleep=clock.sleep)
+    events = events_from([(i * 100 * MS, i, 0, 0) for i in range(5)])
+    backend = RecordingBackend(clock=clock.time)
+
+    report = replay(events, backend, scheduler=scheduler, cancel=SetEvent())
+    assert report.moves == 1
+
+
+def test_worker_exit_records_queued_moves_and_closes_the_backend(tmp_path, monkeypatch):
+    path = str(tmp_path / 'trace.bin')
+    inner = BufferedBackend(time.monotonic)
+    monkeypatch.setattr(event_recorder, 'RECORD_FILE', path)
+    monkeypatch.setattr(mouse_mover, 'backend', inner)
+
+    async def automation(*args, **kwargs):
+        # The worker exits with a move still queued in the backend
+        mouse_mover.get_backend().move(5, 6)
+
+    monkeypatch.setattr(mouse_mover, 'fiverr_auto_mouse_mover_async', automation)
+    mouse_mover.fiverr_auto_mouse_mover()
+
+    assert inner.closed
+    assert [(event.x, event.y) for event in inner.events] == [(5, 6)]
+    assert load_events(path)[['x', 'y']].tolist() == [(5, 6)]
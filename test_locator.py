@@ -0,0 +1,132 @@
+"""
+Tests for locating elements on screenshots by template matching.
+"""
+import numpy as np
+import pytest
+
+from locator import ElementLocator, load_image, locate_positions
+from regions import ElementLayout, Region
+
+# Top left corner of each element on the generated screenshot
+POSITIONS = {'dashboard': (100, 100), 'messages': (420, 60), 'inbox': (250, 300)}
+
+TEMPLATE_SIZE = (40, 64)
+
+
+def make_screenshot(seed=1, height=480, width=640):
+    """Screenshot-like image: flat blocks of random shade with a little pixel noise."""
+    rng = np.random.default_rng(seed)
+    blocks = np.kron(rng.random((height // 8, width // 8)), np.ones((8, 8)))
+    return (blocks * 200 + rng.random((height, width)) * 20).astype(np.float32)
+
+
+def cut(screenshot, x, y):
+    height, width = TEMPLATE_SIZE
+    return screenshot[y:y + height, x:x + width].copy()
+
+
+@pytest.fixture
+def screen():
+    return make_screenshot()
+
+
+@pytest.fixture
+def locator(screen):
+    return ElementLocator({name: cut(screen, x, y) for name, (x, y) in POSITIONS.items()})
+
+
+def record_windows(locator, monkeypatch):
+    """Make the locator list every window it searches."""
+    windows = []
+    search = locator._search
+
+    def recording_search(name, screenshot, pyramid, window):
+        windows.append(window)
+        return search(name, screenshot, pyramid, window)
+
+    monkeypatch.setattr(locator, '_search', recording_search)
+    return windows
+
+
+def corner(match):
+    return match.region.x_start, match.region.y_start
+
+
+def test_relocate_finds_every_element(locator, screen):
+    report = locator.relocate(screen)
+    assert {name: corner(match) for name, match in report.matches.items()} == POSITIONS
+    assert all(match.score > 0.99 for match in report.matches.values())
+
+
+def test_missing_element_is_not_found(screen):
+    other = make_screenshot(seed=2)
+    locator = ElementLocator({'dashboard': cut(other, 100, 100)})
+    assert locator.relocate(screen).matches['dashboard'] is None
+    assert 'dashboard' not in locator.cache
+
+
+def test_second_pass_only_checks_the_cached_positions(locator, screen, monkeypatch):
+    first = locator.relocate(screen)
+
+    def no_search(*args):
+        raise AssertionError("an unchanged screen must not be searched")
+
+    monkeypatch.setattr(locator, '_search', no_search)
+    second = locator.relocate(screen)
+    assert {name: corner(match) for name, match in second.matches.items()} == POSITIONS
+    assert all(second.matches[name].region == match.region for name, match in first.matches.items())
+
+
+def test_shifted_screen_is_found_in_the_neighbourhood(locator, screen, monkeypatch):
+    locator.relocate(screen)
+    shifted = np.roll(screen, (25, -30), axis=(0, 1))
+
+    windows = record_windows(locator, monkeypatch)
+    report = locator.relocate(shifted)
+
+    assert {name: corner(match) for name, match in report.matches.items()} == {
+        name: (x - 30, y + 25) for name, (x, y) in POSITIONS.items()}
+    # One neighbourhood search per element, never the whole screen
+    assert len(windows) == len(POSITIONS)
+    assert (0, 0, screen.shape[1], screen.shape[0]) not in windows
+
+
+def test_cache_keeps_the_best_candidate_not_the_last(screen):
+    x, y = POSITIONS['dashboard']
+    template = cut(screen, x, y)
+    # A slightly degraded copy elsewhere still scores about 0.97
+    rng = np.random.default_rng(5)
+    noise = rng.normal(0.0, 0.25 * template.std(), template.shape)
+    decoy = screen.copy()
+    decoy[400:440, 500:564] = template + noise
+    locator = ElementLocator({'dashboard': template})
+
+    match = locator.relocate(decoy).matches['dashboard']
+    assert corner(match) == (x, y)
+    assert locator.cache['dashboard'] == match.region
+    assert corner(locator.relocate(decoy).matches['dashboard']) == (x, y)
+
+
+def test_seeded_layout_is_searched_first(locator, screen, monkeypatch):
+    layout = ElementLayout.from_dicts({name: Region(x - 5, x + 80, y - 5, y + 30).to_dict()
+                                       for name, (x, y) in POSITIONS.items()})
+    locator.seed(layout)
+
+    windows = record_windows(locator, monkeypatch)
+    report = locator.relocate(screen)
+    assert {name: corner(match) for name, match in report.matches.items()} == POSITIONS
+    assert (0, 0, screen.shape[1], screen.shape[0]) not in windows
+
+
+def test_saved_png_screenshot(tmp_path, screen):
+    image = pytest.importorskip('PIL.Image')
+    templates = tmp_path / 'templates'
+    templates.mkdir()
+    for name, (x, y) in POSITIONS.items():
+        image.fromarray(cut(screen, x, y).astype(np.uint8)).save(templates / f'{name}.png')
+    image.fromarray(screen.astype(np.uint8)).save(tmp_path / 'screen.png')
+
+    elements = [{'name': 'dashboard'}, {'name': 'messages', 'sub_menu': [{'name': 'inbox'}]}]
+    positions = locate_positions(elements, str(templates), load_image(str(tmp_path / 'screen.png')))
+    assert positions['dashboard']['width']['start'] == POSITIONS['dashboard'][0]
+    assert positions['messages']['sub_menu'][0]['height']['start'] == POSITIONS['inbox'][1]
@@ -0,0 +1,179 @@
+"""
+Tests for the position store and the position loading flow.
+"""
+import json
+import os
+
+import pytest
+
+import calibration
+import position_manager as pm
+from regions import Region
+
+ELEMENTS = [
+    {'name': 'dashboard'},
+    {'name': 'messages', 'sub_menu': [{'name': 'inbox'}, {'name': 'sent'}]},
+]
+
+AREAS = {
+    'dashboard': Region(10, 30, 10, 30),
+    'messages': Region(100, 140, 10, 30),
+    'inbox': Region(100, 140, 50, 70),
+    'sent': Region(100, 140, 90, 110),
+}
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    """Run every test in an empty directory on a fixed 1920x1080 screen."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pm, 'screen_resolution', lambda: (1920, 1080))
+    return tmp_path / pm.POSITIONS_FILE
+
+
+def positions_for(names):
+    return calibration.assemble_positions(ELEMENTS, {name: AREAS[name] for name in names})
+
+
+class FakeCaptureSession:
+    """Capture session answering from tables instead of listening to input, one table per session."""
+
+    asked = []
+    rounds = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def capture(self, targets):
+        FakeCaptureSession.asked.append([target.name for target in targets])
+        rounds = FakeCaptureSession.rounds
+        areas = rounds.pop(0) if len(rounds) > 1 else rounds[0]
+        return [areas.get(target.name) for target in targets]
+
+
+@pytest.fixture
+def capture(monkeypatch):
+    monkeypatch.setattr(calibration, 'CaptureSession', FakeCaptureSession)
+    FakeCaptureSession.asked = []
+    FakeCaptureSession.rounds = [AREAS]
+    return FakeCaptureSession
+
+
+def test_profile_name_uses_the_screen_resolution():
+    assert pm.profile_name() == '1920x1080'
+    assert pm.profile_name((800, 600)) == '800x600'
+
+
+def test_save_load_round_trip_keeps_other_profiles(store):
+    small = positions_for(['dashboard'])
+    full = positions_for(AREAS)
+    assert pm.save_positions(small, profile='800x600')
+    assert pm.save_positions(full)
+
+    assert pm.load_positions() == full
+    assert pm.load_positions('800x600') == small
+    document = json.loads(store.read_text())
+    assert document['version'] == pm.SCHEMA_VERSION
+    assert set(document['profiles']) == {'800x600', '1920x1080'}
+
+
+def test_version_1_file_is_read_as_the_default_profile(store):
+    legacy = positions_for(['dashboard'])
+    store.write_text(json.dumps(legacy))
+
+    document = pm.read_store()
+    assert document['profiles'] == {pm.DEFAULT_PROFILE: legacy}
+    assert pm.select_profile(document) == legacy
+    assert pm.select_profile({'version': 2, 'profiles': {}}) is None
+
+
+def test_saving_upgrades_a_version_1_file(store):
+    legacy = positions_for(['dashboard'])
+    store.write_text(json.dumps(legacy))
+    assert pm.save_positions(positions_for(AREAS))
+
+    profiles = json.loads(store.read_text())['profiles']
+    assert profiles[pm.DEFAULT_PROFILE] == legacy
+    assert profiles['1920x1080'] == positions_for(AREAS)
+
+
+def test_newer_schema_is_not_overwritten(store):
+    content = json.dumps({'version': pm.SCHEMA_VERSION + 1, 'profiles': {}, 'extra': True})
+    store.write_text(content)
+
+    with pytest.raises(pm.UnsupportedSchemaError):
+        pm.read_store()
+    assert not pm.save_positions(positions_for(AREAS))
+    assert store.read_text() == content
+    assert not os.path.exists(f"{store}.corrupt")
+
+
+@pytest.mark.parametrize('content', ['{"dashboard": ', '[1, 2]', '{"version": 2, "profiles": []}'])
+def test_unreadable_file_is_moved_aside(store, content):
+    store.write_text(content)
+    assert pm.load_positions() is None
+
+    assert pm.save_positions(positions_for(AREAS))
+    assert open(f"{store}.corrupt").read() == content
+    assert pm.load_positions() == positions_for(AREAS)
+
+
+def test_write_atomic_leaves_no_temporary_files(tmp_path):
+    path = tmp_path / 'data.json'
+    pm.write_atomic(str(path), 'first')
+    pm.write_atomic(str(path), 'second')
+    assert path.read_text() == 'second'
+    assert os.listdir(tmp_path) == ['data.json']
+
+
+def test_read_store_reuses_the_parsed_file_until_it_changes():
+    assert pm.save_positions(positions_for(['dashboard']))
+    first = pm.read_store()
+    assert pm.read_store() is first
+
+    assert pm.save_positions(positions_for(AREAS))
+    second = pm.read_store()
+    assert second is not first
+    assert second['profiles']['1920x1080'] == positions_for(AREAS)
+
+
+def test_get_positions_captures_only_missing_elements(store, capture):
+    assert pm.save_positions(positions_for(['dashboard', 'messages']))
+
+    layout = pm.get_positions(ELEMENTS)
+    assert capture.asked == [['inbox', 'sent']]
+    assert layout.get('sent').bounds == AREAS['sent'].bounds
+    assert pm.load_positions() == positions_for(AREAS)
+
+    # Nothing is missing the second time, so nothing is asked or written
+    signature = pm.file_signature(str(store))
+    assert pm.get_positions(ELEMENTS) == layout
+    assert capture.asked == [['inbox', 'sent']]
+    assert pm.file_signature(str(store)) == signature
+
+
+def test_get_positions_saves_a_partial_capture(store, capture):
+    # Sub-menu items skipped with Tab are left out, not asked for again
+    capture.rounds = [{'dashboard': AREAS['dashboard'], 'messages': AREAS['messages']}]
+
+    layout = pm.get_positions(ELEMENTS)
+    assert capture.asked == [['dashboard', 'messages', 'inbox', 'sent']]
+    assert [element.name for element in layout.flat] == ['dashboard', 'messages']
+    assert pm.load_positions() == positions_for(['dashboard', 'messages'])
+
+    # The next start only asks for what is still missing
+    capture.rounds = [AREAS]
+    layout = pm.get_positions(ELEMENTS)
+    assert capture.asked[-1] == ['inbox', 'sent']
+    assert pm.load_positions() == positions_for(AREAS)
+
+
+def test_get_positions_fails_without_any_position(store, capture):
+    capture.rounds = [{}]
+    with pytest.raises(RuntimeError):
+        pm.get_positions(ELEMENTS)
+    assert len(capture.asked) == 1
+    assert not store.exists()
@@ -0,0 +1,95 @@
+"""
+Tests for reloading the positions file while running.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+import define
+import position_manager as pm
+import position_watcher
+from position_watcher import reload_positions
+from regions import ElementLayout, Region
+
+ELEMENTS = [{'name': 'dashboard'}, {'name': 'messages'}]
+
+
+def positions(x_offset=0):
+    return {
+        'dashboard': Region(10 + x_offset, 30 + x_offset, 10, 30).to_dict(),
+        'messages': Region(100 + x_offset, 140 + x_offset, 10, 30).to_dict(),
+    }
+
+
+@pytest.fixture
+def current(tmp_path, monkeypatch):
+    """Install known press links and restore the previous ones afterwards."""
+    monkeypatch.setattr(pm, 'screen_resolution', lambda: None)
+    layout = ElementLayout.from_dicts(positions())
+    previous = define.set_press_links(layout)
+    yield layout
+    define.set_press_links(previous)
+
+
+@pytest.mark.parametrize('content', [
+    '{"dashboard": ',
+    json.dumps({'version': 2, 'profiles': {'default': {'dashboard': 'top left'}}}),
+    json.dumps({'version': 2, 'profiles': {'default': {}}}),
+    json.dumps({'version': pm.SCHEMA_VERSION + 1, 'profiles': {}}),
+])
+def test_invalid_file_keeps_the_current_positions(tmp_path, current, content):
+    path = tmp_path / 'positions.json'
+    path.write_text(content)
+    assert not reload_positions(str(path), ELEMENTS)
+    assert define.get_press_links() is current
+
+
+def test_removed_file_keeps_the_current_positions(tmp_path, current):
+    assert not reload_positions(str(tmp_path / 'missing.json'), ELEMENTS)
+    assert define.get_press_links() is current
+
+
+def test_valid_file_replaces_the_positions(tmp_path, current):
+    path = tmp_path / 'positions.json'
+    path.write_text(json.dumps({'version': 2, 'profiles': {'default': positions(5)}}))
+
+    assert reload_positions(str(path), ELEMENTS)
+    assert define.get_press_links() == ElementLayout.from_dicts(positions(5))
+
+
+def test_unchanged_file_keeps_the_layout_object(tmp_path, current):
+    path = tmp_path / 'positions.json'
+    path.write_text(json.dumps({'version': 2, 'profiles': {'default': positions()}}))
+
+    assert not reload_positions(str(path), ELEMENTS)
+    assert define.get_press_links() is current
+
+
+def test_watch_reloads_once_without_spinning(tmp_path, monkeypatch):
+    path = tmp_path / 'positions.json'
+    try:
+        position_watcher.InotifyWatch(str(path)).close()
+    except OSError:
+        pytest.skip("inotify is not available")
+
+    reloads = []
+    monkeypatch.setattr(position_watcher, 'reload_positions', reloads.append)
+
+    async def change_file() -> float:
+        task = asyncio.create_task(position_watcher.watch_positions(str(path)))
+        await asyncio.sleep(0.05)
+        path.write_text(json.dumps({'version': 2, 'profiles': {'default': positions()}}))
+        (tmp_path / 'unrelated.txt').write_text('ignored')
+        cpu = time.process_time()
+        await asyncio.sleep(position_watcher.SETTLE_DELAY + 0.2)
+        cpu = time.process_time() - cpu
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return cpu
+
+    cpu = asyncio.run(change_file())
+    assert reloads == [str(path)]
+    # A busy loop during the settle delay would use the CPU for all of it
+    assert cpu < position_watcher.SETTLE_DELAY / 2
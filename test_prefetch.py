@@ -0,0 +1,62 @@
+"""
+Tests for the trajectory prefetch pipeline.
+"""
+import threading
+import time
+
+from prefetch import ActionPlan, ActionStep, PlannedMove, TrajectoryPrefetcher
+
+
+def plan_from(start_pos):
+    end_pos = (start_pos[0] + 10, start_pos[1])
+    return ActionPlan('test', [ActionStep('move', PlannedMove(start_pos, end_pos, 0.1, None))])
+
+
+def test_plans_chain_from_the_previous_end():
+    prefetcher = TrajectoryPrefetcher(plan_from, (0, 0))
+    prefetcher.start()
+    try:
+        starts = [prefetcher.get(timeout=5).steps[0].move.start_pos for _ in range(4)]
+    finally:
+        prefetcher.join(timeout=5)
+    assert starts == [(0, 0), (10, 0), (20, 0), (30, 0)]
+
+
+def test_stop_does_not_wait_for_the_worker():
+    entered = threading.Event()
+    release = threading.Event()
+
+    def slow_planner(start_pos):
+        entered.set()
+        release.wait(5)
+        return plan_from(start_pos)
+
+    prefetcher = TrajectoryPrefetcher(slow_planner, (0, 0))
+    prefetcher.start()
+    assert entered.wait(5)
+
+    started = time.perf_counter()
+    prefetcher.stop()
+    assert time.perf_counter() - started < 0.05
+
+    # The plan finished after the stop is dropped
+    release.set()
+    time.sleep(0.1)
+    assert prefetcher._queue.empty()
+
+
+def test_reset_replans_from_the_new_position():
+    prefetcher = TrajectoryPrefetcher(plan_from, (0, 0), depth=2)
+    prefetcher.start()
+    try:
+        # Let the worker fill the queue and wait for room
+        deadline = time.monotonic() + 5
+        while not prefetcher._queue.full() and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        started = time.perf_counter()
+        prefetcher.reset((500, 500))
+        assert time.perf_counter() - started < 0.05
+        assert prefetcher.get(timeout=5).steps[0].move.start_pos == (500, 500)
+    finally:
+        prefetcher.join(timeout=5)
@@ -0,0 +1,165 @@
+"""
+Tests for the step scheduler, on a fake clock.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from scheduler import StepScheduler, jittered_step_times, run_sync
+
+
+class FakeClock:
+    """Clock that only advances when sleeping or when told to."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        # A little extra so the spin loop never waits on float rounding
+        self.now += max(seconds, 0.0) + 1e-9
+
+
+class FakeCancel:
+    """Cancel event set after a number of waits."""
+
+    def __init__(self, clock: FakeClock, after: int):
+        self.clock = clock
+        self.after = after
+
+    def wait(self, timeout: float) -> bool:
+        if self.after <= 0:
+            return True
+        self.after -= 1
+        self.clock.sleep(timeout)
+        return False
+
+
+def make_scheduler(clock: FakeClock, **kwargs) -> StepScheduler:
+    # No spinning: the fake clock only moves when something sleeps
+    return StepScheduler(spin_threshold=0.0, clock=clock.time, sleep=clock.sleep, **kwargs)
+
+
+def test_points_are_emitted_on_their_deadlines():
+    clock = FakeClock()
+    emitted = []
+    scheduler = make_scheduler(clock)
+    points = [(i, i) for i in range(5)]
+    timing = scheduler.run(points, [0.0, 0.1, 0.2, 0.3, 0.4], lambda x, y: emitted.append((clock.now, x, y)))
+
+    assert [(x, y) for _, x, y in emitted] == points
+    offsets = [t - emitted[0][0] for t, _, _ in emitted]
+    assert offsets == pytest.approx([0.0, 0.1, 0.2, 0.3, 0.4], abs=1e-6)
+    assert timing.skipped == 0 and not timing.cancelled
+    assert timing.error == pytest.approx(0.0, abs=1e-6)
+
+
+def test_late_steps_are_skipped_but_not_the_last():
+    clock = FakeClock()
+    emitted = []
+
+    def slow_emit(x: int, y: int) -> None:
+        emitted.append((x, y))
+        # Each event costs three steps' worth of time
+        clock.now += 0.3
+
+    timing = make_scheduler(clock).run([(i, 0) for i in range(10)], [i * 0.1 for i in range(10)], slow_emit)
+
+    assert timing.skipped > 0
+    assert len(emitted) + timing.skipped == 10
+    assert emitted[-1] == (9, 0)
+
+
+def test_on_step_reports_lateness():
+    clock = FakeClock()
+    lateness = []
+    scheduler = make_scheduler(clock, on_step=lateness.append)
+    scheduler.run([(0, 0), (1, 1)], [0.0, 0.5], lambda x, y: None)
+    assert len(lateness) == 2
+    assert all(0.0 <= late < 1e-6 for late in lateness)
+
+
+def test_cancel_stops_the_move():
+    clock = FakeClock()
+    emitted = []
+    timing = make_scheduler(clock).run([(i, 0) for i in range(5)], [i * 0.1 for i in range(5)],
+                                       lambda x, y: emitted.append(x), cancel=FakeCancel(clock, after=2))
+
+    assert timing.cancelled
+    assert emitted == [0, 1, 2]
+
+
+def test_flush_sends_each_queued_point_on_its_deadline():
+    clock = FakeClock()
+    events = []
+    scheduler = make_scheduler(clock)
+    scheduler.run([(0, 0), (1, 0)], [0.0, 0.2], lambda x, y: events.append(('emit', x, clock.now)),
+                  flush=lambda: events.append(('flush', None, clock.now)))
+
+    assert [kind for kind, _, _ in events] == ['emit', 'flush', 'emit', 'flush']
+    # The second point is queued early and sent on its deadline
+    assert events[3][2] - events[2][2] == pytest.approx(0.2, abs=1e-6)
+
+
+def test_flush_sends_points_due_within_the_flush_interval_together():
+    clock = FakeClock()
+    events = []
+    scheduler = make_scheduler(clock, flush_interval=0.02)
+    step_times = [0.0, 0.01, 0.02, 0.05, 0.06, 0.1]
+    scheduler.run([(i, 0) for i in range(6)], step_times, lambda x, y: events.append(x),
+                  flush=lambda: events.append(('flush', round(clock.now - 100.0, 6))))
+
+    # Each group is sent on the deadline of its last point, the last point on its own
+    assert events == [0, 1, 2, ('flush', 0.02), 3, 4, ('flush', 0.06), 5, ('flush', 0.1)]
+
+
+def test_stats_summarize_history():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    for _ in range(3):
+        scheduler.run([(0, 0), (1, 1)], [0.0, 0.1], lambda x, y: None)
+    stats = scheduler.stats()
+    assert stats['moves'] == 3
+
+
+def test_jittered_step_times_end_on_the_duration():
+    offsets = jittered_step_times(50, 1.5, uniform=np.random.default_rng(3).random(49))
+    assert offsets[0] == 0.0
+    assert offsets[-1] == pytest.approx(1.5)
+    assert np.all(np.diff(offsets) > 0)
+
+
+def test_run_async_matches_run():
+    points = [(i, i) for i in range(6)]
+    step_times = [i * 0.1 for i in range(6)]
+    results = []
+    for use_async in (False, True):
+        clock = FakeClock()
+        emitted = []
+
+        async def advance(seconds):
+            clock.sleep(seconds)
+
+        def emit(x, y):
+            emitted.append((round(clock.now - 100.0, 6), x, y))
+
+        scheduler = make_scheduler(clock, async_sleep=advance)
+        if use_async:
+            timing = asyncio.run(scheduler.run_async(points, step_times, emit))
+        else:
+            timing = scheduler.run(points, step_times, emit)
+        results.append((emitted, timing.skipped, round(timing.actual, 6)))
+
+    assert results[0] == results[1]
+
+
+def test_run_sync_rejects_a_suspending_coroutine():
+    async def done():
+        return 'done'
+
+    assert run_sync(done()) == 'done'
+    with pytest.raises(RuntimeError):
+        run_sync(asyncio.sleep(0.01))
@@ -0,0 +1,75 @@
+"""
+Tests for the grid index over element regions.
+"""
+import numpy as np
+import pytest
+
+from regions import Region
+from spatial_index import GridIndex
+
+
+def random_regions(rng, count):
+    regions = []
+    for _ in range(count):
+        x, y = rng.integers(0, 500, size=2)
+        width, height = rng.integers(0, 120, size=2)
+        regions.append(Region(int(x), int(x + width), int(y), int(y + height)))
+    return regions
+
+
+def first_match(regions, x, y):
+    return next((i for i, region in enumerate(regions) if region.contains(x, y)), -1)
+
+
+@pytest.mark.parametrize('cell_size', [1, 16, 32, 1000])
+@pytest.mark.parametrize('seed', range(3))
+def test_lookups_match_a_linear_scan(seed, cell_size):
+    rng = np.random.default_rng(seed)
+    regions = random_regions(rng, 40)
+    index = GridIndex(regions, cell_size)
+    points = rng.integers(-50, 700, size=(2000, 2))
+
+    expected = [first_match(regions, x, y) for x, y in points.tolist()]
+    assert [index.lookup(x, y) for x, y in points.tolist()] == expected
+    assert index.lookup_many(points).tolist() == expected
+
+
+def test_region_edges_are_inclusive():
+    index = GridIndex([Region(10, 20, 10, 20)], cell_size=8)
+    assert index.lookup(10, 10) == 0
+    assert index.lookup(20, 20) == 0
+    assert index.lookup(21, 20) == -1
+    assert index.lookup(9, 15) == -1
+
+
+def test_empty_index_finds_nothing():
+    index = GridIndex([])
+    assert index.lookup(0, 0) == -1
+    assert index.lookup_many(np.array([[0, 0], [5, 5]])).tolist() == [-1, -1]
+    assert index.entries(np.array([[0, 0]])) == {}
+    assert index.overlapping_pairs() == []
+
+
+def test_entries_count_each_time_a_path_enters():
+    rng = np.random.default_rng(4)
+    regions = random_regions(rng, 20)
+    index = GridIndex(regions, 24)
+    # A random walk crosses in and out of regions many times
+    path = np.cumsum(rng.integers(-6, 7, size=(3000, 2)), axis=0) + 250
+
+    expected = {}
+    previous = -1
+    for x, y in path.tolist():
+        hit = first_match(regions, x, y)
+        if hit >= 0 and hit != previous:
+            expected[hit] = expected.get(hit, 0) + 1
+        previous = hit
+    assert index.entries(path) == expected
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_overlapping_pairs_match_brute_force(seed):
+    regions = random_regions(np.random.default_rng(seed), 30)
+    expected = [(i, j) for i in range(len(regions)) for j in range(i + 1, len(regions))
+                if regions[i].overlaps(regions[j])]
+    assert GridIndex(regions, 32).overlapping_pairs() == expected
@@ -0,0 +1,32 @@
+"""
+Tests for the trajectory engine.
+"""
+from easing import ease_in_out_quad, linear
+from trajectory import MAX_STEPS, STEP_QUANTUM, BasisCache, step_count
+
+
+def test_step_counts_are_rounded_up_to_the_quantum():
+    assert STEP_QUANTUM == 8
+    # 15 steps for the rate, 9 for the gap, rounded up to 16
+    assert step_count(1.0, 0.5, linear, max_gap=40.0, min_rate=30.0) == 16
+    assert step_count(330.0, 0.1, linear, max_gap=40.0, min_rate=30.0) == 16
+    assert step_count(320.0, 0.1, linear, max_gap=40.0, min_rate=30.0) == 8
+    assert step_count(10 ** 6, 10.0, ease_in_out_quad) == MAX_STEPS
+
+
+def test_caches_count_hits_separately():
+    cache = BasisCache(maxsize=2, parameter_maxsize=2)
+    cache.parameters(16, linear)
+    cache.parameters(16, linear)
+    cache.get(3, 16, linear)
+    cache.get(3, 16, linear)
+    cache.get(2, 255, linear)
+
+    stats = cache.stats()
+    assert (stats['parameters']['hits'], stats['parameters']['misses']) == (1, 1)
+    assert (stats['basis']['hits'], stats['basis']['misses']) == (1, 2)
+    # The basis miss for 255 steps stored a second parameter vector
+    assert stats['parameters']['size'] == 2
+
+    cache.parameters(8, linear)
+    assert cache.stats()['parameters']['size'] == 2
@@ -0,0 +1,51 @@
+"""
+Tests for the trajectory library.
+"""
+import numpy as np
+
+import random_source
+from easing import ease_in_out_quad
+from trajectory import MAX_STEP_GAP, MIN_STEP_RATE, arc_length_table, eased_path, step_count
+from trajectory_library import TrajectoryLibrary, fit_steps, normalize_path, transform_path
+
+
+def straight_path(start, end, duration):
+    points = [start, end]
+    table = arc_length_table(points)
+    return eased_path(points, step_count(table.length, duration, ease_in_out_quad), ease_in_out_quad, table)
+
+
+def max_gap(path: np.ndarray) -> float:
+    return float(np.max(np.hypot(*np.diff(path, axis=0).T)))
+
+
+def test_normalize_round_trip():
+    path = np.array([[10.0, 20.0], [40.0, 35.0], [110.0, 20.0]])
+    normalized = normalize_path(path, (10, 20), (110, 20))
+    assert np.allclose(transform_path(normalized, (10, 20), (110, 20)), path)
+
+
+def test_reused_path_keeps_step_rate_and_gap():
+    random_source.seed(7)
+    library = TrajectoryLibrary(pool_size=1)
+    route = ('dashboard', 'messages')
+
+    # Fill the pool with a short, fast move
+    short_start, short_end = (100, 100), (400, 150)
+    first = library.get(route, short_start, short_end, lambda: straight_path(short_start, short_end, 0.6), 0.6)
+
+    # Reuse it for a long, slow move between the same regions
+    start, end = (100, 100), (1700, 900)
+    duration = 2.7
+    path = library.get(route, start, end, lambda: straight_path(start, end, duration), duration)
+
+    assert library.hits == 1
+    assert len(path) > len(first)
+    assert len(path) - 1 >= duration * MIN_STEP_RATE - 1e-9
+    assert max_gap(path) <= MAX_STEP_GAP + 1e-9
+    assert np.allclose(path[0], start) and np.allclose(path[-1], end)
+
+
+def test_fit_steps_keeps_paths_that_already_fit():
+    path = np.column_stack((np.linspace(0.0, 300.0, 61), np.zeros(61)))
+    assert fit_steps(path, 1.0) is path
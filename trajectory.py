@@ -0,0 +1,521 @@
+"""
+Trajectory engine for the Python Auto Movement application.
+This module computes complete Bézier mouse paths in one batch using NumPy.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from math import ceil, comb
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from easing import easing_functions, linear
+from random_source import get_generator
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default number of (degree, steps, easing) basis matrices kept in the basis
+# cache. Only the arc-length tables use them, with one entry per curve degree.
+DEFAULT_CACHE_SIZE = 256
+
+# Number of curve samples in the arc-length lookup table of each move
+ARC_LENGTH_SAMPLES = 256
+
+# Largest distance the pointer may jump in one step (in pixels). Spacing
+# steps by parameter used to leave gaps of 40 to several hundred pixels on
+# long eased moves.
+MAX_STEP_GAP = 40.0
+
+# Lowest step rate, so slow short moves still update regularly (in steps per
+# second). Never below the 60 steps per second moves have always had.
+MIN_STEP_RATE = 60.0
+
+# Upper bound on the steps of one move, to prevent excessive CPU usage
+MAX_STEPS = 200
+
+# Step counts are rounded up to a multiple of this, so moves of similar
+# length share cached parameter vectors; a few extra steps only make the
+# gaps smaller
+STEP_QUANTUM = 8
+
+# Default number of (steps, easing) parameter vectors kept in the basis cache:
+# every rounded step count of every easing curve, under 1 MB when all are in use
+DEFAULT_PARAMETER_CACHE_SIZE = ceil(MAX_STEPS / STEP_QUANTUM) * len(easing_functions)
+
+
+def eased_parameters(steps: int, easing_function: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+    """
+    Build the eased curve parameter for every step of a move.
+
+    Args:
+        steps: Number of steps in the move (the array has steps + 1 entries)
+        easing_function: Vectorized easing function mapping linear t to eased t
+
+    Returns:
+        Array of shape (steps + 1,) with the eased parameter values
+    """
+    t = np.linspace(0.0, 1.0, steps + 1)
+    # Easing functions from the easing module accept whole arrays
+    return np.asarray(easing_function(t), dtype=np.float64)
+
+
+def bernstein_basis(degree: int, t: np.ndarray) -> np.ndarray:
+    """
+    Evaluate every Bernstein polynomial of the given degree at each value of t.
+
+    Args:
+        degree: Degree of the Bézier curve (number of control points - 1)
+        t: Array of curve parameters between 0 and 1
+
+    Returns:
+        Array of shape (len(t), degree + 1) where row k holds the weights of
+        each control point at t[k]
+    """
+    t = np.asarray(t, dtype=np.float64)[:, np.newaxis]
+    i = np.arange(degree + 1)
+    binomials = np.array([comb(degree, k) for k in i], dtype=np.float64)
+    return binomials * (t ** i) * ((1.0 - t) ** (degree - i))
+
+
+class BasisCache:
+    """
+    Bounded LRU caches of eased parameter vectors and Bernstein basis matrices.
+
+    Parameter vectors are keyed by (steps, easing function) and basis
+    matrices by (degree, steps, easing function), both shared by all moves.
+    Arc-length spacing only needs the parameters, so they are cached on
+    their own; a basis entry reuses the cached parameter vector. Each cache
+    has its own size limit and hit/miss counters.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE,
+                 parameter_maxsize: int = DEFAULT_PARAMETER_CACHE_SIZE):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of basis matrices kept before evicting the least recently used
+            parameter_maxsize: Maximum number of parameter vectors kept before evicting the least recently used
+        """
+        self.maxsize = maxsize
+        self.parameter_maxsize = parameter_maxsize
+        self.basis_hits = 0
+        self.basis_misses = 0
+        self.parameter_hits = 0
+        self.parameter_misses = 0
+        self._entries: "OrderedDict[Tuple[int, int, Callable], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._parameters: "OrderedDict[Tuple[int, Callable], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, degree: int, steps: int,
+            easing_function: Callable[[float], float]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the eased parameters and basis matrix, computing them on a miss.
+
+        Args:
+            degree: Degree of the Bézier curve
+            steps: Number of steps in the move
+            easing_function: Easing function applied to the curve parameter
+
+        Returns:
+            Tuple of (eased parameters of shape (steps + 1,),
+            basis matrix of shape (steps + 1, degree + 1)), both read-only
+        """
+        key = (degree, steps, easing_function)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.basis_hits += 1
+                return entry
+            self.basis_misses += 1
+            t_eased = self._parameters.get((steps, easing_function))
+
+        # Compute outside the lock so other moves are not blocked
+        if t_eased is None:
+            t_eased = self._store_parameters(steps, easing_function)
+        basis = bernstein_basis(degree, t_eased)
+        basis.setflags(write=False)
+        entry = (t_eased, basis)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+        return entry
+
+    def parameters(self, steps: int, easing_function: Callable[[float], float]) -> np.ndarray:
+        """
+        Get the eased parameters alone, computing them on a miss.
+
+        Args:
+            steps: Number of steps in the move
+            easing_function: Easing function applied to the curve parameter
+
+        Returns:
+            Read-only eased parameters of shape (steps + 1,)
+        """
+        key = (steps, easing_function)
+        with self._lock:
+            t_eased = self._parameters.get(key)
+            if t_eased is not None:
+                self._parameters.move_to_end(key)
+                self.parameter_hits += 1
+                return t_eased
+            self.parameter_misses += 1
+        return self._store_parameters(steps, easing_function)
+
+    def resize(self, maxsize: int, parameter_maxsize: Optional[int] = None) -> None:
+        """
+        Change the maximum number of entries, evicting if necessary.
+
+        Args:
+            maxsize: New maximum number of basis matrices
+            parameter_maxsize: New maximum number of parameter vectors, unchanged if not given
+
+        Raises:
+            ValueError: If a size is below 1
+        """
+        if maxsize < 1 or (parameter_maxsize is not None and parameter_maxsize < 1):
+            raise ValueError(f"Cache size must be at least 1, got {maxsize} and {parameter_maxsize}")
+        with self._lock:
+            self.maxsize = maxsize
+            if parameter_maxsize is not None:
+                self.parameter_maxsize = parameter_maxsize
+            self._evict()
+
+    def clear(self) -> None:
+        """Remove every entry and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self._parameters.clear()
+            self.basis_hits = self.basis_misses = 0
+            self.parameter_hits = self.parameter_misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes used by the cached arrays, counting shared parameter vectors once."""
+        with self._lock:
+            vectors = {id(t): t for t, _ in self._entries.values()}
+            vectors.update((id(t), t) for t in self._parameters.values())
+            return (sum(basis.nbytes for _, basis in self._entries.values())
+                    + sum(t.nbytes for t in vectors.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the cache usage.
+
+        Returns:
+            Dictionary with 'basis' and 'parameters' dictionaries of size,
+            maxsize, hits, misses and hit_rate, and the total nbytes
+        """
+        nbytes = self.nbytes
+        with self._lock:
+            return {
+                'basis': _cache_stats(len(self._entries), self.maxsize, self.basis_hits, self.basis_misses),
+                'parameters': _cache_stats(len(self._parameters), self.parameter_maxsize,
+                                           self.parameter_hits, self.parameter_misses),
+                'nbytes': nbytes,
+            }
+
+    def _store_parameters(self, steps: int, easing_function: Callable[[float], float]) -> np.ndarray:
+        """Compute and cache the eased parameters of a (steps, easing function) key."""
+        t_eased = eased_parameters(steps, easing_function)
+        t_eased.setflags(write=False)
+        with self._lock:
+            self._parameters[(steps, easing_function)] = t_eased
+            self._parameters.move_to_end((steps, easing_function))
+            self._evict()
+        return t_eased
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the caches fit. Caller holds the lock."""
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        while len(self._parameters) > self.parameter_maxsize:
+            self._parameters.popitem(last=False)
+
+
+def _cache_stats(size: int, maxsize: int, hits: int, misses: int) -> Dict[str, Any]:
+    """Summarize the usage of one cache."""
+    total = hits + misses
+    return {
+        'size': size,
+        'maxsize': maxsize,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else 0.0,
+    }
+
+
+# Cache shared by all moves
+basis_cache = BasisCache()
+
+
+class ArcLengthTable(NamedTuple):
+    """
+    Arc-length lookup table of one Bézier curve.
+
+    Holds points sampled densely along the curve with the fraction of the
+    total length reached at each, so steps can be placed by distance rather
+    than by curve parameter, which bunches points where the curve is tight.
+    """
+    # (ARC_LENGTH_SAMPLES, 2) points at uniformly spaced curve parameters
+    points: np.ndarray
+    # (ARC_LENGTH_SAMPLES,) fraction of the total length reached at each point
+    fraction: np.ndarray
+    # Total length of the curve (in pixels)
+    length: float
+
+    def positions(self, fractions: np.ndarray) -> np.ndarray:
+        """
+        Find the position reached after each fraction of the length.
+
+        Positions are interpolated between the samples, which are a few
+        pixels apart, so the error is far below a pixel. Fractions outside
+        [0, 1], from easing functions that overshoot, continue along the
+        first or last sample so the path extends past its ends.
+
+        Args:
+            fractions: Fractions of the total length
+
+        Returns:
+            Float array of shape (len(fractions), 2) with the positions
+        """
+        fractions = np.asarray(fractions, dtype=np.float64)
+        path = np.empty((len(fractions), 2))
+        path[:, 0] = np.interp(fractions, self.fraction, self.points[:, 0])
+        path[:, 1] = np.interp(fractions, self.fraction, self.points[:, 1])
+        if self.length == 0.0:
+            return path
+
+        # np.interp clamps, so extend both ends linearly
+        below = fractions < 0.0
+        if below.any():
+            slope = (self.points[1] - self.points[0]) / self.fraction[1]
+            path[below] = self.points[0] + fractions[below, np.newaxis] * slope
+        above = fractions > 1.0
+        if above.any():
+            slope = (self.points[-1] - self.points[-2]) / (1.0 - self.fraction[-2])
+            path[above] = self.points[-1] + (fractions[above, np.newaxis] - 1.0) * slope
+        return path
+
+
+def arc_length_table(points: Sequence[Tuple[int, int]], samples: int = ARC_LENGTH_SAMPLES) -> ArcLengthTable:
+    """
+    Build the arc-length lookup table of a Bézier curve.
+
+    The curve is sampled at uniformly spaced parameters, with the basis
+    matrix shared through the basis cache, and the length is approximated
+    by the sum of the chords between samples.
+
+    Args:
+        points: List of control points including start and end positions
+        samples: Number of curve samples in the table
+
+    Returns:
+        The lookup table of the curve
+    """
+    control = np.asarray(points, dtype=np.float64)
+    u, basis = basis_cache.get(len(control) - 1, samples - 1, linear)
+    sampled = basis @ control
+
+    chords = np.hypot(*np.diff(sampled, axis=0).T)
+    cumulative = np.cumsum(chords)
+    length = float(cumulative[-1])
+    if length == 0.0:
+        return ArcLengthTable(sampled, u, 0.0)
+
+    fraction = np.empty(samples)
+    fraction[0] = 0.0
+    np.divide(cumulative, length, out=fraction[1:])
+    return ArcLengthTable(sampled, fraction, length)
+
+
+@lru_cache(maxsize=None)
+def max_easing_slope(easing_function: Callable[[np.ndarray], np.ndarray], samples: int = 1024) -> float:
+    """
+    Find the steepest slope of an easing function over [0, 1].
+
+    Args:
+        easing_function: Vectorized easing function
+        samples: Number of intervals the slope is measured over
+
+    Returns:
+        Largest absolute change of the eased value per unit of t
+    """
+    eased = np.asarray(easing_function(np.linspace(0.0, 1.0, samples + 1)), dtype=np.float64)
+    return float(np.max(np.abs(np.diff(eased)))) * samples
+
+
+def step_count(length: float, duration: float, easing_function: Callable[[np.ndarray], np.ndarray],
+               max_gap: float = MAX_STEP_GAP, min_rate: float = MIN_STEP_RATE,
+               max_steps: int = MAX_STEPS) -> int:
+    """
+    Choose the number of steps of a move from the largest allowed pixel gap.
+
+    With arc-length spacing, the distance covered by a step is the path
+    length times the change of the eased value, which is largest where the
+    easing function is steepest.
+
+    Args:
+        length: Length of the path (in pixels)
+        duration: The duration for the move (in seconds)
+        easing_function: Easing function giving the velocity profile
+        max_gap: Largest distance the pointer may jump in one step (in pixels)
+        min_rate: Lowest step rate (in steps per second)
+        max_steps: Upper bound on the number of steps
+
+    Returns:
+        Number of steps, a multiple of STEP_QUANTUM between 1 and max_steps
+    """
+    by_gap = ceil(length * max_easing_slope(easing_function) / max_gap)
+    by_rate = ceil(duration * min_rate)
+    steps = max(by_gap, by_rate, 1)
+    return int(min(ceil(steps / STEP_QUANTUM) * STEP_QUANTUM, max_steps))
+
+
+def compute_trajectory(points: Sequence[Tuple[int, int]], t_eased: np.ndarray,
+                       deviation: np.ndarray = None) -> np.ndarray:
+    """
+    Calculate every point of a Bézier curve in a single matrix product.
+
+    Args:
+        points: List of control points including start and end positions
+        t_eased: Eased curve parameters, one per step
+        deviation: Optional (N, 2) array of offsets added before truncation
+
+    Returns:
+        Integer array of shape (N, 2) with the mouse positions for each step
+    """
+    control = np.asarray(points, dtype=np.float64)
+    path = bernstein_basis(len(control) - 1, t_eased) @ control
+
+    if deviation is not None:
+        path += deviation
+
+    # Truncate towards zero to match int() on each coordinate
+    return np.trunc(path).astype(np.int64)
+
+
+def human_deviation(steps: int, uniform: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Generate small random offsets that simulate human imprecision.
+
+    The deviation decreases linearly as the move approaches the target.
+
+    Args:
+        steps: Number of steps in the move (the array has steps + 1 entries)
+        uniform: Optional (steps + 1, 2) array of uniform draws in [0, 1),
+            drawn from the shared generator if not given
+
+    Returns:
+        Array of shape (steps + 1, 2) with the x and y offsets for each step
+    """
+    if uniform is None:
+        uniform = get_generator().random((steps + 1, 2))
+    t = np.linspace(0.0, 1.0, steps + 1)
+    deviation_factor = (1.0 - t) * 2  # More deviation at the beginning
+    return (uniform * 2.0 - 1.0) * deviation_factor[:, np.newaxis]
+
+
+def collapse_duplicates(trajectory: np.ndarray,
+                        step_times: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Drop steps that repeat the pixel of the step before them.
+
+    Truncation often lands consecutive steps on the same pixel, mostly on
+    short moves and where eased curves slow down. A repeated step only costs
+    an event, so it is dropped and the point before it simply holds until the
+    next distinct point is due. When the path ends on a repeated pixel, that
+    pixel is sent at the final step time instead, so the move still ends when
+    requested.
+
+    Args:
+        trajectory: Integer array of shape (N, 2) with the mouse positions
+        step_times: Array of shape (N,) with the offset of each position
+
+    Returns:
+        Tuple of (remaining positions, their offsets, number of steps dropped)
+    """
+    if len(trajectory) < 2:
+        return trajectory, step_times, 0
+
+    keep = np.empty(len(trajectory), dtype=bool)
+    keep[0] = True
+    np.any(trajectory[1:] != trajectory[:-1], axis=1, out=keep[1:])
+
+    # Keep the end time of the move by sending its last pixel at the last step
+    if not keep[-1]:
+        keep[np.flatnonzero(keep)[-1]] = False
+        keep[-1] = True
+
+    saved = len(trajectory) - int(np.count_nonzero(keep))
+    if not saved:
+        return trajectory, step_times, 0
+    return trajectory[keep], step_times[keep], saved
+
+
+def eased_path(points: List[Tuple[int, int]], steps: int,
+               easing_function: Callable[[float], float],
+               table: Optional[ArcLengthTable] = None) -> np.ndarray:
+    """
+    Compute the eased positions of a move along a Bézier curve.
+
+    The easing function is applied to the distance travelled rather than to
+    the curve parameter, so the speed along the path follows the easing
+    profile however the curve bends.
+
+    Args:
+        points: List of control points including start and end positions
+        steps: Number of steps in the move
+        easing_function: Easing function applied to the distance travelled
+        table: Arc-length lookup table of the curve, built if not given
+
+    Returns:
+        Float array of shape (steps + 1, 2) with the exact positions
+    """
+    if table is None:
+        table = arc_length_table(points)
+
+    return table.positions(basis_cache.parameters(steps, easing_function))
+
+
+def humanize(path: np.ndarray, deviation: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Add human imprecision to an exact path and convert it to pixels.
+
+    Args:
+        path: Float array of shape (N, 2) with the exact positions
+        deviation: Offsets from human_deviation, generated if not given
+
+    Returns:
+        Integer array of shape (N, 2) with the mouse positions
+    """
+    path = path + (human_deviation(len(path) - 1) if deviation is None else deviation)
+
+    # Truncate towards zero to match int() on each coordinate
+    return np.trunc(path).astype(np.int64)
+
+
+def generate_trajectory(points: List[Tuple[int, int]], steps: int,
+                        easing_function: Callable[[float], float],
+                        table: Optional[ArcLengthTable] = None,
+                        deviation: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Generate the full human-like path for a move along a Bézier curve.
+
+    Args:
+        points: List of control points including start and end positions
+        steps: Number of steps in the move
+        easing_function: Easing function applied to the distance travelled
+        table: Arc-length lookup table of the curve, built if not given
+        deviation: Offsets from human_deviation, generated if not given
+
+    Returns:
+        Integer array of shape (steps + 1, 2) with the mouse positions
+    """
+    return humanize(eased_path(points, steps, easing_function, table), deviation)
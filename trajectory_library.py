@@ -0,0 +1,228 @@
+"""
+Trajectory library for the Python Auto Movement application.
+This module keeps pools of pre-generated paths between known UI regions, so
+repeated navigation moves reuse a path instead of generating a new one.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from math import ceil
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from random_source import get_generator
+from trajectory import MAX_STEP_GAP, MAX_STEPS, MIN_STEP_RATE
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Number of different paths kept for each pair of regions
+DEFAULT_POOL_SIZE = 8
+
+# Number of region pairs kept before evicting the least recently used
+DEFAULT_LIBRARY_SIZE = 64
+
+# Key of a pool: (source region, destination region)
+RouteKey = Tuple[Hashable, Hashable]
+
+
+def normalize_path(path: np.ndarray, start: Tuple[int, int], end: Tuple[int, int]) -> np.ndarray:
+    """
+    Express a path in a frame where the move goes from (0, 0) to (1, 0).
+
+    Args:
+        path: Float array of shape (N, 2) with the positions of the path
+        start: Starting position of the move
+        end: Ending position of the move
+
+    Returns:
+        Complex array of shape (N,) with the normalized positions
+    """
+    origin = complex(*start)
+    return (path[:, 0] + 1j * path[:, 1] - origin) / (complex(*end) - origin)
+
+
+def transform_path(normalized: np.ndarray, start: Tuple[int, int], end: Tuple[int, int]) -> np.ndarray:
+    """
+    Map a normalized path onto new endpoints.
+
+    The mapping is a similarity transform (translation, rotation and uniform
+    scaling), so the shape of the path is kept and it starts and ends
+    exactly on the given positions.
+
+    Args:
+        normalized: Complex array from normalize_path
+        start: Starting position of the move
+        end: Ending position of the move
+
+    Returns:
+        Float array of shape (N, 2) with the positions of the path
+    """
+    origin = complex(*start)
+    mapped = origin + normalized * (complex(*end) - origin)
+    return np.stack((mapped.real, mapped.imag), axis=1)
+
+
+def fit_steps(path: np.ndarray, duration: float, max_gap: float = MAX_STEP_GAP,
+              min_rate: float = MIN_STEP_RATE, max_steps: int = MAX_STEPS) -> np.ndarray:
+    """
+    Resample a path to the number of steps a move of this size and duration needs.
+
+    A pooled path keeps the step count of the move it was generated for,
+    which may be too few for a longer or slower move. The path is resampled
+    by step index, so its velocity profile is kept, to the fewest steps
+    that respect the same gap and rate limits as step_count.
+
+    Args:
+        path: Float array of shape (N, 2) with the positions of the path
+        duration: The duration for the move (in seconds)
+        max_gap: Largest distance the pointer may jump in one step (in pixels)
+        min_rate: Lowest step rate (in steps per second)
+        max_steps: Upper bound on the number of steps
+
+    Returns:
+        Float array of shape (steps + 1, 2) with the same first and last positions
+    """
+    steps = len(path) - 1
+    if steps < 1:
+        return path
+
+    # Interpolated steps cover at most their share of the largest gap
+    largest_gap = float(np.max(np.hypot(*np.diff(path, axis=0).T)))
+    by_gap = ceil(steps * largest_gap / max_gap)
+    by_rate = ceil(duration * min_rate)
+    target = int(min(max(by_gap, by_rate, 1), max_steps))
+    if target == steps:
+        return path
+
+    index = np.linspace(0.0, steps, target + 1)
+    known = np.arange(steps + 1)
+    return np.stack((np.interp(index, known, path[:, 0]), np.interp(index, known, path[:, 1])), axis=1)
+
+
+class TrajectoryLibrary:
+    """
+    Bounded LRU cache of path pools keyed by (source region, destination region).
+
+    Each pool fills up with freshly generated paths on its first uses and
+    then hands out a random path from the pool, mapped onto the exact
+    endpoints of the move and resampled to the steps its duration needs.
+    Random deviation and timing are still drawn per move, so reused paths
+    do not repeat exactly.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, maxsize: int = DEFAULT_LIBRARY_SIZE):
+        """
+        Initialize an empty library.
+
+        Args:
+            pool_size: Number of different paths kept for each pair of regions
+            maxsize: Number of region pairs kept before evicting the least recently used
+        """
+        self.pool_size = pool_size
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._pools: "OrderedDict[RouteKey, List[np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: RouteKey, start: Tuple[int, int], end: Tuple[int, int],
+            generate: Callable[[], np.ndarray], duration: float) -> np.ndarray:
+        """
+        Get a path between two positions, generating it while the pool is not full.
+
+        Args:
+            key: Source and destination region of the move
+            start: Starting position of the move
+            end: Ending position of the move, different from start
+            generate: Function generating a new float (N, 2) path from start to end
+            duration: The duration for the move (in seconds), which sets the
+                number of steps of a reused path
+
+        Returns:
+            Float array of shape (N, 2) with the positions of the path
+        """
+        normalized = None
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is not None:
+                self._pools.move_to_end(key)
+                if len(pool) >= self.pool_size:
+                    self.hits += 1
+                    normalized = pool[int(get_generator().integers(len(pool)))]
+            if normalized is None:
+                self.misses += 1
+
+        if normalized is not None:
+            return fit_steps(transform_path(normalized, start, end), duration)
+
+        # Generate outside the lock so other moves are not blocked
+        path = generate()
+        normalized = normalize_path(path, start, end)
+        normalized.setflags(write=False)
+
+        with self._lock:
+            pool = self._pools.setdefault(key, [])
+            if len(pool) < self.pool_size:
+                pool.append(normalized)
+            self._pools.move_to_end(key)
+            self._evict()
+        return path
+
+    def resize(self, maxsize: Optional[int] = None, pool_size: Optional[int] = None) -> None:
+        """
+        Change the number of region pairs or paths per pair, evicting if necessary.
+
+        Args:
+            maxsize: New number of region pairs, unchanged if None
+            pool_size: New number of paths per pair, unchanged if None
+        """
+        if maxsize is not None and maxsize < 1:
+            raise ValueError(f"Library size must be at least 1, got {maxsize}")
+        if pool_size is not None and pool_size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {pool_size}")
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if pool_size is not None:
+                self.pool_size = pool_size
+                for pool in self._pools.values():
+                    del pool[pool_size:]
+            self._evict()
+
+    def clear(self) -> None:
+        """Remove every pool and reset the hit/miss counters."""
+        with self._lock:
+            self._pools.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the library usage.
+
+        Returns:
+            Dictionary with routes, paths, pool_size, maxsize, hits, misses, hit_rate and nbytes
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'routes': len(self._pools),
+                'paths': sum(len(pool) for pool in self._pools.values()),
+                'pool_size': self.pool_size,
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'nbytes': sum(path.nbytes for pool in self._pools.values() for path in pool),
+            }
+
+    def _evict(self) -> None:
+        """Drop least recently used pools until the library fits. Caller holds the lock."""
+        while len(self._pools) > self.maxsize:
+            self._pools.popitem(last=False)
+
+
+# Library shared by all navigation moves
+trajectory_library = TrajectoryLibrary()